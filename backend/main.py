@@ -2,14 +2,17 @@
 K-Pop Motion Generation API
 FastAPI 백엔드 서버
 """
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Form, Request
+from fastapi import FastAPI, HTTPException, Form, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
-from starlette.background import BackgroundTask
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse, Response, FileResponse
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field, ValidationError
 from typing import Optional
-import uvicorn
 import os
+import asyncio
+import json
+import time
 from datetime import datetime
 import uuid
 import logging
@@ -19,7 +22,22 @@ logging.basicConfig(level=logging.INFO)
 
 # 서비스 임포트
 from services.audio_processor import AudioProcessor
-from services.motion_generator import MotionGenerator
+from services.motion_generator import MotionGenerator, DEFAULT_INTERNAL_FPS, DEFAULT_OUTPUT_FPS
+from services.model_warmup import ModelWarmup
+from services.inference_pool import InferencePool, PoolGenerator
+from services.job_store import create_job_store, SQLiteJobStore, JobNotFound, JobExpired, FINISHED_STATUSES
+from services.job_scheduler import JobScheduler, QueueFull, PRIORITIES
+from services.job_queue import SQLiteJobQueue
+from services.generation_pipeline import GenerationPipeline, queue_position_updater
+from services.motion_encoding import (
+    RESULT_MEDIA_TYPES, negotiate_format, encode_motion, encode_json, select_encoding, compress,
+    compress_chunks, max_quantization_error
+)
+from services.result_cache import ResultCache
+from services.motion_export import EXPORT_FORMATS, iter_motion_file
+from services.streaming_form import parse_motion_form, parse_upload_form
+from services.upload_spool import UploadSpool, UploadTooLarge, SpoolFull
+from services.export_cache import ExportCache
 
 app = FastAPI(
     title="K-Pop Motion Generation API",
@@ -27,6 +45,25 @@ app = FastAPI(
     version="1.0.0"
 )
 
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """
+    Content-Length가 업로드 제한을 넘으면 본문을 받기 전에 413 반환
+    (chunked 업로드처럼 Content-Length가 없으면 parse_upload_request가 본문을 받는 중에 제한)
+    CORS 미들웨어보다 먼저 등록해 413 응답에도 CORS 헤더가 붙음
+    """
+    if request.method == "POST" and request.url.path in UPLOAD_PATHS:
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and \
+                int(content_length) > MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Audio file size exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)}MB limit"}
+            )
+    return await call_next(request)
+
+
 # CORS 설정
 app.add_middleware(
     CORSMiddleware,
@@ -37,14 +74,168 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 바이너리 결과 응답의 구간 정보
+    expose_headers=["X-Motion-Start", "X-Motion-Total-Frames", "X-Motion-Max-Error"],
 )
 
+# 생성 실행 위치
+# inline: API 프로세스에서 생성 (스케줄러가 동시 실행 수 제한)
+# worker: SQLite 작업 대기열에 넣기만 하고 별도 워커 프로세스(worker.py)가 생성 (JOB_STORE=sqlite 필요)
+GENERATION_MODES = ("inline", "worker")
+GENERATION_MODE = os.environ.get("GENERATION_MODE", "inline")
+if GENERATION_MODE not in GENERATION_MODES:
+    raise ValueError(f"지원하지 않는 GENERATION_MODE: {GENERATION_MODE} (가능: {', '.join(GENERATION_MODES)})")
+
+async def parse_upload_request(request: Request, prefix: Optional[str] = None):
+    """
+    오디오 업로드 요청 본문을 받는 대로 파싱 (audio_file은 temp 디렉터리에 청크 단위로 바로 저장)
+    파일이 제한을 넘으면 나머지 본문을 받지 않고 413, temp 공간이 부족하면 503
+
+    Returns:
+        (나머지 폼 필드, SpooledFile)
+    """
+    content_type = request.headers.get("content-type", "")
+    if "multipart/form-data" not in content_type:
+        raise HTTPException(status_code=400, detail="Content-Type must be multipart/form-data")
+    try:
+        fields, spooled = await parse_upload_form(request.stream(), content_type, upload_spool, "audio_file", prefix)
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Audio file size exceeds {e.max_bytes // (1024 * 1024)}MB limit"
+        )
+    except SpoolFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid multipart/form-data: {e}")
+    if spooled is None:
+        raise RequestValidationError([
+            {"type": "missing", "loc": ("body", "audio_file"), "msg": "Field required", "input": None}
+        ])
+    return fields, spooled
+
+
+def validate_form(model, fields: dict):
+    """직접 파싱한 폼 필드를 pydantic 모델로 검증 (실패하면 Form()과 같은 422 응답)"""
+    try:
+        return model.model_validate(fields)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+
+
+def upload_request_body(model=None, file_field: str = "audio_file") -> dict:
+    """직접 파싱하는 업로드 엔드포인트의 OpenAPI 요청 본문 (/docs에 폼 필드와 파일 표시)"""
+    schema = model.model_json_schema() if model else {"type": "object", "properties": {}}
+    schema["properties"][file_field] = {"type": "string", "format": "binary"}
+    schema["required"] = [*schema.get("required", []), file_field]
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": schema}}}}
+
+
 # 전역 변수
 audio_processor = AudioProcessor()
-motion_generator = MotionGenerator()
+# 모델은 서버 시작 후 백그라운드에서 로드 (startup 이벤트 참고)
+motion_generator = MotionGenerator(
+    lazy=True,
+    # 생성/후처리 프레임 레이트 (결과는 요청한 fps로 한 번만 리샘플링)
+    internal_fps=float(os.environ.get("MOTION_INTERNAL_FPS", DEFAULT_INTERNAL_FPS))
+)
+
+# 추론 워커 프로세스 수 (0이면 API 프로세스에서 직접 생성)
+# 1 이상이면 별도 프로세스가 모델을 한 번 로드하고 워커를 fork하여 가중치를 공유
+# (worker 모드에서는 API 프로세스가 모델을 로드하지 않으므로 사용하지 않음)
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "0")) if GENERATION_MODE == "inline" else 0
+inference_pool = InferencePool(motion_generator, INFERENCE_WORKERS) if INFERENCE_WORKERS > 0 else None
+
+model_warmup = ModelWarmup(
+    inference_pool.wait_until_ready if inference_pool else motion_generator.load_model
+)
+
+# 모델 로딩 완료를 기다리는 최대 시간 (초). 초과하면 모의 모드로 생성
+MODEL_WAIT_TIMEOUT = float(os.environ.get("MODEL_WAIT_TIMEOUT", "600"))
+
+# 요청 가능한 출력 프레임 레이트 범위
+MIN_OUTPUT_FPS = 1
+MAX_OUTPUT_FPS = 60
+
+# 한 번에 요청 가능한 변형 수
+MAX_VARIANTS = 4
+
+# 상태 롱 폴링의 최대 대기 시간 (초)
+MAX_STATUS_WAIT_SECONDS = 30
+# 롱 폴링/SSE에서 작업 변경을 확인하는 간격 (초, 서버 안에서 저장소만 확인하므로 요청 수와 무관)
+STATUS_CHECK_INTERVAL = float(os.environ.get("STATUS_CHECK_INTERVAL", "0.25"))
+# SSE 연결 유지용 주석을 보내는 간격 (초)
+SSE_KEEPALIVE_SECONDS = 15
+
+# 오디오 업로드는 청크 단위로 temp 디렉터리에 저장 (파일 크기와 temp 전체 크기 제한)
+MAX_UPLOAD_BYTES = int(float(os.environ.get("MAX_UPLOAD_MB", "100")) * 1024 * 1024)
+upload_spool = UploadSpool(
+    "temp",
+    max_file_bytes=MAX_UPLOAD_BYTES,
+    max_total_bytes=int(float(os.environ.get("UPLOAD_SPOOL_MB", "1024")) * 1024 * 1024)
+)
+# 업로드 엔드포인트 (Content-Length로 본문을 받기 전에 크기 확인)
+UPLOAD_PATHS = ("/api/analyze-audio", "/api/generate-motion")
+# 파일 외 multipart 경계/폼 필드 여유분 (바이트)
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# 결과 JSON의 기본 소수점 자릿수 (비우면 float32 최단 표현 그대로)
+RESULT_JSON_PRECISION = int(os.environ["RESULT_JSON_PRECISION"]) if os.environ.get("RESULT_JSON_PRECISION") else None
+# 완료된 작업의 인코딩된 결과 응답 캐시 (전체 구간·전체 관절 요청만, 프로세스별)
+result_cache = ResultCache(max_bytes=int(float(os.environ.get("RESULT_CACHE_MB", "64")) * 1024 * 1024))
+# 완료된 작업의 내보내기 파일 디스크 캐시 (작업·형식·압축별, 여러 워커가 디렉터리 공유 가능)
+export_cache = ExportCache(
+    os.environ.get("EXPORT_CACHE_DIR", "export_cache"),
+    max_bytes=int(float(os.environ.get("EXPORT_CACHE_MB", "512")) * 1024 * 1024)
+)
+
+# 작업 상태 저장 (완료 후 JOB_TTL_SECONDS가 지나거나 작업 수/메모리 한도를 넘으면 오래된 작업부터 정리)
+# JOB_STORE=sqlite면 여러 uvicorn 워커가 JOB_STORE_PATH의 SQLite 파일로 작업 상태를 공유
+job_store = create_job_store(
+    os.environ.get("JOB_STORE", "memory"),
+    path=os.environ.get("JOB_STORE_PATH", "jobs.sqlite3"),
+    ttl_seconds=float(os.environ.get("JOB_TTL_SECONDS", "3600")),
+    max_jobs=int(os.environ.get("JOB_STORE_MAX_JOBS", "200")),
+    max_bytes=int(float(os.environ.get("JOB_STORE_MAX_MB", "512")) * 1024 * 1024)
+)
+
 
-# 작업 상태 저장 (실제로는 Redis나 DB 사용)
-generation_jobs = {}
+def wait_for_model(wait: bool) -> bool:
+    """모델 로딩이 끝났는지 확인 (wait=True면 MODEL_WAIT_TIMEOUT까지 대기)"""
+    if wait and not model_warmup.is_settled():
+        model_warmup.wait(MODEL_WAIT_TIMEOUT)
+    return model_warmup.is_settled()
+
+
+# 오디오 분석 → 생성 → 결과 저장 (inline 모드에서 스케줄러 스레드가 실행)
+pipeline = GenerationPipeline(
+    job_store,
+    audio_processor,
+    PoolGenerator(inference_pool) if inference_pool else motion_generator,
+    wait_for_model=wait_for_model,
+    remove_audio=upload_spool.remove
+)
+
+# 대기열 크기 제한, 대기 순서는 작업 상태에 기록 (다른 API 워커에서도 조회 가능)
+if GENERATION_MODE == "worker":
+    if not isinstance(job_store, SQLiteJobStore):
+        raise ValueError("GENERATION_MODE=worker는 JOB_STORE=sqlite가 필요합니다.")
+    # 워커 프로세스와 같은 SQLite 파일의 작업 대기열
+    scheduler = None
+    generation_queue = SQLiteJobQueue(
+        job_store.path,
+        max_queue=int(os.environ.get("GENERATION_QUEUE_SIZE", "32")),
+        on_position=queue_position_updater(job_store)
+    )
+else:
+    # 생성 작업 스케줄러: 동시에 실행하는 파이프라인 수(GENERATION_WORKERS) 제한
+    # 기본 동시 실행 수는 추론 워커 수 (추론 풀이 없으면 1)
+    scheduler = JobScheduler(
+        num_workers=int(os.environ.get("GENERATION_WORKERS", max(1, INFERENCE_WORKERS))),
+        max_queue=int(os.environ.get("GENERATION_QUEUE_SIZE", "32")),
+        on_position=queue_position_updater(job_store)
+    )
+    generation_queue = scheduler
 
 
 # 요청/응답 모델
@@ -57,6 +248,19 @@ class MotionGenerationRequest(BaseModel):
     creativity: float = 0.4
 
 
+class GenerateMotionForm(BaseModel):
+    """POST /api/generate-motion 폼 필드 (audio_file 제외)"""
+    prompt: str = Field(..., max_length=1000)
+    style: str = "hiphop"
+    energy: float = 0.75
+    smoothness: float = 0.5
+    bounce: float = 0.6
+    creativity: float = 0.4
+    wait_for_model: bool = True
+    fps: int = DEFAULT_OUTPUT_FPS
+    priority: str = "interactive"
+
+
 class AudioAnalysisResponse(BaseModel):
     tempo: float
     beats: list
@@ -71,7 +275,81 @@ class GenerationStatusResponse(BaseModel):
     status: str  # "pending", "processing", "completed", "failed"
     progress: int  # 0-100
     message: Optional[str] = None
-    motion_data: Optional[dict] = None
+    result_url: Optional[str] = None  # 완료 시 결과 모션 조회 경로 (/api/jobs/{job_id}/result)
+    timings: Optional[dict] = None  # 단계별 소요 시간 (초)
+    # 디노이징 진행 상황 (실제 MDM으로 생성 중일 때만)
+    diffusion_step: Optional[int] = None
+    diffusion_steps: Optional[int] = None
+    step_seconds: Optional[float] = None  # 마지막 스텝 소요 시간
+    avg_step_seconds: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    elapsed_seconds: Optional[float] = None
+    host: Optional[str] = None
+    queue_position: Optional[int] = None  # 대기 중일 때 순서 (1부터)
+    version: Optional[int] = None  # 작업이 바뀔 때마다 증가 (롱 폴링 version 파라미터)
+
+
+def validate_priority(priority: str):
+    if priority not in PRIORITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"priority must be one of: {', '.join(PRIORITIES)}"
+        )
+
+
+def raise_queue_full(e: QueueFull):
+    raise HTTPException(
+        status_code=429,
+        detail="Generation queue is full",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+async def run_pipeline(kind: str, payload: dict):
+    """생성 작업 실행 (블로킹 파이프라인을 스레드에서 실행해 생성 중에도 상태 조회가 응답)"""
+    await asyncio.to_thread(pipeline.run, kind, payload)
+
+
+def submit_generation(job_id: str, priority: str, kind: str, payload: dict, linked_job_ids=()) -> int:
+    """
+    생성 작업을 대기열에 추가하고 대기 순서 반환
+    inline 모드는 스케줄러, worker 모드는 SQLite 작업 대기열 (payload는 JSON 직렬화 가능한 값만)
+    """
+    if GENERATION_MODE == "worker":
+        return generation_queue.enqueue(job_id, priority, kind, payload, linked_job_ids=linked_job_ids)
+    return scheduler.submit(job_id, priority, run_pipeline, dict(kind=kind, payload=payload),
+                            linked_job_ids=linked_job_ids)
+
+
+def get_job_or_404(job_id: str) -> dict:
+    """작업 메타데이터 조회 (없으면 404, 정리된 작업이면 410)"""
+    try:
+        return job_store.get(job_id)
+    except JobExpired:
+        raise HTTPException(status_code=410, detail="Job expired")
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+
+# 서버 시작 시 모델 워밍업 시작 (uvicorn은 로딩을 기다리지 않고 바로 요청을 받음)
+@app.on_event("startup")
+async def start_model_warmup():
+    if GENERATION_MODE == "worker":
+        # worker 모드: 모델은 워커 프로세스가 로드
+        return
+    if inference_pool is not None:
+        # 다른 스레드가 생기기 전에 메인 스레드에서 슈퍼바이저를 fork
+        inference_pool.start()
+    model_warmup.start()
+    await scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_inference_pool():
+    if scheduler is not None:
+        await scheduler.shutdown()
+    if inference_pool is not None:
+        inference_pool.shutdown()
 
 
 # API 엔드포인트
@@ -84,18 +362,46 @@ async def root():
         "endpoints": {
             "analyze_audio": "/api/analyze-audio",
             "generate_motion": "/api/generate-motion",
-            "generation_status": "/api/generation-status/{job_id}"
+            "generation_status": "/api/generation-status/{job_id}",
+            "ready": "/ready"
         }
     }
 
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    """
+    서버 생존 확인 (모델 로딩 중에도 200)
+    """
+    return {
+        "status": "healthy",
+        "generation_mode": GENERATION_MODE,
+        "model": model_warmup.to_dict() if GENERATION_MODE == "inline" else None,
+        "jobs": job_store.stats(),
+        "queue": generation_queue.stats(),
+        "result_cache": result_cache.stats(),
+        "uploads": upload_spool.stats(),
+        "export_cache": export_cache.stats()
+    }
 
 
-@app.post("/api/analyze-audio", response_model=AudioAnalysisResponse)
-async def analyze_audio(audio_file: UploadFile = File(...)):
+@app.get("/ready")
+async def readiness_check():
+    """
+    요청 처리 준비 상태 확인
+    모델 로딩이 끝나면(ready 또는 degraded) 200, 로딩 중이면 503
+    worker 모드에서는 API가 모델 없이 요청을 받으므로 항상 200
+    """
+    if GENERATION_MODE == "worker":
+        return {"ready": True, "generation_mode": GENERATION_MODE}
+    body = {"ready": model_warmup.is_settled(), "model": model_warmup.to_dict()}
+    if not model_warmup.is_settled():
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+
+@app.post("/api/analyze-audio", response_model=AudioAnalysisResponse, openapi_extra=upload_request_body())
+async def analyze_audio(request: Request):
     """
     오디오 파일 분석
     - 템포 (BPM)
@@ -104,27 +410,11 @@ async def analyze_audio(audio_file: UploadFile = File(...)):
     - 키 정보
     - 길이
     """
+    # 본문을 받는 대로 임시 파일에 저장 (청크 단위, 크기 제한)
+    _, spooled = await parse_upload_request(request)
     try:
-        # 파일 읽기
-        content = await audio_file.read()
-        
-        # 파일 크기 확인 (100MB 제한)
-        file_size = len(content)
-        if file_size > 100 * 1024 * 1024:
-            raise HTTPException(status_code=413, detail="Audio file size exceeds 100MB limit")
-        
-        # 임시 파일 저장
-        temp_path = f"temp/{uuid.uuid4()}_{audio_file.filename}"
-        os.makedirs("temp", exist_ok=True)
-        
-        with open(temp_path, "wb") as f:
-            f.write(content)
-        
         # 실제 오디오 분석
-        analysis = audio_processor.analyze(temp_path)
-        
-        # 임시 파일 삭제
-        os.remove(temp_path)
+        analysis = audio_processor.analyze(spooled.path)
         
         return AudioAnalysisResponse(**analysis)
         
@@ -133,513 +423,544 @@ async def analyze_audio(audio_file: UploadFile = File(...)):
     except Exception as e:
         logging.error(f"Audio analysis error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Audio analysis failed: {str(e)}")
+    finally:
+        # 임시 파일 삭제
+        upload_spool.remove(spooled.path)
 
 
-@app.post("/api/generate-motion")
-async def generate_motion(
-    background_tasks: BackgroundTasks,
-    prompt: str = Form(..., max_length=1000),
-    audio_file: UploadFile = File(...),
-    style: str = Form("hiphop"),
-    energy: float = Form(0.75),
-    smoothness: float = Form(0.5),
-    bounce: float = Form(0.6),
-    creativity: float = Form(0.4)
-):
+@app.post("/api/generate-motion", openapi_extra=upload_request_body(GenerateMotionForm))
+async def generate_motion(request: Request):
     """
     음악 + 프롬프트로 안무 생성
     
     백그라운드에서 처리되며, job_id를 반환합니다.
     상태는 /api/generation-status/{job_id}로 확인할 수 있습니다.
+    
+    모델이 아직 로딩 중이면 wait_for_model=True일 때 로딩이 끝날 때까지 대기하고,
+    False면 바로 모의 모드로 생성합니다.
+    
+    fps는 결과 모션의 프레임 레이트입니다. 낮은 fps로 요청하면 (예: 미리보기 10fps)
+    계산량과 전송량이 비례해서 줄어듭니다.
+    
+    priority는 interactive(기본값, 미리보기 등) 또는 batch(렌더링)이며 interactive가 먼저 실행됩니다.
+    대기열이 가득 차면 429와 Retry-After 헤더를 반환합니다.
+    
+    폼(multipart/form-data)은 본문을 받는 대로 파싱하며 audio_file은 temp 디렉터리에 바로 기록합니다.
     """
+    # 업로드를 읽기 전에 대기열부터 확인
+    if generation_queue.is_full():
+        raise_queue_full(QueueFull(generation_queue.retry_after()))
+    
+    # 작업 ID 생성
+    job_id = str(uuid.uuid4())
+    
+    # 임시 파일 저장 (청크 단위로 받으며 크기 확인, MAX_UPLOAD_MB 제한)
+    # (worker 모드에서 다른 프로세스가 읽을 수 있도록 절대 경로)
+    fields, spooled = await parse_upload_request(request, prefix=job_id)
+    temp_audio_path = spooled.path
+    try:
+        form = validate_form(GenerateMotionForm, fields)
+        if not MIN_OUTPUT_FPS <= form.fps <= MAX_OUTPUT_FPS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"fps must be between {MIN_OUTPUT_FPS} and {MAX_OUTPUT_FPS}"
+            )
+        validate_priority(form.priority)
+    except Exception:
+        upload_spool.remove(temp_audio_path)
+        raise
+    priority = form.priority
+    
     try:
-        # 작업 ID 생성
-        job_id = str(uuid.uuid4())
-        
         # 작업 상태 초기화
-        generation_jobs[job_id] = {
-            "status": "pending",
-            "progress": 0,
-            "message": "작업이 대기 중입니다.",
-            "motion_data": None,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        # 파일 읽기 및 크기 확인 (100MB 제한)
-        content = await audio_file.read()
-        file_size = len(content)
-        if file_size > 100 * 1024 * 1024:
-            raise HTTPException(status_code=413, detail="Audio file size exceeds 100MB limit")
-        
-        # 임시 파일 저장
-        temp_audio_path = f"temp/{job_id}_audio_{audio_file.filename}"
-        os.makedirs("temp", exist_ok=True)
-        
-        with open(temp_audio_path, "wb") as f:
-            f.write(content)
-        
-        # 백그라운드 작업 시작
-        background_tasks.add_task(
-            process_motion_generation,
-            job_id=job_id,
-            prompt=prompt,
-            audio_path=temp_audio_path,
-            style=style,
-            energy=energy,
-            smoothness=smoothness,
-            bounce=bounce,
-            creativity=creativity
+        job_store.create(
+            job_id,
+            status="pending",
+            progress=0,
+            message="작업이 대기 중입니다.",
+            priority=priority,
+            created_at=datetime.now().isoformat(),
+            audio_sha256=spooled.sha256,
+            audio_bytes=spooled.size
         )
         
+        # 스케줄러 대기열에 추가
+        try:
+            queue_position = submit_generation(job_id, priority, "generate", dict(
+                job_id=job_id,
+                prompt=form.prompt,
+                audio_path=temp_audio_path,
+                style=form.style,
+                energy=form.energy,
+                smoothness=form.smoothness,
+                bounce=form.bounce,
+                creativity=form.creativity,
+                wait_for_model=form.wait_for_model,
+                fps=form.fps
+            ))
+        except QueueFull as e:
+            job_store.fail(job_id, str(e))
+            upload_spool.remove(temp_audio_path)
+            raise_queue_full(e)
+        
         return {
             "job_id": job_id,
             "status": "pending",
-            "message": "안무 생성이 시작되었습니다."
+            "message": "안무 생성이 시작되었습니다.",
+            "queue_position": queue_position,
+            "model_state": model_warmup.state if GENERATION_MODE == "inline" else None
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Motion generation failed: {str(e)}")
 
 
-async def process_motion_generation(
+@app.post("/api/jobs/{job_id}/variations")
+async def create_variations(
     job_id: str,
-    prompt: str,
-    audio_path: str,
-    style: str,
-    energy: float,
-    smoothness: float,
-    bounce: float,
-    creativity: float
+    num_variants: int = Form(1),
+    creativity: Optional[float] = Form(None),
+    fps: Optional[int] = Form(None),
+    priority: str = Form("interactive")
 ):
     """
-    실제 모션 생성 처리 (백그라운드 작업)
+    완료된 생성 결과의 변형 생성
+    
+    원본 결과를 creativity에 비례한 깊이까지 다시 노이즈를 입힌 뒤 남은 디노이징 스텝만 수행합니다.
+    (creativity 0.4 → 약 29%의 스텝) 변형마다 새 job_id가 만들어지며,
+    상태는 /api/generation-status/{job_id}로 확인할 수 있습니다.
+    creativity와 fps를 생략하면 원본 작업의 값을 사용합니다.
     """
-    print(f"🎬 모션 생성 시작 (job_id: {job_id})")
-    print(f"   프롬프트: {prompt}")
-    print(f"   스타일: {style}")
-    print(f"   오디오 경로: {audio_path}")
+    parent = get_job_or_404(job_id)
+    source, parent_params = job_store.get_source(job_id)
+    if parent["status"] != "completed" or source is None:
+        raise HTTPException(status_code=409, detail="Job is not completed")
+    if not 1 <= num_variants <= MAX_VARIANTS:
+        raise HTTPException(status_code=400, detail=f"num_variants must be between 1 and {MAX_VARIANTS}")
+    if fps is not None and not MIN_OUTPUT_FPS <= fps <= MAX_OUTPUT_FPS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"fps must be between {MIN_OUTPUT_FPS} and {MAX_OUTPUT_FPS}"
+        )
+    validate_priority(priority)
+    if generation_queue.is_full():
+        raise_queue_full(QueueFull(generation_queue.retry_after()))
     
-    try:
-        # 상태 업데이트: 처리 중
-        generation_jobs[job_id]["status"] = "processing"
-        generation_jobs[job_id]["progress"] = 10
-        generation_jobs[job_id]["message"] = "오디오 분석 중..."
-        
-        # 실제 오디오 분석
-        audio_analysis = audio_processor.analyze(audio_path)
-        
-        generation_jobs[job_id]["progress"] = 30
-        generation_jobs[job_id]["message"] = "모션 생성 중..."
-        
-        # 실제 모션 생성
-        motion_data = motion_generator.generate(
-            prompt=prompt,
-            style=style,
-            audio_features=audio_analysis,
-            energy=energy,
-            smoothness=smoothness,
-            bounce=bounce,
-            creativity=creativity
+    params = dict(parent_params)
+    if creativity is not None:
+        params["creativity"] = creativity
+    if fps is not None:
+        params["output_fps"] = fps
+    
+    variant_ids = [str(uuid.uuid4()) for _ in range(num_variants)]
+    for variant_id in variant_ids:
+        job_store.create(
+            variant_id,
+            status="pending",
+            progress=0,
+            message="작업이 대기 중입니다.",
+            parent_job_id=job_id,
+            priority=priority,
+            created_at=datetime.now().isoformat()
         )
-        
-        # 진행 상황 업데이트
-        generation_jobs[job_id]["progress"] = 90
-        generation_jobs[job_id]["message"] = "모션 데이터 처리 중..."
-        
-        # 상태 업데이트: 완료
-        generation_jobs[job_id]["status"] = "completed"
-        generation_jobs[job_id]["progress"] = 100
-        generation_jobs[job_id]["message"] = "안무 생성이 완료되었습니다."
-        generation_jobs[job_id]["motion_data"] = motion_data
-        
-        print(f"✅ 모션 생성 완료 (job_id: {job_id})")
-        print(f"   프레임: {motion_data.get('frames', 'N/A')}")
-        print(f"   관절: {motion_data.get('joints', 'N/A')}")
-        
-        # 임시 파일 삭제
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
-            
-    except Exception as e:
-        # 에러 로깅
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"❌ 모션 생성 오류 (job_id: {job_id}):")
-        print(f"   에러 메시지: {str(e)}")
-        print(f"   상세 트레이스:")
-        print(error_trace)
-        
-        # 상태 업데이트: 실패
-        generation_jobs[job_id]["status"] = "failed"
-        generation_jobs[job_id]["message"] = f"생성 실패: {str(e)}"
-        generation_jobs[job_id]["error"] = str(e)
-        
-        # 임시 파일 삭제
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
+    
+    queue_position = submit_generation(
+        variant_ids[0], priority, "variations",
+        dict(variant_ids=variant_ids, parent_job_id=job_id, params=params),
+        linked_job_ids=variant_ids[1:]
+    )
+    
+    return {
+        "job_ids": variant_ids,
+        "queue_position": queue_position,
+        "parent_job_id": job_id,
+        "status": "pending",
+        "message": f"변형 {num_variants}개 생성이 시작되었습니다."
+    }
 
 
-@app.get("/api/generation-status/{job_id}", response_model=GenerationStatusResponse)
-async def get_generation_status(job_id: str):
+@app.post("/api/jobs/{job_id}/edit")
+async def edit_motion_range(
+    job_id: str,
+    start: float = Form(...),
+    end: float = Form(...),
+    prompt: Optional[str] = Form(None, max_length=1000),
+    priority: str = Form("interactive")
+):
     """
-    생성 작업 상태 조회
+    완료된 생성 결과의 일부 구간(start-end초)만 다시 생성
+    
+    앞뒤 프레임을 고정한 디퓨전 인페인팅으로 편집 구간만 샘플링하므로 비용은 편집 길이에 비례합니다.
+    prompt를 주면 편집 구간에만 새 프롬프트를 사용합니다.
+    결과는 새 job_id로 만들어지며, 상태는 /api/generation-status/{job_id}로 확인할 수 있습니다.
     """
-    if job_id not in generation_jobs:
-        raise HTTPException(status_code=404, detail="Job not found")
+    parent = get_job_or_404(job_id)
+    source, parent_params = job_store.get_source(job_id)
+    if parent["status"] != "completed" or source is None:
+        raise HTTPException(status_code=409, detail="Job is not completed")
     
-    job = generation_jobs[job_id]
+    duration = source["motion"].shape[0] / source["fps"]
+    if not 0 <= start < end <= duration:
+        raise HTTPException(
+            status_code=400,
+            detail=f"start/end must satisfy 0 <= start < end <= {duration:.2f}"
+        )
+    validate_priority(priority)
+    if generation_queue.is_full():
+        raise_queue_full(QueueFull(generation_queue.retry_after()))
+    
+    edit_id = str(uuid.uuid4())
+    job_store.create(
+        edit_id,
+        status="pending",
+        progress=0,
+        message="작업이 대기 중입니다.",
+        parent_job_id=job_id,
+        priority=priority,
+        created_at=datetime.now().isoformat()
+    )
+    
+    queue_position = submit_generation(edit_id, priority, "edit", dict(
+        job_id=edit_id,
+        parent_job_id=job_id,
+        params=dict(parent_params),
+        start=start,
+        end=end,
+        window_prompt=prompt
+    ))
+    
+    return {
+        "job_id": edit_id,
+        "queue_position": queue_position,
+        "parent_job_id": job_id,
+        "status": "pending",
+        "message": f"{start:.2f}-{end:.2f}초 구간 편집이 시작되었습니다."
+    }
+
+
+def job_status_response(job_id: str, job: dict) -> GenerationStatusResponse:
+    """작업 메타데이터로 상태 응답 생성 (결과 모션은 포함하지 않음)"""
     return GenerationStatusResponse(
         job_id=job_id,
         status=job["status"],
         progress=job["progress"],
         message=job["message"],
-        motion_data=job["motion_data"]
+        result_url=f"/api/jobs/{job_id}/result" if job["status"] == "completed" else None,
+        timings=job.get("timings"),
+        diffusion_step=job.get("diffusion_step"),
+        diffusion_steps=job.get("diffusion_steps"),
+        step_seconds=job.get("step_seconds"),
+        avg_step_seconds=job.get("avg_step_seconds"),
+        eta_seconds=job.get("eta_seconds"),
+        elapsed_seconds=job.get("elapsed_seconds"),
+        host=job.get("host"),
+        queue_position=job.get("queue_position"),
+        version=job.get("version")
     )
 
 
-@app.post("/api/export-motion")
-async def export_motion(
-    request: Request
-):
+async def wait_for_job_change(job_id: str, version: Optional[int], timeout: float) -> dict:
+    """작업 version이 바뀌거나, 작업이 끝났거나, timeout이 지날 때까지 기다린 뒤 메타데이터 반환"""
+    deadline = time.monotonic() + timeout
+    job = get_job_or_404(job_id)
+    while job.get("version") == version and job["status"] not in FINISHED_STATUSES:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(STATUS_CHECK_INTERVAL, remaining))
+        job = get_job_or_404(job_id)
+    return job
+
+
+def sse_event(event: str, data, event_id: Optional[int] = None) -> str:
+    """Server-Sent Events 메시지 한 개"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@app.get("/api/generation-status/{job_id}", response_model=GenerationStatusResponse)
+async def get_generation_status(job_id: str, wait: float = 0, version: Optional[int] = None):
     """
-    모션 데이터를 다양한 형식으로 내보내기
-    큰 파일 처리를 위해 Request 객체로 직접 읽기
+    생성 작업 상태 조회
+    
+    wait(초, 최대 30)를 주면 롱 폴링으로 동작합니다. 작업의 version이 주어진 값에서 바뀌거나
+    작업이 끝날 때까지 응답을 보류하고, wait가 지나면 현재 상태를 그대로 반환합니다.
+    version을 생략하면 요청 시점 이후의 다음 변경을 기다립니다.
     """
-    try:
-        import json
-        import tempfile
-        import os
-        from datetime import datetime
-        import re
-        
-        # Content-Type 확인
-        content_type = request.headers.get("content-type", "")
-        if "multipart/form-data" not in content_type:
-            raise HTTPException(status_code=400, detail="Content-Type must be multipart/form-data")
-        
-        # boundary 추출
-        boundary_match = re.search(r'boundary=([^;]+)', content_type)
-        if not boundary_match:
-            raise HTTPException(status_code=400, detail="Invalid multipart/form-data: no boundary")
-        
-        boundary = boundary_match.group(1).strip('"')
-        
-        # body 읽기
-        body_bytes = await request.body()
-        
-        # multipart 파싱 (큰 파일 지원)
-        parts = body_bytes.split(f'--{boundary}'.encode())
-        
-        format = "json"
-        motion_data_str = ""
-        
-        for part in parts:
-            if not part.strip() or part.strip() == b'--':
-                continue
-            
-            # 헤더와 본문 분리
-            if b'\r\n\r\n' in part:
-                header_bytes, body_bytes_part = part.split(b'\r\n\r\n', 1)
-            elif b'\n\n' in part:
-                header_bytes, body_bytes_part = part.split(b'\n\n', 1)
-            else:
-                continue
-            
-            # Content-Disposition에서 필드 이름 추출
-            header_str = header_bytes.decode('utf-8', errors='ignore')
-            name_match = re.search(r'name="([^"]+)"', header_str)
-            if not name_match:
-                continue
-            
-            field_name = name_match.group(1)
-            
-            # 본문에서 끝부분 제거 (다음 boundary 전까지)
-            if body_bytes_part.endswith(b'\r\n'):
-                body_bytes_part = body_bytes_part[:-2]
-            elif body_bytes_part.endswith(b'\n'):
-                body_bytes_part = body_bytes_part[:-1]
-            
-            # 필드 값 추출
+    if not 0 <= wait <= MAX_STATUS_WAIT_SECONDS:
+        raise HTTPException(status_code=400, detail=f"wait must be between 0 and {MAX_STATUS_WAIT_SECONDS}")
+    job = get_job_or_404(job_id)
+    if wait > 0:
+        job = await wait_for_job_change(job_id, job.get("version") if version is None else version, wait)
+    return job_status_response(job_id, job)
+
+
+@app.get("/api/generation-status/{job_id}/events")
+async def stream_generation_status(job_id: str, request: Request):
+    """
+    생성 작업 상태 스트림 (Server-Sent Events)
+    
+    작업이 바뀔 때마다 progress 이벤트를 보내고, 끝나면 complete 이벤트 하나를 보낸 뒤
+    연결을 닫습니다. (결과 모션은 result_url로 조회) 이벤트 id는 작업 version이며, 재연결할 때 Last-Event-ID 헤더를 보내면
+    그 이후의 변경부터 받습니다.
+    """
+    job = get_job_or_404(job_id)
+    last_event_id = request.headers.get("last-event-id", "")
+    last_version = int(last_event_id) if last_event_id.isdigit() else None
+
+    async def events():
+        nonlocal job, last_version
+        last_sent = time.monotonic()
+        while True:
+            finished = job["status"] in FINISHED_STATUSES
+            if finished or job.get("version") != last_version:
+                last_version = job.get("version")
+                yield sse_event("complete" if finished else "progress",
+                                job_status_response(job_id, job), last_version)
+                if finished:
+                    return
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+
+            await asyncio.sleep(STATUS_CHECK_INTERVAL)
+            if await request.is_disconnected():
+                return
             try:
-                field_value = body_bytes_part.decode('utf-8')
-            except UnicodeDecodeError:
-                continue
-            
-            if field_name == "format":
-                format = field_value.strip()
-            elif field_name == "motion_data":
-                motion_data_str = field_value
-        
-        logging.info(f"📤 Export 요청: format={format}, motion_data 길이={len(motion_data_str) if motion_data_str else 0}")
-        
-        if not motion_data_str:
-            logging.error("❌ motion_data가 없습니다")
-            raise HTTPException(status_code=400, detail="motion_data is required")
-        
-        # JSON 문자열을 파싱
-        try:
-            motion_dict = json.loads(motion_data_str)
-            logging.info(f"✅ JSON 파싱 성공: keys={list(motion_dict.keys()) if isinstance(motion_dict, dict) else 'not a dict'}")
-        except json.JSONDecodeError as e:
-            logging.error(f"❌ JSON 파싱 실패: {str(e)}")
-            raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(e)}")
-        
-        # 임시 파일 생성
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        if format == "json":
-            # JSON 형식으로 내보내기
-            temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8')
-            json.dump(motion_dict, temp_file, indent=2, ensure_ascii=False)
-            temp_file.close()
-            
-            def cleanup():
-                try:
-                    os.unlink(temp_file.name)
-                except:
-                    pass
-            
-            return FileResponse(
-                temp_file.name,
-                media_type='application/json',
-                filename=f'motion_export_{timestamp}.json',
-                background=BackgroundTask(cleanup)
-            )
-        
-        elif format == "bvh":
-            # BVH 형식으로 변환
-            bvh_content = convert_to_bvh(motion_dict)
-            temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.bvh', delete=False, encoding='utf-8')
-            temp_file.write(bvh_content)
-            temp_file.close()
-            
-            def cleanup():
-                try:
-                    os.unlink(temp_file.name)
-                except:
-                    pass
-            
-            return FileResponse(
-                temp_file.name,
-                media_type='text/plain',
-                filename=f'motion_export_{timestamp}.bvh',
-                background=BackgroundTask(cleanup)
-            )
-        
-        elif format == "fbx":
-            # FBX 형식으로 변환 (간단한 구현)
-            fbx_content = convert_to_fbx(motion_dict)
-            temp_file = tempfile.NamedTemporaryFile(mode='wb', suffix='.fbx', delete=False)
-            temp_file.write(fbx_content)
-            temp_file.close()
-            
-            def cleanup():
-                try:
-                    os.unlink(temp_file.name)
-                except:
-                    pass
-            
-            return FileResponse(
-                temp_file.name,
-                media_type='application/octet-stream',
-                filename=f'motion_export_{timestamp}.fbx',
-                background=BackgroundTask(cleanup)
-            )
-        
-        else:
-            logging.error(f"❌ 지원하지 않는 형식: {format}")
-            raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        logging.error(f"❌ Export 오류: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+                job = job_store.get(job_id)
+            except KeyError:
+                # 스트림 도중 정리된 작업
+                yield sse_event("error", {"detail": "Job expired"})
+                return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
-def convert_to_bvh(motion_data: dict) -> str:
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(
+    request: Request,
+    job_id: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    joints: Optional[str] = None,
+    format: Optional[str] = None,
+    delta: bool = False,
+    precision: Optional[int] = None
+):
     """
-    모션 데이터를 BVH 형식으로 변환
-    모션 데이터는 각 프레임이 [x0, y0, z0, x1, y1, z1, ...] 형식의 1D 배열 (22개 관절 * 3 = 66개 값)
+    완료된 작업의 결과 모션 조회
+    
+    start/end는 프레임 구간 [start, end)이며 (end 생략 시 마지막 프레임까지), joints는 쉼표로 구분한
+    관절 인덱스입니다. (예: "0,10,11") 앞부분만 먼저 받아 재생을 시작하고 나머지를 이어서 받을 수 있습니다.
+    frames/joints는 응답에 담긴 구간의 크기, total_frames는 전체 프레임 수입니다.
+    
+    응답 형식은 format(json, f32, npy) 또는 Accept 헤더로 선택합니다.
+    - application/octet-stream (f32): 16바이트 헤더(magic "KPM1", frames, joints, fps) + float32 배열
+    - application/x-npy (npy): NumPy .npy
+    - application/vnd.kpop-motion.q16 (q16): 채널별 int16 양자화 (delta=true면 프레임 간 차이로 저장)
+      최대 오차는 X-Motion-Max-Error 헤더로 전달합니다.
+    바이너리 응답의 구간 정보는 X-Motion-Start, X-Motion-Total-Frames 헤더로 전달하며,
+    Accept-Encoding에 따라 gzip/zstd로 압축합니다. 완료된 결과는 바뀌지 않으므로 캐시할 수 있습니다.
+    
+    JSON 좌표는 precision(소수점 아래 자릿수, 0~8, 기본값 RESULT_JSON_PRECISION)으로 반올림합니다.
+    전체 구간·전체 관절 응답은 인코딩/압축한 본문을 서버에 캐시해 두고 다시 인코딩하지 않습니다.
     """
-    import math
-    
-    # BVH 스켈레톤 구조 정의 (22개 관절)
-    joints = [
-        {"name": "Hips", "parent": None, "offset": [0.0, 0.0, 0.0], "channels": 6, "idx": 0},
-        {"name": "Spine", "parent": "Hips", "offset": [0.0, 0.1, 0.0], "channels": 3, "idx": 1},
-        {"name": "Chest", "parent": "Spine", "offset": [0.0, 0.15, 0.0], "channels": 3, "idx": 2},
-        {"name": "Head", "parent": "Chest", "offset": [0.0, 0.2, 0.0], "channels": 3, "idx": 3},
-        {"name": "LeftUpperArm", "parent": "Chest", "offset": [-0.15, 0.1, 0.0], "channels": 3, "idx": 4},
-        {"name": "LeftForearm", "parent": "LeftUpperArm", "offset": [0.0, 0.25, 0.0], "channels": 3, "idx": 5},
-        {"name": "RightUpperArm", "parent": "Chest", "offset": [0.15, 0.1, 0.0], "channels": 3, "idx": 6},
-        {"name": "RightForearm", "parent": "RightUpperArm", "offset": [0.0, 0.25, 0.0], "channels": 3, "idx": 7},
-        {"name": "LeftThigh", "parent": "Hips", "offset": [-0.1, 0.0, 0.0], "channels": 3, "idx": 8},
-        {"name": "LeftShin", "parent": "LeftThigh", "offset": [0.0, 0.4, 0.0], "channels": 3, "idx": 9},
-        {"name": "RightThigh", "parent": "Hips", "offset": [0.1, 0.0, 0.0], "channels": 3, "idx": 10},
-        {"name": "RightShin", "parent": "RightThigh", "offset": [0.0, 0.4, 0.0], "channels": 3, "idx": 11},
-    ]
-    
-    # BVH 헤더 생성
-    bvh_lines = ["HIERARCHY"]
-    
-    def add_joint(joint, indent=0):
-        indent_str = "  " * indent
-        parent = joint["parent"]
-        name = joint["name"]
-        offset = joint["offset"]
-        channels = joint["channels"]
-        
-        if parent is None:
-            bvh_lines.append(f"{indent_str}ROOT {name}")
-        else:
-            bvh_lines.append(f"{indent_str}JOINT {name}")
-        
-        bvh_lines.append(f"{indent_str}{{")
-        bvh_lines.append(f"{indent_str}  OFFSET {offset[0]:.6f} {offset[1]:.6f} {offset[2]:.6f}")
-        
-        if channels == 6:
-            bvh_lines.append(f"{indent_str}  CHANNELS 6 Xposition Yposition Zposition Zrotation Xrotation Yrotation")
-        else:
-            bvh_lines.append(f"{indent_str}  CHANNELS 3 Zrotation Xrotation Yrotation")
-        
-        # 자식 관절 추가
-        children = [j for j in joints if j.get("parent") == name]
-        if children:
-            for child in children:
-                add_joint(child, indent + 1)
-        else:
-            # End Site
-            bvh_lines.append(f"{indent_str}  End Site")
-            bvh_lines.append(f"{indent_str}  {{")
-            bvh_lines.append(f"{indent_str}    OFFSET 0.0 0.0 0.0")
-            bvh_lines.append(f"{indent_str}  }}")
-        
-        bvh_lines.append(f"{indent_str}}}")
-    
-    # 루트 관절부터 시작
-    root_joint = next(j for j in joints if j["parent"] is None)
-    add_joint(root_joint)
-    
-    # MOTION 섹션
-    fps = motion_data.get('fps', 30)
-    frames = motion_data.get('frames', 0)
-    bvh_lines.extend([
-        "",
-        "MOTION",
-        f"Frames: {frames}",
-        f"Frame Time: {1.0 / fps:.6f}",
-        ""
-    ])
-    
-    # 모션 데이터 추가
-    motion_frames = motion_data.get('data', [])
-    for frame in motion_frames:
-        if not frame or not isinstance(frame, list) or len(frame) < 66:
-            # 기본값으로 채우기
-            frame = [0.0] * 66
-        
-        frame_values = []
-        
-        # 각 관절의 회전 데이터 추출 (라디안 → 도 변환)
-        for joint in joints:
-            idx = joint["idx"]
-            base_idx = idx * 3
-            
-            if base_idx + 2 < len(frame):
-                # 회전 값 (라디안)을 도로 변환
-                rx = math.degrees(frame[base_idx] if frame[base_idx] is not None else 0.0)
-                ry = math.degrees(frame[base_idx + 1] if frame[base_idx + 1] is not None else 0.0)
-                rz = math.degrees(frame[base_idx + 2] if frame[base_idx + 2] is not None else 0.0)
-            else:
-                rx = ry = rz = 0.0
-            
-            if joint["channels"] == 6:
-                # 루트 관절: 위치 + 회전
-                # 위치는 기본값 (0, 0, 0) 또는 엉덩이 높이
-                pos_x = 0.0
-                pos_y = 1.0  # 기본 높이
-                pos_z = 0.0
-                frame_values.extend([f"{pos_x:.6f}", f"{pos_y:.6f}", f"{pos_z:.6f}", 
-                                    f"{rz:.6f}", f"{rx:.6f}", f"{ry:.6f}"])
-            else:
-                # 일반 관절: 회전만
-                frame_values.extend([f"{rz:.6f}", f"{rx:.6f}", f"{ry:.6f}"])
-        
-        bvh_lines.append(" ".join(frame_values))
+    try:
+        result_format = negotiate_format(format, request.headers.get("accept"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(RESULT_MEDIA_TYPES)}")
+    if result_format is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Acceptable media types: {', '.join(RESULT_MEDIA_TYPES.values())}"
+        )
     
-    return "\n".join(bvh_lines)
+    job = get_job_or_404(job_id)
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail="Job is not completed")
+    if start < 0 or (end is not None and end <= start):
+        raise HTTPException(status_code=400, detail="start/end must satisfy 0 <= start < end")
+    if precision is None:
+        precision = RESULT_JSON_PRECISION
+    if precision is not None and not 0 <= precision <= 8:
+        raise HTTPException(status_code=400, detail="precision must be between 0 and 8")
+    
+    content_encoding = select_encoding(request.headers.get("accept-encoding"))
+    cache_key = None
+    if start == 0 and end is None and not joints:
+        # 완료된 결과는 바뀌지 않으므로 작업 ID + 인코딩 옵션으로 캐시
+        cache_key = (
+            job_id, result_format,
+            delta if result_format == "q16" else None,
+            precision if result_format == "json" else None,
+            content_encoding
+        )
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            body, headers = cached
+            return Response(body, media_type=RESULT_MEDIA_TYPES[result_format], headers=headers)
+    
+    motion_data = job_store.get_result(job_id, start, end)
+    total_frames = motion_data["frames"]
+    if start >= total_frames:
+        raise HTTPException(status_code=400, detail=f"start must be less than {total_frames}")
+    
+    joint_indices = None
+    if joints:
+        try:
+            joint_indices = [int(index) for index in joints.split(",")]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="joints must be comma-separated joint indices")
+        if not all(0 <= index < motion_data["joints"] for index in joint_indices):
+            raise HTTPException(status_code=400, detail=f"joint indices must be between 0 and {motion_data['joints'] - 1}")
+        motion_data = {**motion_data, "data": motion_data["data"][:, joint_indices]}
+    
+    data = motion_data["data"]
+    if result_format == "json":
+        fields = {key: value for key, value in motion_data.items() if key != "data"}
+        body = encode_json({
+            **jsonable_encoder(fields),
+            "job_id": job_id,
+            "start": start,
+            "end": start + data.shape[0],
+            "frames": data.shape[0],
+            "total_frames": total_frames,
+            "joints": data.shape[1],
+            "joint_indices": joint_indices,
+        }, data, precision)
+    else:
+        body = encode_motion(result_format, data, motion_data["fps"], delta=delta)
+    # 인코딩/압축 후 본문 (압축해도 줄지 않으면 원본 그대로)
+    body, content_encoding = compress(body, content_encoding)
+    
+    headers = {
+        "Cache-Control": f"public, max-age={int(job_store.ttl_seconds)}",
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if result_format != "json":
+        headers["X-Motion-Start"] = str(start)
+        headers["X-Motion-Total-Frames"] = str(total_frames)
+    if result_format == "q16":
+        headers["X-Motion-Max-Error"] = f"{max_quantization_error(data):.3g}"
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    if cache_key is not None:
+        result_cache.put(cache_key, body, headers)
+    return Response(body, media_type=RESULT_MEDIA_TYPES[result_format], headers=headers)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 ETag와 일치하는지 (약한 비교, "*"는 항상 일치)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+@app.get("/api/jobs/{job_id}/export")
+@app.head("/api/jobs/{job_id}/export")
+async def export_job(request: Request, job_id: str, format: str = "json"):
+    """
+    완료된 작업의 결과 모션을 파일로 내보내기 (json, bvh, fbx, glb)
+    
+    서버에 저장된 결과로 바로 변환하므로 클라이언트가 모션 JSON을 다시 올릴 필요가 없습니다.
+    (POST /api/export-motion은 기존 클라이언트 호환용)
+    
+    변환된 파일은 디스크 캐시에 보관하고 내용 해시를 ETag로 보냅니다.
+    - If-None-Match가 일치하면 304 (본문 없음)
+    - Range/If-Range 요청은 206 부분 응답 (끊긴 다운로드 이어받기)
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    job = get_job_or_404(job_id)
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail="Job is not completed")
+    
+    content_encoding = select_encoding(request.headers.get("accept-encoding"))
+    media_type, extension = EXPORT_FORMATS[format]
+    
+    def make_chunks():
+        motion_data = job_store.get_result(job_id)
+        logging.info(f"📤 작업 내보내기 파일 생성: job_id={job_id}, format={format}, {motion_data['frames']} frames")
+        return compress_chunks(iter_motion_file(format, motion_data), content_encoding)
+    
+    # 캐시에 없으면 변환/압축 결과를 조각 단위로 디스크에 기록 (블로킹이므로 스레드에서 실행)
+    artifact = await asyncio.to_thread(
+        export_cache.get_or_create, (job_id, format, content_encoding), make_chunks, extension
+    )
+    
+    headers = {
+        "ETag": artifact.etag,
+        "Cache-Control": f"public, max-age={int(job_store.ttl_seconds)}",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), artifact.etag):
+        return Response(status_code=304, headers=headers)
+    
+    headers["Content-Disposition"] = f'attachment; filename="motion_{job_id[:8]}{extension}"'
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    # FileResponse가 Range/If-Range(ETag 비교)를 처리 (범위는 압축된 바이트 기준)
+    return FileResponse(artifact.path, media_type=media_type, headers=headers)
 
 
-def convert_to_fbx(motion_data: dict) -> bytes:
+@app.post("/api/export-motion")
+async def export_motion(
+    request: Request
+):
     """
-    모션 데이터를 FBX 형식으로 변환
-    참고: 실제 FBX는 바이너리 형식이지만, 여기서는 ASCII FBX 형식으로 변환
-    프로덕션 환경에서는 Autodesk FBX SDK 사용을 권장합니다.
+    모션 데이터를 다양한 형식으로 내보내기
+    본문을 한 번에 읽지 않고 받는 대로 파싱하며, motion_data JSON의 프레임은 float32 배열에 바로 기록
+    
+    완료된 작업은 GET /api/jobs/{job_id}/export를 사용하세요. (모션을 다시 올리지 않음)
     """
-    import json
-    import math
-    
-    # FBX ASCII 형식으로 변환
-    fps = motion_data.get('fps', 30)
-    frames = motion_data.get('frames', 0)
-    joints = motion_data.get('joints', 22)
-    motion_frames = motion_data.get('data', [])
-    
-    # FBX ASCII 헤더
-    fbx_lines = [
-        "; FBX 7.4.0 project file",
-        "; Created by SOTA K-Pop Studio",
-        "",
-        "FBXHeaderExtension:  {",
-        "    FBXHeaderVersion: 1003",
-        "    FBXVersion: 7400",
-        "}",
-        "",
-        "GlobalSettings:  {",
-        "    Version: 1000",
-        "}",
-        "",
-        "Objects:  {",
-        "    Model: \"Model::RootNode\", \"Mesh\" {",
-        "        Version: 232",
-        "        Properties70:  {",
-        "            P: \"Lcl Translation\", \"Lcl Translation\", \"\", \"A\",0,0,0",
-        "            P: \"Lcl Rotation\", \"Lcl Rotation\", \"\", \"A\",0,0,0",
-        "            P: \"Lcl Scaling\", \"Lcl Scaling\", \"\", \"A\",1,1,1",
-        "        }",
-        "    }",
-        "}",
-        "",
-        "AnimationStack: \"Take 001\", \"Take\" {",
-        "    Version: 1",
-        "}",
-        "",
-        "AnimationLayer: \"AnimLayer::BaseLayer\", \"AnimLayer\" {",
-        "    Version: 1",
-        "}",
-        ""
-    ]
-    
-    # 모션 데이터를 FBX 형식으로 변환
-    # 실제 FBX는 더 복잡하지만, 여기서는 기본 구조만 제공
-    # 프로덕션에서는 FBX SDK를 사용하여 정확한 변환 수행
-    
-    # JSON 형식으로 모션 데이터 포함 (호환성을 위해)
-    fbx_data = {
-        "version": "FBX 7.4 (ASCII)",
-        "fps": fps,
-        "frames": frames,
-        "joints": joints,
-        "motion_data": motion_data,
-        "note": "This is a simplified FBX export. For production use, please use Autodesk FBX SDK (https://www.autodesk.com/developer-network/platform-technologies/fbx-sdk-2020-2)."
-    }
+    # Content-Type 확인
+    content_type = request.headers.get("content-type", "")
+    if "multipart/form-data" not in content_type:
+        raise HTTPException(status_code=400, detail="Content-Type must be multipart/form-data")
+    
+    try:
+        fields, motion_data = await parse_motion_form(request.stream(), content_type)
+    except ValueError as e:
+        logging.error(f"❌ motion_data 파싱 실패: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid multipart/form-data: {e}")
     
-    # JSON을 바이너리로 인코딩
-    return json.dumps(fbx_data, indent=2, ensure_ascii=False).encode('utf-8')
+    format = fields.get("format", "json").strip()
+    if motion_data is None:
+        logging.error("❌ motion_data가 없습니다")
+        raise HTTPException(status_code=400, detail="motion_data is required")
+    if format not in EXPORT_FORMATS:
+        logging.error(f"❌ 지원하지 않는 형식: {format}")
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    if motion_data["data"] is None:
+        raise HTTPException(status_code=400, detail="motion_data.data must be an array of frames")
+    logging.info(f"📤 Export 요청: format={format}, 프레임 배열={motion_data['data'].shape}")
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return StreamingResponse(
+        iter_motion_file(format, motion_data),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="motion_export_{timestamp}{extension}"'}
+    )
 
 
 if __name__ == "__main__":
+    import uvicorn
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
@@ -0,0 +1,116 @@
+"""
+CPU 추론 프로파일 벤치마크
+fp32 기준 모델과 각 CPU 프로파일(int8 양자화, torch.compile, TorchScript)의
+샘플링 지연 시간과 출력 편차를 비교합니다.
+
+같은 시드로 생성하므로 편차는 프로파일에 의한 수치 차이만 반영합니다.
+
+사용법:
+    python scripts/benchmark_cpu_profile.py
+    python scripts/benchmark_cpu_profile.py --length 4 --runs 3 --threads 8
+    python scripts/benchmark_cpu_profile.py --profiles int8 int8+torch_compile
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+base_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(base_dir))
+
+PROFILES = {
+    "fp32": {},
+    "int8": {"quantize": True},
+    "torch_compile": {"compile": "torch_compile"},
+    "torchscript": {"compile": "torchscript"},
+    "int8+torch_compile": {"quantize": True, "compile": "torch_compile"},
+}
+
+
+def _load(model_path: str, profile: dict, threads: int):
+    from services.mdm_integration import MDMIntegration
+
+    profile = dict(profile)
+    if threads:
+        profile.setdefault("intra_op_threads", threads)
+    integration = MDMIntegration(model_path, cpu_profile=profile)
+    if not integration.load_model():
+        raise RuntimeError(f"모델 로드 실패: {profile}")
+    return integration
+
+
+def _measure(integration, prompt: str, length: float, runs: int):
+    """워밍업 1회 후 runs회 측정. (지연 시간 목록, 마지막 출력) 반환"""
+    integration.generate(prompt, length=length)
+    latencies = []
+    motion = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        motion = integration.generate(prompt, length=length)
+        latencies.append(time.perf_counter() - start)
+    return latencies, motion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MDM CPU 추론 프로파일 벤치마크")
+    parser.add_argument("--model-path", default=None, help="체크포인트 경로 (기본값: mdm_config.json)")
+    parser.add_argument("--profiles", nargs="*", default=["int8", "torchscript", "int8+torch_compile"],
+                        choices=[p for p in PROFILES if p != "fp32"], help="비교할 프로파일")
+    parser.add_argument("--prompt", default="a person dances energetically")
+    parser.add_argument("--length", type=float, default=3.0, help="모션 길이 (초)")
+    parser.add_argument("--runs", type=int, default=3, help="프로파일별 측정 횟수")
+    parser.add_argument("--threads", type=int, default=0, help="intra-op 스레드 수 (0: 기본값)")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args()
+
+    model_path = args.model_path
+    if model_path is None:
+        with open(base_dir / "mdm_config.json", "r") as f:
+            model_path = json.load(f)["model_path"]
+
+    import numpy as np
+
+    print("📏 fp32 기준 측정 중...")
+    baseline = _load(model_path, PROFILES["fp32"], args.threads)
+    base_latencies, base_motion = _measure(baseline, args.prompt, args.length, args.runs)
+    del baseline
+
+    results = [{
+        "profile": "fp32",
+        "latency_s": round(statistics.median(base_latencies), 3),
+        "speedup": 1.0,
+        "max_abs_dev": 0.0,
+        "mean_abs_dev": 0.0,
+    }]
+
+    for name in args.profiles:
+        print(f"📏 {name} 측정 중...")
+        integration = _load(model_path, PROFILES[name], args.threads)
+        latencies, motion = _measure(integration, args.prompt, args.length, args.runs)
+        del integration
+
+        deviation = np.abs(np.asarray(motion, dtype=np.float64) - np.asarray(base_motion, dtype=np.float64))
+        latency = statistics.median(latencies)
+        results.append({
+            "profile": name,
+            "latency_s": round(latency, 3),
+            "speedup": round(results[0]["latency_s"] / latency, 2) if latency > 0 else None,
+            "max_abs_dev": float(deviation.max()),
+            "mean_abs_dev": float(deviation.mean()),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print()
+    print(f"{'profile':<22}{'latency(s)':>12}{'speedup':>10}{'max|Δ|':>12}{'mean|Δ|':>12}")
+    for r in results:
+        print(f"{r['profile']:<22}{r['latency_s']:>12.3f}{r['speedup']:>10.2f}"
+              f"{r['max_abs_dev']:>12.4f}{r['mean_abs_dev']:>12.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+임포트 시간 벤치마크
+`python -X importtime`으로 모듈 임포트 비용을 측정하여 서버 시작 비용을 추적합니다.
+
+사용법:
+    python scripts/benchmark_import_time.py
+    python scripts/benchmark_import_time.py main services.audio_processor --top 15
+    python scripts/benchmark_import_time.py --json > import_time.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# 첫 요청 전에 임포트되면 안 되는 무거운 패키지
+HEAVY_PACKAGES = ["torch", "librosa", "numba", "scipy", "clip", "utils.model_util"]
+
+DEFAULT_MODULES = ["main", "services.motion_generator", "services.audio_processor"]
+
+
+def measure_import(module: str, cwd: Path) -> dict:
+    """
+    새 인터프리터에서 모듈을 임포트하고 -X importtime 출력을 파싱
+
+    Returns:
+        {
+            'module': str,
+            'total_ms': float,        # 모듈의 누적 임포트 시간
+            'imports': [(name, self_ms, cumulative_ms), ...],
+            'heavy': [str, ...]       # 함께 임포트된 무거운 패키지
+        }
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(cwd),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} 임포트 실패:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us) / 1000.0, int(cumulative_us) / 1000.0))
+
+    names = {name for name, _, _ in imports}
+    total_ms = next((cum for name, _, cum in imports if name == module), 0.0)
+    return {
+        "module": module,
+        "total_ms": round(total_ms, 1),
+        "imports": imports,
+        "heavy": [pkg for pkg in HEAVY_PACKAGES if pkg in names],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈 임포트 시간 측정 (python -X importtime)")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="측정할 모듈")
+    parser.add_argument("--top", type=int, default=10, help="누적 시간 상위 N개 출력")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수 (최솟값 사용)")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent.parent
+    reports = []
+    for module in args.modules:
+        runs = [measure_import(module, base_dir) for _ in range(max(1, args.repeat))]
+        reports.append(min(runs, key=lambda r: r["total_ms"]))
+
+    if args.json:
+        print(json.dumps([
+            {"module": r["module"], "total_ms": r["total_ms"], "heavy": r["heavy"]}
+            for r in reports
+        ], indent=2))
+        return
+
+    for report in reports:
+        print(f"📦 {report['module']}: {report['total_ms']:.1f} ms")
+        if report["heavy"]:
+            print(f"   ⚠️  무거운 패키지 임포트됨: {', '.join(report['heavy'])}")
+        top = sorted(report["imports"], key=lambda item: item[2], reverse=True)[:args.top]
+        for name, self_ms, cumulative_ms in top:
+            print(f"   {cumulative_ms:9.1f} ms  (self {self_ms:7.1f} ms)  {name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
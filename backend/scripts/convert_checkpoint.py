@@ -0,0 +1,125 @@
+"""
+MDM 체크포인트 변환 스크립트
+model000475000.pt (pickle) 를 mmap 가능한 safetensors 형식으로 변환합니다.
+
+변환된 파일은 체크포인트와 같은 디렉토리에 같은 이름(.safetensors)으로 저장되며,
+MDMIntegration이 자동으로 이 파일을 우선 사용합니다.
+safetensors 파일은 mmap으로 열리므로 같은 호스트의 여러 워커가
+페이지 캐시의 가중치 한 벌을 공유하고, 전체 역직렬화 없이 로드됩니다.
+
+사용법:
+    python scripts/convert_checkpoint.py
+    python scripts/convert_checkpoint.py --model-path /path/to/model000475000.pt --use-ema
+
+--use-ema/--no-use-ema를 주지 않으면 체크포인트 옆 args.json의 use_ema를 따릅니다.
+(로드 시 메타데이터의 use_ema가 모델 설정과 다르면 변환 파일 대신 원본 체크포인트를 사용)
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _default_model_path(base_dir: Path) -> Path:
+    """mdm_config.json의 model_path 또는 기본 경로 반환"""
+    config_path = base_dir / "mdm_config.json"
+    if config_path.exists():
+        with open(config_path, 'r') as f:
+            model_path = json.load(f).get("model_path")
+        if model_path:
+            return Path(model_path)
+    return base_dir / "models" / "mdm" / "humanml_trans_enc_512" / "model000475000.pt"
+
+
+def _default_use_ema(model_path: Path) -> bool:
+    """체크포인트 옆 args.json의 use_ema (없으면 False, MDMIntegration 기본값과 같음)"""
+    args_path = model_path.parent / "args.json"
+    if args_path.exists():
+        with open(args_path, 'r') as f:
+            return bool(json.load(f).get("use_ema", False))
+    return False
+
+
+def convert_checkpoint(model_path: Path, output_path: Path, use_ema: bool = False) -> bool:
+    """
+    .pt 체크포인트를 safetensors로 변환
+
+    Args:
+        model_path: 원본 체크포인트 경로 (.pt)
+        output_path: 출력 경로 (.safetensors)
+        use_ema: 체크포인트에 평균(EMA) 가중치가 있으면 그것을 저장
+
+    Returns:
+        bool: 변환 성공 여부
+    """
+    try:
+        import torch
+        from safetensors.torch import save_file
+    except ImportError as e:
+        print(f"❌ 필요한 패키지가 없습니다: {e}")
+        print("   pip install torch safetensors 로 설치하세요.")
+        return False
+
+    if not model_path.exists():
+        print(f"❌ 체크포인트를 찾을 수 없습니다: {model_path}")
+        return False
+
+    print(f"📥 체크포인트 로드 중: {model_path}")
+    state_dict = torch.load(str(model_path), map_location='cpu')
+
+    # load_saved_model과 같은 규칙으로 가중치 선택
+    if use_ema and 'model_avg' in state_dict:
+        print("   평균(EMA) 가중치 사용")
+        state_dict = state_dict['model_avg']
+    elif 'model' in state_dict:
+        state_dict = state_dict['model']
+
+    # safetensors는 텐서만, 그리고 메모리를 공유하지 않는 연속 텐서만 저장 가능
+    tensors = {
+        key: value.detach().contiguous().clone()
+        for key, value in state_dict.items()
+        if torch.is_tensor(value)
+    }
+    skipped = [key for key, value in state_dict.items() if not torch.is_tensor(value)]
+    if skipped:
+        print(f"⚠️  텐서가 아닌 항목은 건너뜁니다: {skipped}")
+
+    metadata = {
+        "source": model_path.name,
+        "use_ema": str(use_ema).lower(),
+    }
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    save_file(tensors, str(tmp_path), metadata=metadata)
+    tmp_path.replace(output_path)
+
+    src_mb = model_path.stat().st_size / (1024 * 1024)
+    dst_mb = output_path.stat().st_size / (1024 * 1024)
+    print(f"✅ 변환 완료: {output_path}")
+    print(f"   텐서 {len(tensors)}개, {src_mb:.1f} MB → {dst_mb:.1f} MB")
+    return True
+
+
+def main():
+    base_dir = Path(__file__).parent.parent
+
+    parser = argparse.ArgumentParser(description="MDM 체크포인트를 safetensors로 변환")
+    parser.add_argument("--model-path", type=Path, default=None,
+                        help="원본 체크포인트 (기본값: mdm_config.json의 model_path)")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="출력 경로 (기본값: 체크포인트와 같은 이름의 .safetensors)")
+    parser.add_argument("--use-ema", action=argparse.BooleanOptionalAction, default=None,
+                        help="평균(EMA) 가중치를 저장 (기본값: args.json의 use_ema)")
+    args = parser.parse_args()
+
+    model_path = args.model_path or _default_model_path(base_dir)
+    output_path = args.output or model_path.with_suffix(".safetensors")
+
+    use_ema = args.use_ema if args.use_ema is not None else _default_use_ema(model_path)
+
+    return convert_checkpoint(model_path, output_path, use_ema=use_ema)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -5,7 +5,6 @@
 - 에너지 계산
 - 키 추정
 """
-import librosa
 import numpy as np
 from typing import Dict, List
 
@@ -34,6 +33,9 @@ class AudioProcessor:
                 'key': str           # 키 정보
             }
         """
+        # librosa는 임포트가 무거우므로 (numba 등) 처음 분석할 때 로드
+        import librosa
+        
         try:
             # 오디오 로드
             y, sr = librosa.load(audio_path, sr=self.sample_rate)
@@ -70,6 +72,8 @@ class AudioProcessor:
         """
         간단한 키 추정 (실제로는 더 정교한 알고리즘 사용 가능)
         """
+        import librosa
+        
         # 크로마그램 계산
         chroma = librosa.feature.chroma_stft(y=y, sr=sr)
         
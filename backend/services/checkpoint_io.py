@@ -0,0 +1,160 @@
+"""
+MDM 체크포인트 입출력
+- safetensors 파일을 mmap으로 열어 복사 없이 state_dict 구성
+- .pt 파일은 torch.load(mmap=True)로 로드
+
+mmap으로 만든 텐서를 load_state_dict(assign=True)로 모델에 그대로 붙이면
+같은 호스트의 여러 프로세스가 페이지 캐시의 가중치 한 벌을 공유합니다.
+"""
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import torch
+
+# safetensors dtype 이름 → torch dtype
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def find_weights_path(model_path: str, use_ema: Optional[bool] = None) -> str:
+    """
+    실제로 로드할 가중치 파일 경로 반환
+    체크포인트 옆에 변환된 .safetensors 파일이 있으면 그것을 우선 사용합니다. (원본 .pt가 더 최신이면 무시,
+    .safetensors만 배포한 경우에는 그대로 사용)
+    단, 변환 시 선택한 가중치(메타데이터의 use_ema)가 use_ema와 다르면 원본 .pt가 있을 때 경고 후 원본을 사용합니다.
+    """
+    path = Path(model_path)
+    if path.suffix == ".safetensors":
+        return str(path)
+    converted = path.with_suffix(".safetensors")
+    if not converted.exists():
+        return str(path)
+    if not path.exists():
+        # 변환 파일만 있음 (use_ema가 다르면 load_checkpoint_state_dict가 ValueError)
+        return str(converted)
+    if converted.stat().st_mtime >= path.stat().st_mtime:
+        converted_ema = safetensors_use_ema(str(converted))
+        if use_ema is None or converted_ema is None or converted_ema == use_ema:
+            return str(converted)
+        print(f"⚠️  {converted.name}은 use_ema={converted_ema}로 변환되었지만 모델 설정은 use_ema={use_ema}입니다. "
+              f"원본 체크포인트를 사용합니다. (scripts/convert_checkpoint.py로 다시 변환하세요)")
+    return str(path)
+
+
+def _read_safetensors_header(path: str) -> Tuple[int, Dict]:
+    """safetensors 헤더 (헤더 길이, JSON 헤더)"""
+    with open(path, "rb") as f:
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        return header_len, json.loads(f.read(header_len))
+
+
+def safetensors_use_ema(path: str) -> Optional[bool]:
+    """변환 시 평균(EMA) 가중치를 저장했는지 (메타데이터에 use_ema가 없으면 None)"""
+    _, header = _read_safetensors_header(path)
+    value = (header.get("__metadata__") or {}).get("use_ema")
+    return None if value is None else value == "true"
+
+
+def load_safetensors_mmap(path: str) -> Dict[str, torch.Tensor]:
+    """
+    safetensors 파일을 mmap으로 열어 텐서 뷰를 반환 (데이터 복사 없음)
+
+    파일 형식: [u64 헤더 길이][JSON 헤더][텐서 데이터]
+    """
+    header_len, header = _read_safetensors_header(path)
+    header.pop("__metadata__", None)
+
+    data_start = 8 + header_len
+    nbytes = os.path.getsize(path)
+    # shared=False: MAP_PRIVATE — 쓰기 전까지 페이지 캐시를 공유
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=nbytes)
+
+    tensors = {}
+    for name, info in header.items():
+        dtype = _SAFETENSORS_DTYPES.get(info["dtype"])
+        if dtype is None:
+            raise ValueError(f"지원하지 않는 safetensors dtype: {info['dtype']} ({name})")
+        begin, end = info["data_offsets"]
+        shape = info["shape"]
+        itemsize = torch.empty((), dtype=dtype).element_size()
+        offset = data_start + begin
+        if offset % itemsize != 0:
+            raise ValueError(f"정렬되지 않은 텐서 오프셋: {name}")
+        numel = (end - begin) // itemsize
+        tensor = torch.empty(0, dtype=dtype).set_(storage, offset // itemsize, (numel,))
+        tensors[name] = tensor.view(shape) if shape else tensor.view(())
+    return tensors
+
+
+def load_checkpoint_state_dict(path: str, use_ema: bool = False) -> Dict[str, torch.Tensor]:
+    """
+    체크포인트에서 모델 state_dict 로드
+
+    Args:
+        path: .safetensors 또는 .pt 경로
+        use_ema: .pt 체크포인트에 평균(EMA) 가중치가 있으면 사용
+                 (.safetensors는 변환 시 선택한 가중치가 use_ema와 다르면 ValueError)
+
+    Returns:
+        Dict[str, torch.Tensor]: 모델 state_dict
+    """
+    if path.endswith(".safetensors"):
+        converted_ema = safetensors_use_ema(path)
+        if converted_ema is not None and converted_ema != use_ema:
+            raise ValueError(
+                f"{os.path.basename(path)}은 use_ema={converted_ema}로 변환되었지만 use_ema={use_ema}로 로드하려고 합니다."
+            )
+        return load_safetensors_mmap(path)
+
+    try:
+        state_dict = torch.load(path, map_location="cpu", mmap=True)
+    except (TypeError, RuntimeError):
+        # 구버전 torch 또는 legacy(비-zip) 체크포인트
+        state_dict = torch.load(path, map_location="cpu")
+
+    if use_ema and "model_avg" in state_dict:
+        return state_dict["model_avg"]
+    if "model" in state_dict:
+        return state_dict["model"]
+    return state_dict
+
+
+def load_model_weights(model: torch.nn.Module, state_dict: Dict[str, torch.Tensor]) -> None:
+    """
+    CLIP을 제외한 MDM 가중치를 모델에 적용 (utils.model_util.load_model_wo_clip과 같은 규칙)
+
+    assign=True로 state_dict의 텐서를 복사하지 않고 파라미터로 그대로 사용합니다.
+    """
+    state_dict = dict(state_dict)
+    # 고정 위치 인코딩은 로드하지 않음 (구버전 모델과 크기가 다를 수 있음)
+    state_dict.pop("sequence_pos_encoder.pe", None)
+    state_dict.pop("embed_timestep.sequence_pos_encoder.pe", None)
+
+    try:
+        missing_keys, unexpected_keys = model.load_state_dict(state_dict, strict=False, assign=True)
+    except TypeError:
+        # torch < 2.1: assign 미지원 → 복사 로드
+        missing_keys, unexpected_keys = model.load_state_dict(state_dict, strict=False)
+
+    if unexpected_keys:
+        raise RuntimeError(f"예상하지 못한 가중치 키: {unexpected_keys[:5]}")
+    unexpected_missing = [
+        k for k in missing_keys
+        if not k.startswith("clip_model.") and "sequence_pos_encoder" not in k
+    ]
+    if unexpected_missing:
+        raise RuntimeError(f"누락된 가중치 키: {unexpected_missing[:5]}")
+
@@ -0,0 +1,125 @@
+"""
+CPU 추론 프로파일
+GPU가 없는 환경에서 MDM 샘플링 속도를 높이기 위한 옵션
+- 트랜스포머 Linear 레이어 동적 int8 양자화
+- intra-op / inter-op 스레드 수 설정
+- 디노이저(seqTransEncoder) torch.compile 또는 고정(frozen) TorchScript 그래프
+
+mdm_config.json의 "cpu_profile" 항목으로 설정합니다:
+    {
+        "quantize": false,          # 동적 int8 양자화
+        "intra_op_threads": 0,      # 0이면 torch 기본값
+        "inter_op_threads": 0,
+        "compile": "none"           # none, torch_compile, torchscript
+    }
+"""
+from typing import Dict, Optional
+
+import torch
+
+CPU_PROFILE_DEFAULTS = {
+    "quantize": False,
+    "intra_op_threads": 0,
+    "inter_op_threads": 0,
+    "compile": "none",
+}
+
+COMPILE_MODES = ("none", "torch_compile", "torchscript")
+
+# 양자화 대상 서브모듈 (CLIP 텍스트 인코더는 제외)
+_DENOISER_SUBMODULES = ("input_process", "embed_timestep", "embed_text", "seqTransEncoder", "output_process")
+
+
+def resolve_cpu_profile(profile: Optional[Dict]) -> Dict:
+    """설정값에 기본값을 채워 반환"""
+    resolved = dict(CPU_PROFILE_DEFAULTS)
+    if profile:
+        resolved.update({k: v for k, v in profile.items() if k in CPU_PROFILE_DEFAULTS})
+    if resolved["compile"] not in COMPILE_MODES:
+        raise ValueError(f"지원하지 않는 compile 모드: {resolved['compile']} (가능: {', '.join(COMPILE_MODES)})")
+    return resolved
+
+
+def configure_threads(intra_op_threads: int = 0, inter_op_threads: int = 0):
+    """
+    torch 스레드 수 설정
+    inter-op 스레드는 병렬 작업이 시작되기 전에만 바꿀 수 있으므로 모델 로드 전에 호출해야 합니다.
+    """
+    if intra_op_threads and intra_op_threads > 0:
+        torch.set_num_threads(int(intra_op_threads))
+    if inter_op_threads and inter_op_threads > 0:
+        try:
+            torch.set_num_interop_threads(int(inter_op_threads))
+        except RuntimeError as e:
+            print(f"⚠️  inter-op 스레드 수를 설정할 수 없습니다 (이미 시작됨): {e}")
+    print(f"🔧 torch 스레드: intra-op {torch.get_num_threads()}, inter-op {torch.get_num_interop_threads()}")
+
+
+def _unwrap_mdm(model: torch.nn.Module) -> torch.nn.Module:
+    """ClassifierFreeSampleModel로 감싼 경우 내부 MDM 모델 반환"""
+    return model.model if hasattr(model, "model") and isinstance(model.model, torch.nn.Module) else model
+
+
+def quantize_dynamic_int8(model: torch.nn.Module) -> int:
+    """
+    디노이저의 Linear 레이어를 동적 int8로 양자화 (가중치 int8, 활성값은 실행 시 양자화)
+
+    Returns:
+        int: 양자화된 서브모듈 수
+    """
+    from torch.ao.quantization import quantize_dynamic
+
+    mdm = _unwrap_mdm(model)
+    quantized = 0
+    for name in _DENOISER_SUBMODULES:
+        submodule = getattr(mdm, name, None)
+        if submodule is None:
+            continue
+        setattr(mdm, name, quantize_dynamic(submodule, {torch.nn.Linear}, dtype=torch.qint8))
+        quantized += 1
+    return quantized
+
+
+def compile_denoiser(model: torch.nn.Module, mode: str) -> bool:
+    """
+    디노이저 트랜스포머를 컴파일
+    model_kwargs에 텍스트 등 텐서가 아닌 값이 있어 전체 모델 대신 seqTransEncoder만 컴파일합니다.
+
+    Returns:
+        bool: 적용 여부
+    """
+    if mode == "none":
+        return False
+
+    mdm = _unwrap_mdm(model)
+    encoder = getattr(mdm, "seqTransEncoder", None)
+    if encoder is None:
+        print(f"⚠️  seqTransEncoder가 없어 {mode}를 건너뜁니다 (arch: {getattr(mdm, 'arch', '?')})")
+        return False
+
+    try:
+        if mode == "torch_compile":
+            mdm.seqTransEncoder = torch.compile(encoder, dynamic=True)
+        elif mode == "torchscript":
+            mdm.seqTransEncoder = torch.jit.freeze(torch.jit.script(encoder.eval()))
+        return True
+    except Exception as e:
+        print(f"⚠️  {mode} 적용 실패 (eager 모드 사용): {e}")
+        return False
+
+
+def apply_cpu_profile(model: torch.nn.Module, profile: Dict) -> Dict:
+    """
+    로드된 모델에 CPU 프로파일 적용 (스레드 설정은 configure_threads로 먼저 수행)
+
+    Returns:
+        Dict: 실제로 적용된 항목
+    """
+    applied = {"quantized_modules": 0, "compile": "none"}
+    if profile.get("quantize"):
+        applied["quantized_modules"] = quantize_dynamic_int8(model)
+        print(f"✅ 동적 int8 양자화 적용: 서브모듈 {applied['quantized_modules']}개")
+    if compile_denoiser(model, profile.get("compile", "none")):
+        applied["compile"] = profile["compile"]
+        print(f"✅ 디노이저 컴파일 적용: {profile['compile']}")
+    return applied
@@ -0,0 +1,188 @@
+"""
+내보내기 파일 캐시
+같은 작업을 같은 형식으로 여러 번 내보낼 때(미리보기 → DCC 툴 가져오기 등) 파일을 다시 만들지 않도록
+변환 결과를 로컬 디스크에 보관합니다.
+
+- 키: (작업 ID, 형식, 옵션...) → 파일 이름 "<키 해시>.<확장자>" (조회는 stat 한 번)
+- ETag: 파일 내용의 sha256 (강한 검증자), 파일을 쓸 때 계산해 메모리에 보관하고
+  다른 워커가 만든 파일은 처음 조회할 때 한 번 계산
+- 크기 제한: 디렉터리 전체가 max_bytes를 넘으면 가장 오래 사용하지 않은(mtime) 파일부터 삭제
+- 응답은 FileResponse로 보내므로 Range/If-Range(이어받기)를 그대로 지원
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# 키 해시 길이 (16진수 문자)
+_KEY_LENGTH = 32
+# 다른 워커가 만든 파일의 해시를 계산할 때 읽는 크기 (바이트)
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class ExportArtifact:
+    """캐시된 내보내기 파일"""
+    path: str
+    size: int
+    etag: str
+
+
+class ExportCache:
+    """
+    디스크 기반 내보내기 파일 캐시 (스레드 안전, 여러 프로세스가 같은 디렉터리 사용 가능)
+
+    사용법:
+        cache = ExportCache("export_cache", max_bytes=512 * 1024 * 1024)
+        artifact = cache.get_or_create((job_id, "bvh", None), lambda: iter_motion_file("bvh", motion), ".bvh")
+        FileResponse(artifact.path, headers={"ETag": artifact.etag})
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        # 같은 키를 동시에 만들지 않도록 키별 잠금 (파일 경로 → [잠금, 기다리는 스레드 수])
+        self._key_locks: Dict[str, List] = {}
+        # 경로 → (inode, 크기, ETag) (파일이 바뀌면 inode가 달라지므로 다시 계산)
+        self._etags: Dict[str, Tuple[int, int, str]] = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key: Tuple[Hashable, ...], suffix: str = "") -> Optional[ExportArtifact]:
+        """캐시된 파일 (없으면 None, 있으면 사용 시각 갱신)"""
+        artifact = self._find(self._path(key, suffix))
+        with self._lock:
+            if artifact is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return artifact
+
+    def get_or_create(
+        self,
+        key: Tuple[Hashable, ...],
+        make_chunks: Callable[[], Iterable[bytes]],
+        suffix: str = ""
+    ) -> ExportArtifact:
+        """
+        캐시된 파일을 반환하고, 없으면 make_chunks()의 조각을 디스크에 쓰면서 만듦 (블로킹)
+
+        Args:
+            key: 캐시 키 (작업 ID가 첫 번째 값, 나머지는 형식/옵션)
+            make_chunks: 파일 내용 조각을 만드는 함수 (캐시에 없을 때만 호출)
+            suffix: 파일 확장자 (예: ".bvh")
+        """
+        path = self._path(key, suffix)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(path, [threading.Lock(), 0])
+            key_lock[1] += 1
+        try:
+            with key_lock[0]:
+                artifact = self.get(key, suffix)
+                if artifact is None:
+                    artifact = self._write(path, make_chunks())
+                    self._evict(keep=path)
+        finally:
+            # 마지막으로 기다리던 스레드가 잠금을 정리
+            with self._lock:
+                key_lock[1] -= 1
+                if key_lock[1] == 0:
+                    del self._key_locks[path]
+        return artifact
+
+    def stats(self) -> Dict:
+        files = self._files()
+        with self._lock:
+            return {
+                "files": len(files),
+                "bytes": sum(size for _, size, _ in files),
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+    def _path(self, key: Tuple[Hashable, ...], suffix: str) -> str:
+        encoded = json.dumps(list(key), default=str).encode("utf-8")
+        return os.path.join(self.directory, hashlib.sha256(encoded).hexdigest()[:_KEY_LENGTH] + suffix)
+
+    def _find(self, path: str) -> Optional[ExportArtifact]:
+        try:
+            # mtime을 마지막 사용 시각으로 사용 (LRU 삭제 순서)
+            os.utime(path)
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            cached = self._etags.get(path)
+        if cached is not None and cached[:2] == (stat.st_ino, stat.st_size):
+            etag = cached[2]
+        else:
+            # 다른 워커가 만든 파일 (또는 다시 만든 파일)
+            digest = hashlib.sha256()
+            try:
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                        digest.update(chunk)
+            except FileNotFoundError:
+                return None
+            etag = self._remember(path, stat, digest)
+        return ExportArtifact(path=path, size=stat.st_size, etag=etag)
+
+    def _remember(self, path: str, stat: os.stat_result, digest) -> str:
+        etag = f'"{digest.hexdigest()[:_KEY_LENGTH]}"'
+        with self._lock:
+            self._etags[path] = (stat.st_ino, stat.st_size, etag)
+        return etag
+
+    def _write(self, path: str, chunks: Iterable[bytes]) -> ExportArtifact:
+        """조각을 임시 파일에 쓰면서 해시 계산 후 최종 이름으로 바꿈 (원자적)"""
+        temp_path = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+        digest = hashlib.sha256()
+        try:
+            with open(temp_path, "wb") as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+            stat = os.stat(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return ExportArtifact(path=path, size=stat.st_size, etag=self._remember(path, stat, digest))
+
+    def _files(self):
+        """(경로, 크기, mtime) 목록 (쓰는 중인 임시 파일 제외)"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict(self, keep: str):
+        """전체 크기가 max_bytes 이하가 될 때까지 오래 사용하지 않은 파일부터 삭제 (방금 만든 파일 제외)"""
+        files = sorted(self._files(), key=lambda file: file[2])
+        total = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self._etags.pop(path, None)
+            total -= size
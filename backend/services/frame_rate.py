@@ -0,0 +1,39 @@
+"""
+프레임 레이트 변환
+모션을 내부 처리 프레임 레이트와 출력 프레임 레이트 사이에서 리샘플링합니다.
+"""
+import numpy as np
+
+
+def frame_count(duration: float, fps: float) -> int:
+    """길이(초)와 fps로 프레임 수 계산 (최소 1)"""
+    return max(1, int(round(duration * fps)))
+
+
+def resample_motion(motion: np.ndarray, src_fps: float, dst_fps: float) -> np.ndarray:
+    """
+    모션을 다른 프레임 레이트로 리샘플링 (시간축 선형 보간, 벡터화)
+
+    Args:
+        motion: [frames, ...] 모션 데이터
+        src_fps: 입력 프레임 레이트
+        dst_fps: 출력 프레임 레이트
+
+    Returns:
+        np.ndarray: [round(frames * dst_fps / src_fps), ...] 모션 데이터 (길이 유지)
+    """
+    motion = np.asarray(motion)
+    if src_fps == dst_fps or len(motion) == 0:
+        return motion
+
+    n_src = motion.shape[0]
+    n_dst = frame_count(n_src / src_fps, dst_fps)
+
+    # 출력 프레임 i의 입력 프레임 위치 (소수)
+    positions = np.minimum(np.arange(n_dst) * (src_fps / dst_fps), n_src - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, n_src - 1)
+
+    dtype = motion.dtype if np.issubdtype(motion.dtype, np.floating) else np.float32
+    weight = (positions - lower).astype(dtype).reshape((-1,) + (1,) * (motion.ndim - 1))
+    return motion[lower] * (1 - weight) + motion[upper] * weight
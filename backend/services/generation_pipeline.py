@@ -0,0 +1,277 @@
+"""
+생성 파이프라인
+오디오 분석 → 모션 생성 → 결과 저장까지의 작업 처리 단계를 API 서버와 분리합니다.
+
+API 프로세스(GENERATION_MODE=inline)에서는 스케줄러 스레드가, 별도 워커(worker.py)에서는
+작업 대기열에서 꺼낸 작업을 같은 GenerationPipeline으로 실행합니다.
+작업 입력(payload)은 JSON으로 직렬화 가능한 값만 사용하므로 프로세스/호스트 사이에서 그대로 전달됩니다.
+"""
+import os
+import socket
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+# 진행률 구간: 디노이징 스텝을 30% → 85%에 매핑
+DIFFUSION_PROGRESS_START = 30
+DIFFUSION_PROGRESS_END = 85
+
+HOSTNAME = socket.gethostname()
+
+# 작업 종류 → GenerationPipeline 메서드
+JOB_KINDS = {
+    "generate": "run_generation",
+    "variations": "run_variations",
+    "edit": "run_edit",
+}
+
+# 완료된 작업에 보관하는 생성 파라미터 (변형/구간 편집에서 재사용)
+_PARAM_KEYS = ("prompt", "style", "audio_features", "energy", "smoothness", "bounce", "creativity", "output_fps")
+
+
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class GenerationPipeline:
+    """
+    생성 작업 실행기
+
+    generator는 MotionGenerator와 같은 generate/generate_variations/edit_range 메서드를 가진 객체입니다.
+    (추론 풀을 쓰면 inference_pool.PoolGenerator) 모든 메서드는 블로킹이므로 스레드나 워커 프로세스에서 호출합니다.
+
+    사용법:
+        pipeline = GenerationPipeline(job_store, AudioProcessor(), motion_generator)
+        pipeline.run("generate", {"job_id": ..., "prompt": ..., "audio_path": ..., ...})
+    """
+
+    def __init__(self, job_store, audio_processor, generator,
+                 wait_for_model: Optional[Callable[[bool], bool]] = None,
+                 remove_audio: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            job_store: 작업 상태/결과 저장소
+            audio_processor: AudioProcessor
+            generator: 모션 생성기
+            wait_for_model: wait_for_model(wait) → 모델 로딩이 끝났으면 True
+                            (wait=True면 로딩이 끝날 때까지 대기, 생략하면 항상 로딩 완료로 간주)
+            remove_audio: 처리가 끝난 업로드 오디오 삭제 함수 (API 프로세스는 UploadSpool.remove로
+                          스풀 사용량을 바로 갱신, 생략하면 파일만 삭제)
+        """
+        self.job_store = job_store
+        self.audio_processor = audio_processor
+        self.generator = generator
+        self._wait_for_model = wait_for_model or (lambda wait: True)
+        self._remove_audio = remove_audio or _remove_file
+
+    def run(self, kind: str, payload: Dict):
+        """작업 종류에 맞는 처리 함수 실행 (payload는 해당 함수의 인자)"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"지원하지 않는 작업 종류: {kind} (가능: {', '.join(JOB_KINDS)})")
+        return getattr(self, JOB_KINDS[kind])(**payload)
+
+    def run_generation(
+        self,
+        job_id: str,
+        prompt: str,
+        audio_path: str,
+        style: str,
+        energy: float,
+        smoothness: float,
+        bounce: float,
+        creativity: float,
+        wait_for_model: bool = True,
+        fps: int = 30
+    ):
+        """음악 + 프롬프트로 모션 생성"""
+        print(f"🎬 모션 생성 시작 (job_id: {job_id})")
+        print(f"   프롬프트: {prompt}")
+        print(f"   스타일: {style}")
+        print(f"   오디오 경로: {audio_path}")
+
+        try:
+            # 상태 업데이트: 처리 중
+            self.job_store.update(job_id, status="processing", progress=10, message="오디오 분석 중...",
+                                  host=HOSTNAME)
+
+            # 단계별 소요 시간 (초, 상태 응답의 timings)
+            timings = {}
+            stage_start = time.perf_counter()
+            audio_analysis = self.audio_processor.analyze(audio_path)
+            timings["audio_analysis"] = round(time.perf_counter() - stage_start, 3)
+
+            # 모델 로딩이 끝나지 않았으면 대기하거나 모의 모드로 생성
+            stage_start = time.perf_counter()
+            if wait_for_model and not self._wait_for_model(False):
+                self.job_store.update(job_id, message="AI 모델 로딩 대기 중...")
+            use_mock = not self._wait_for_model(wait_for_model)
+            if use_mock:
+                print(f"⚠️  모델 로딩 중이므로 모의 모드로 생성 (job_id: {job_id})")
+            timings["model_wait"] = round(time.perf_counter() - stage_start, 3)
+
+            self.job_store.update(job_id, progress=DIFFUSION_PROGRESS_START, message="모션 생성 중...",
+                                  timings=timings)
+
+            generate_kwargs = dict(
+                prompt=prompt,
+                style=style,
+                audio_features=audio_analysis,
+                energy=energy,
+                smoothness=smoothness,
+                bounce=bounce,
+                creativity=creativity,
+                force_mock=use_mock,
+                output_fps=fps,
+                keep_source=True
+            )
+            stage_start = time.perf_counter()
+            motion_data = self.generator.generate(step_callback=self.make_step_callback(job_id), **generate_kwargs)
+            timings["generation"] = round(time.perf_counter() - stage_start, 3)
+
+            self.job_store.update(job_id, progress=90, message="모션 데이터 처리 중...", timings=timings)
+            self._complete(job_id, motion_data, generate_kwargs)
+
+            print(f"✅ 모션 생성 완료 (job_id: {job_id})")
+            print(f"   프레임: {motion_data.get('frames', 'N/A')}")
+            print(f"   관절: {motion_data.get('joints', 'N/A')}")
+
+        except Exception as e:
+            print(f"❌ 모션 생성 오류 (job_id: {job_id}):")
+            print(f"   에러 메시지: {str(e)}")
+            print(f"   상세 트레이스:")
+            print(traceback.format_exc())
+            self.job_store.fail(job_id, str(e))
+
+        finally:
+            # 임시 파일 삭제
+            self._remove_audio(audio_path)
+
+    def run_variations(self, variant_ids: List[str], parent_job_id: str, params: Dict):
+        """완료된 작업의 변형 생성 (모든 변형을 한 배치로 생성)"""
+        print(f"🎲 변형 생성 시작 (job_ids: {', '.join(variant_ids)})")
+
+        try:
+            source, _ = self.job_store.get_source(parent_job_id)
+            if source is None:
+                raise RuntimeError("원본 작업의 결과가 없습니다.")
+            for variant_id in variant_ids:
+                self.job_store.update(
+                    variant_id,
+                    status="processing",
+                    progress=DIFFUSION_PROGRESS_START,
+                    message="변형 생성 중...",
+                    host=HOSTNAME
+                )
+
+            stage_start = time.perf_counter()
+            results = self.generator.generate_variations(
+                source=source,
+                num_variants=len(variant_ids),
+                keep_source=True,
+                step_callback=self.make_step_callback(*variant_ids),
+                **params
+            )
+            timings = {"generation": round(time.perf_counter() - stage_start, 3)}
+
+            for variant_id, motion_data in zip(variant_ids, results):
+                self.job_store.update(variant_id, timings=timings)
+                self._complete(variant_id, motion_data, params)
+
+            print(f"✅ 변형 생성 완료 (job_ids: {', '.join(variant_ids)})")
+
+        except Exception as e:
+            print(f"❌ 변형 생성 오류: {e}")
+            for variant_id in variant_ids:
+                self.job_store.fail(variant_id, str(e))
+
+    def run_edit(self, job_id: str, parent_job_id: str, params: Dict, start: float, end: float,
+                 window_prompt: Optional[str] = None):
+        """완료된 작업의 일부 구간 편집"""
+        print(f"✂️  구간 편집 시작 (job_id: {job_id}, {start:.2f}-{end:.2f}초)")
+
+        try:
+            source, _ = self.job_store.get_source(parent_job_id)
+            if source is None:
+                raise RuntimeError("원본 작업의 결과가 없습니다.")
+            self.job_store.update(
+                job_id,
+                status="processing",
+                progress=DIFFUSION_PROGRESS_START,
+                message="구간 편집 중...",
+                host=HOSTNAME
+            )
+
+            stage_start = time.perf_counter()
+            motion_data = self.generator.edit_range(
+                source=source,
+                start=start,
+                end=end,
+                window_prompt=window_prompt,
+                keep_source=True,
+                step_callback=self.make_step_callback(job_id),
+                **params
+            )
+
+            self.job_store.update(job_id, timings={"generation": round(time.perf_counter() - stage_start, 3)})
+            self._complete(job_id, motion_data, params)
+            print(f"✅ 구간 편집 완료 (job_id: {job_id})")
+
+        except Exception as e:
+            print(f"❌ 구간 편집 오류 (job_id: {job_id}): {e}")
+            self.job_store.fail(job_id, str(e))
+
+    def make_step_callback(self, *job_ids: str):
+        """
+        디노이징 스텝마다 작업 상태에 진행률/스텝 시간/예상 남은 시간을 기록하는 콜백 생성
+        (생성 스레드 또는 추론 풀 수집 스레드에서 호출됨, 한 배치로 생성하는 여러 작업에 같은 값을 기록)
+        """
+        started = time.perf_counter()
+
+        def on_step(step: int, total_steps: int, step_seconds: float):
+            if total_steps <= 0:
+                return
+            elapsed = time.perf_counter() - started
+            avg_step_seconds = elapsed / step
+            span = DIFFUSION_PROGRESS_END - DIFFUSION_PROGRESS_START
+            update = {
+                "progress": DIFFUSION_PROGRESS_START + int(span * step / total_steps),
+                "message": f"모션 생성 중... ({step}/{total_steps})",
+                "diffusion_step": step,
+                "diffusion_steps": total_steps,
+                "step_seconds": round(step_seconds, 4),
+                "avg_step_seconds": round(avg_step_seconds, 4),
+                "eta_seconds": round(avg_step_seconds * (total_steps - step), 2),
+                "elapsed_seconds": round(elapsed, 2),
+            }
+            for job_id in job_ids:
+                try:
+                    self.job_store.update(job_id, **update)
+                except KeyError:
+                    pass
+
+        return on_step
+
+    def _complete(self, job_id: str, motion_data: Dict, generate_kwargs: Dict):
+        """
+        작업을 완료 상태로 기록
+        후처리 전 원본 모션('source')과 생성 파라미터는 변형 생성을 위해 응답과 분리하여 보관
+        """
+        source = motion_data.pop("source", None)
+        params = {key: generate_kwargs[key] for key in _PARAM_KEYS}
+        self.job_store.complete(job_id, motion_data, source=source, params=params)
+
+
+def queue_position_updater(job_store) -> Callable[[str, Optional[int]], None]:
+    """대기 순서를 작업 상태에 기록하는 on_position 콜백 (JobScheduler/SQLiteJobQueue 공용)"""
+
+    def update_queue_position(job_id: str, position: Optional[int]):
+        try:
+            if position is None:
+                job_store.update(job_id, queue_position=None)
+            else:
+                job_store.update(job_id, queue_position=position, message=f"대기 중... ({position}번째)")
+        except KeyError:
+            pass
+
+    return update_queue_position
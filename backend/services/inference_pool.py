@@ -0,0 +1,278 @@
+"""
+멀티 프로세스 추론 워커 풀
+모델을 한 번만 로드한 프로세스에서 N개의 추론 워커를 fork하여 가중치를 copy-on-write로 공유합니다.
+
+프로세스 구조:
+    API 프로세스 (uvicorn, 모델 없음)
+      └─ 슈퍼바이저 프로세스: 모델 로드 → gc.freeze() → 워커 fork, 죽은 워커 재시작
+           ├─ 추론 워커 1 ─┐
+           ├─ 추론 워커 2  ├─ 부모의 모델 가중치를 공유 (fork COW)
+           └─ 추론 워커 N ─┘
+
+API 프로세스는 작업을 큐에 넣고, 결과/이벤트 큐를 읽는 수집 스레드가 Future를 완료합니다.
+torch 텐서 데이터는 파이썬 객체 헤더와 분리되어 있어 참조 카운트가 바뀌어도 복사되지 않으므로
+워커 수가 늘어도 가중치 메모리는 한 벌만 사용합니다. (safetensors mmap 로드 시 페이지 캐시도 공유)
+"""
+import gc
+import multiprocessing as mp
+import os
+import queue
+import threading
+import uuid
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+# 워커의 현재 작업 ID를 기록하는 공유 버퍼 크기 (uuid4 문자열 36자)
+_TASK_ID_BYTES = 64
+
+# 워커에서 호출할 수 있는 MotionGenerator 메서드
+_TASK_METHODS = ("generate", "generate_variations", "edit_range")
+
+
+def _worker_main(motion_generator, tasks, events, current_task, num_threads: int):
+    """추론 워커 루프: 작업을 받아 MotionGenerator 메서드를 실행하고 결과를 이벤트 큐로 보냄"""
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, method, kwargs, report_progress = task
+        current_task.value = task_id.encode()
+        if report_progress:
+            kwargs["step_callback"] = lambda step, total, seconds, task_id=task_id: events.put(
+                ("progress", task_id, (step, total, seconds))
+            )
+        try:
+            result = getattr(motion_generator, method)(**kwargs)
+            events.put(("done", task_id, result))
+        except Exception as e:
+            events.put(("error", task_id, str(e)))
+        finally:
+            current_task.value = b""
+
+
+def _supervisor_main(motion_generator, num_workers: int, tasks, events, stop_event, api_pid: int):
+    """
+    슈퍼바이저: 모델을 로드한 뒤 워커를 fork하고, 죽은 워커를 다시 띄움
+    API 프로세스의 스레드(이벤트 루프, 수집 스레드)와 분리된 프로세스에서 fork하므로
+    다른 스레드가 잡고 있던 락이 워커로 복사되는 문제가 없습니다.
+    """
+    ctx = mp.get_context("fork")
+
+    try:
+        loaded = motion_generator.load_model()
+    except Exception as e:
+        print(f"❌ 추론 풀 모델 로드 실패: {e}")
+        loaded = False
+
+    # 로드된 객체를 GC 추적 대상에서 제외 → GC가 워커에서 페이지를 건드리지 않음
+    gc.freeze()
+
+    num_threads = max(1, (os.cpu_count() or 1) // num_workers)
+
+    def spawn(slot: int):
+        current_task = ctx.Array("c", _TASK_ID_BYTES, lock=False)
+        process = ctx.Process(
+            target=_worker_main,
+            args=(motion_generator, tasks, events, current_task, num_threads),
+            name=f"inference-worker-{slot}",
+            daemon=True,
+        )
+        process.start()
+        return process, current_task
+
+    workers = [spawn(slot) for slot in range(num_workers)]
+    events.put(("model", None, loaded))
+    print(f"✅ 추론 워커 {num_workers}개 시작 (워커당 스레드 {num_threads}개, 모델 로드: {loaded})")
+
+    while not stop_event.is_set():
+        # API 프로세스가 사라지면 종료
+        if os.getppid() != api_pid:
+            break
+        for slot, (process, current_task) in enumerate(workers):
+            if process.is_alive():
+                continue
+            task_id = current_task.value.decode()
+            if task_id:
+                events.put(("error", task_id, f"추론 워커가 비정상 종료되었습니다 (exit code {process.exitcode})"))
+            print(f"⚠️  추론 워커 {slot} 재시작 (exit code {process.exitcode})")
+            workers[slot] = spawn(slot)
+        stop_event.wait(1.0)
+
+    for _ in workers:
+        tasks.put(None)
+    for process, _ in workers:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+
+class InferencePool:
+    """
+    API 프로세스에서 사용하는 추론 워커 풀 핸들
+
+    사용법:
+        pool = InferencePool(MotionGenerator(lazy=True), num_workers=4)
+        pool.start()                     # 이벤트 루프 시작 전 / 메인 스레드에서 호출
+        pool.wait_until_ready()          # 모델 로드 완료까지 대기 (실제 모델이면 True)
+        result = pool.submit(prompt=..., ...).result()
+    """
+
+    def __init__(self, motion_generator, num_workers: int):
+        if num_workers < 1:
+            raise ValueError("num_workers는 1 이상이어야 합니다.")
+        self.motion_generator = motion_generator
+        self.num_workers = num_workers
+        self._ctx = mp.get_context("fork")
+        self._tasks = None
+        self._events = None
+        self._stop_event = None
+        self._supervisor = None
+        self._collector = None
+        self._futures: Dict[str, Future] = {}
+        self._progress_callbacks: Dict[str, Callable[[int, int, float], None]] = {}
+        self._futures_lock = threading.Lock()
+        self._ready = threading.Event()
+        self.model_loaded: Optional[bool] = None
+
+    def start(self):
+        """슈퍼바이저 프로세스와 결과 수집 스레드 시작"""
+        if self._supervisor is not None:
+            return
+        self._tasks = self._ctx.Queue()
+        self._events = self._ctx.Queue()
+        self._stop_event = self._ctx.Event()
+        self._supervisor = self._ctx.Process(
+            target=_supervisor_main,
+            args=(self.motion_generator, self.num_workers, self._tasks, self._events,
+                  self._stop_event, os.getpid()),
+            name="inference-supervisor",
+        )
+        self._supervisor.start()
+        self._collector = threading.Thread(target=self._collect, name="inference-collector", daemon=True)
+        self._collector.start()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        슈퍼바이저가 모델을 로드하고 워커를 띄울 때까지 대기
+
+        Returns:
+            bool: 실제 MDM 모델이 로드되었으면 True (모의 모드면 False)
+        """
+        if not self._ready.wait(timeout):
+            raise TimeoutError("추론 풀이 시간 내에 준비되지 않았습니다.")
+        return bool(self.model_loaded)
+
+    def submit(self, progress_callback: Optional[Callable[[int, int, float], None]] = None, **kwargs) -> Future:
+        """
+        MotionGenerator.generate(**kwargs)를 워커에서 실행. 결과는 Future로 반환
+        progress_callback은 디노이징 스텝마다 수집 스레드에서 (현재 스텝, 전체 스텝, 스텝 소요 시간)로 호출됩니다.
+        """
+        return self._submit("generate", progress_callback, kwargs)
+
+    def submit_variations(self, progress_callback: Optional[Callable[[int, int, float], None]] = None,
+                          **kwargs) -> Future:
+        """MotionGenerator.generate_variations(**kwargs)를 워커에서 실행. 결과는 Future로 반환"""
+        return self._submit("generate_variations", progress_callback, kwargs)
+
+    def submit_edit(self, progress_callback: Optional[Callable[[int, int, float], None]] = None,
+                    **kwargs) -> Future:
+        """MotionGenerator.edit_range(**kwargs)를 워커에서 실행. 결과는 Future로 반환"""
+        return self._submit("edit_range", progress_callback, kwargs)
+
+    def _submit(self, method: str, progress_callback, kwargs: dict) -> Future:
+        if method not in _TASK_METHODS:
+            raise ValueError(f"지원하지 않는 작업: {method}")
+        if self._supervisor is None:
+            raise RuntimeError("추론 풀이 시작되지 않았습니다. start()를 먼저 호출하세요.")
+        if not self._supervisor.is_alive():
+            raise RuntimeError("추론 슈퍼바이저 프로세스가 종료되었습니다.")
+        task_id = str(uuid.uuid4())
+        future = Future()
+        with self._futures_lock:
+            self._futures[task_id] = future
+            if progress_callback is not None:
+                self._progress_callbacks[task_id] = progress_callback
+        self._tasks.put((task_id, method, kwargs, progress_callback is not None))
+        return future
+
+    def _collect(self):
+        """이벤트 큐를 읽어 Future 완료 (API 프로세스의 백그라운드 스레드)"""
+        while True:
+            try:
+                kind, task_id, payload = self._events.get(timeout=1.0)
+            except queue.Empty:
+                if self._supervisor is not None and not self._supervisor.is_alive():
+                    self._fail_all("추론 슈퍼바이저 프로세스가 종료되었습니다.")
+                    self._ready.set()
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+
+            if kind == "model":
+                self.model_loaded = payload
+                self._ready.set()
+                continue
+
+            if kind == "progress":
+                with self._futures_lock:
+                    callback = self._progress_callbacks.get(task_id)
+                if callback is not None:
+                    try:
+                        callback(*payload)
+                    except Exception as e:
+                        print(f"⚠️  진행 상황 콜백 오류: {e}")
+                continue
+
+            with self._futures_lock:
+                future = self._futures.pop(task_id, None)
+                self._progress_callbacks.pop(task_id, None)
+            if future is None:
+                continue
+            if kind == "done":
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def _fail_all(self, message: str):
+        with self._futures_lock:
+            futures, self._futures = self._futures, {}
+            self._progress_callbacks = {}
+        for future in futures.values():
+            future.set_exception(RuntimeError(message))
+
+    def shutdown(self, timeout: float = 10.0):
+        """워커와 슈퍼바이저 종료"""
+        if self._supervisor is None:
+            return
+        self._stop_event.set()
+        self._supervisor.join(timeout)
+        if self._supervisor.is_alive():
+            self._supervisor.terminate()
+        self._fail_all("추론 풀이 종료되었습니다.")
+        self._supervisor = None
+
+
+class PoolGenerator:
+    """
+    추론 풀을 MotionGenerator처럼 호출하는 블로킹 어댑터 (GenerationPipeline의 generator로 사용)
+    step_callback은 추론 풀 수집 스레드에서 호출됩니다.
+    """
+
+    def __init__(self, pool: InferencePool):
+        self.pool = pool
+
+    def generate(self, step_callback=None, **kwargs):
+        return self.pool.submit(progress_callback=step_callback, **kwargs).result()
+
+    def generate_variations(self, step_callback=None, **kwargs):
+        return self.pool.submit_variations(progress_callback=step_callback, **kwargs).result()
+
+    def edit_range(self, step_callback=None, **kwargs):
+        return self.pool.submit_edit(progress_callback=step_callback, **kwargs).result()
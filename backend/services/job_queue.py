@@ -0,0 +1,247 @@
+"""
+SQLite 작업 대기열
+API 프로세스는 작업을 넣기만 하고, 별도 워커 프로세스(worker.py)가 꺼내서 생성합니다. (GENERATION_MODE=worker)
+
+- 내구성: 대기열이 SQLite 파일에 있으므로 API/워커가 재시작해도 대기 중인 작업이 남아 있음
+- 임대(lease): 워커는 작업을 꺼낸 뒤 주기적으로 heartbeat를 기록하고, 일정 시간 heartbeat가 없는
+  작업(워커 비정상 종료)은 다른 워커가 다시 대기열에 넣거나(max_attempts 이내) 실패 처리
+- 우선순위/대기 순서/Retry-After: JobScheduler와 같은 규칙 (interactive가 batch보다 먼저, 같은 우선순위는 먼저 들어온 순)
+"""
+import json
+import math
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .job_scheduler import PRIORITIES, QueueFull, DEFAULT_JOB_SECONDS
+from .job_store import SQLiteDatabase, json_default
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL UNIQUE,
+    job_ids TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS job_queue_order ON job_queue (status, priority, id);
+CREATE TABLE IF NOT EXISTS job_queue_stats (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+class SQLiteJobQueue(SQLiteDatabase):
+    """
+    여러 프로세스가 공유하는 우선순위 작업 대기열 (WAL 모드 SQLite)
+
+    사용법:
+        queue = SQLiteJobQueue("jobs.sqlite3")
+        queue.enqueue(job_id, "interactive", "generate", payload)     # API 프로세스
+        task = queue.claim("worker-1")                                # 워커 프로세스
+        ...
+        queue.finish(task["job_id"], seconds)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_queue: int = 32,
+        lease_seconds: float = 120,
+        max_attempts: int = 2,
+        on_position: Optional[Callable[[str, Optional[int]], None]] = None
+    ):
+        self.max_queue = max_queue
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._on_position = on_position
+        super().__init__(path, _SCHEMA)
+
+    def enqueue(
+        self,
+        job_id: str,
+        priority: str,
+        kind: str,
+        payload: Dict,
+        linked_job_ids: Sequence[str] = ()
+    ) -> int:
+        """
+        작업을 대기열에 추가
+
+        Args:
+            job_id: 작업 ID
+            priority: PRIORITIES의 키
+            kind: 작업 종류 (generation_pipeline.JOB_KINDS의 키)
+            payload: 처리 함수 인자 (JSON 직렬화 가능)
+            linked_job_ids: 같은 실행에서 함께 처리되는 다른 작업 ID (대기 순서를 같이 알림)
+
+        Returns:
+            int: 대기 순서 (1부터)
+
+        Raises:
+            QueueFull: 대기열이 가득 참
+            ValueError: 알 수 없는 우선순위
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"지원하지 않는 우선순위: {priority} (가능: {', '.join(PRIORITIES)})")
+        with self._transaction() as conn:
+            queued = conn.execute("SELECT COUNT(*) FROM job_queue WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queue:
+                full = True
+            else:
+                full = False
+                conn.execute(
+                    "INSERT INTO job_queue (job_id, job_ids, kind, priority, payload, enqueued_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, json.dumps([job_id, *linked_job_ids]), kind, PRIORITIES[priority],
+                     json.dumps(payload, default=json_default), time.time())
+                )
+        if full:
+            raise QueueFull(self.retry_after())
+        positions = self._publish_positions()
+        return positions.get(job_id, 1)
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """
+        가장 먼저 실행할 작업을 꺼내 실행 중으로 표시 (없으면 None)
+
+        Returns:
+            dict: job_id, job_ids(함께 처리하는 작업 ID 목록), kind, payload, attempts
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id, job_id, job_ids, kind, payload, attempts FROM job_queue "
+                "WHERE status = 'queued' ORDER BY priority, id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE job_queue SET status = 'running', worker = ?, attempts = attempts + 1, "
+                "heartbeat_at = ? WHERE id = ?",
+                (worker_id, now, row["id"])
+            )
+        job_ids = json.loads(row["job_ids"])
+        self._publish_positions(started=job_ids)
+        return {
+            "job_id": row["job_id"],
+            "job_ids": job_ids,
+            "kind": row["kind"],
+            "payload": json.loads(row["payload"]),
+            "attempts": row["attempts"] + 1,
+        }
+
+    def heartbeat(self, job_id: str):
+        """실행 중인 작업의 임대 연장"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE job_queue SET heartbeat_at = ? WHERE job_id = ? AND status = 'running'",
+                (time.time(), job_id)
+            )
+
+    def finish(self, job_id: str, seconds: Optional[float] = None):
+        """작업을 대기열에서 제거하고 소요 시간을 Retry-After 추정에 반영"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM job_queue WHERE job_id = ?", (job_id,))
+            if seconds is not None:
+                row = conn.execute("SELECT value FROM job_queue_stats WHERE name = 'avg_job_seconds'").fetchone()
+                avg = seconds if row is None else 0.8 * row["value"] + 0.2 * seconds
+                conn.execute(
+                    "INSERT OR REPLACE INTO job_queue_stats (name, value) VALUES ('avg_job_seconds', ?)",
+                    (avg,)
+                )
+
+    def reap(self) -> List[List[str]]:
+        """
+        임대가 만료된 작업(heartbeat가 lease_seconds 이상 없음) 정리
+        시도 횟수가 남았으면 다시 대기열에 넣고, 아니면 대기열에서 제거합니다.
+
+        Returns:
+            list: 제거된 작업들의 작업 ID 목록 (호출자가 실패로 기록)
+        """
+        deadline = time.time() - self.lease_seconds
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, job_id, job_ids, worker, attempts FROM job_queue "
+                "WHERE status = 'running' AND heartbeat_at < ?",
+                (deadline,)
+            ).fetchall()
+            abandoned = []
+            for row in rows:
+                if row["attempts"] >= self.max_attempts:
+                    conn.execute("DELETE FROM job_queue WHERE id = ?", (row["id"],))
+                    abandoned.append(json.loads(row["job_ids"]))
+                else:
+                    conn.execute(
+                        "UPDATE job_queue SET status = 'queued', worker = NULL, heartbeat_at = NULL WHERE id = ?",
+                        (row["id"],)
+                    )
+                print(f"⚠️  임대 만료 작업 정리 (job_id: {row['job_id']}, 워커: {row['worker']}, "
+                      f"시도 {row['attempts']}/{self.max_attempts})")
+        if rows:
+            self._publish_positions()
+        return abandoned
+
+    def is_full(self) -> bool:
+        return self._count("queued") >= self.max_queue
+
+    def position(self, job_id: str) -> Optional[int]:
+        """대기 순서 (1부터, 대기 중이 아니면 None)"""
+        return self._positions().get(job_id)
+
+    def retry_after(self) -> int:
+        """대기열이 빌 때까지 예상 시간 (초, 실행 중인 작업 수를 동시 실행 워커 수로 간주)"""
+        job_seconds = self._avg_job_seconds() or DEFAULT_JOB_SECONDS
+        queued, running = self._count("queued"), self._count("running")
+        return max(1, math.ceil(job_seconds * (queued + running) / max(1, running)))
+
+    def stats(self) -> Dict:
+        avg_job_seconds = self._avg_job_seconds()
+        return {
+            "running": self._count("running"),
+            "queued": self._count("queued"),
+            "max_queue": self.max_queue,
+            "avg_job_seconds": round(avg_job_seconds, 2) if avg_job_seconds else None,
+        }
+
+    def _count(self, status: str) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM job_queue WHERE status = ?", (status,)
+        ).fetchone()[0]
+
+    def _avg_job_seconds(self) -> Optional[float]:
+        row = self._connection().execute(
+            "SELECT value FROM job_queue_stats WHERE name = 'avg_job_seconds'"
+        ).fetchone()
+        return row["value"] if row else None
+
+    def _positions(self) -> Dict[str, int]:
+        """대기 중인 작업 ID → 대기 순서 (함께 처리하는 작업 ID 포함)"""
+        rows = self._connection().execute(
+            "SELECT job_ids FROM job_queue WHERE status = 'queued' ORDER BY priority, id"
+        ).fetchall()
+        positions = {}
+        for position, row in enumerate(rows, start=1):
+            for job_id in json.loads(row["job_ids"]):
+                positions[job_id] = position
+        return positions
+
+    def _publish_positions(self, started: Sequence[str] = ()) -> Dict[str, int]:
+        """대기 중인 작업의 순서를 알림 (started: 방금 실행을 시작해 대기열에서 빠진 작업 ID들)"""
+        positions = self._positions()
+        if self._on_position is None:
+            return positions
+        try:
+            for job_id in started:
+                self._on_position(job_id, None)
+            for job_id, position in positions.items():
+                self._on_position(job_id, position)
+        except Exception as e:
+            print(f"⚠️  대기 순서 갱신 실패: {e}")
+        return positions
@@ -0,0 +1,185 @@
+"""
+생성 작업 스케줄러
+요청마다 바로 생성을 시작하는 대신 우선순위 큐에 넣고, 정해진 수의 워커만 동시에 실행합니다.
+
+- 동시 실행 수 제한: CPU를 많이 쓰는 파이프라인끼리 코어를 나눠 쓰느라 모두 느려지는 것을 방지
+- 큐 크기 제한: 가득 차면 QueueFull(→ 429 + Retry-After)
+- 우선순위: interactive(미리보기 등 사용자가 기다리는 작업)가 batch(렌더링)보다 먼저 실행
+- 대기 순서: 순서가 바뀔 때마다 on_position 콜백으로 알림 (작업 상태에 기록)
+"""
+import asyncio
+import itertools
+import math
+import time
+from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+# 우선순위 이름 → 값 (작을수록 먼저 실행)
+PRIORITIES = {
+    "interactive": 0,
+    "batch": 1,
+}
+
+# 완료된 작업이 없을 때 Retry-After 계산에 쓰는 작업당 예상 시간 (초)
+DEFAULT_JOB_SECONDS = 30.0
+
+
+class QueueFull(Exception):
+    """대기열이 가득 참"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"대기열이 가득 찼습니다. {retry_after}초 후에 다시 시도하세요.")
+        self.retry_after = retry_after
+
+
+class JobScheduler:
+    """
+    asyncio 우선순위 큐 + 고정 개수 워커
+
+    사용법:
+        scheduler = JobScheduler(num_workers=2, max_queue=32)
+        await scheduler.start()                       # startup 이벤트에서
+        scheduler.submit(job_id, "interactive", process_fn, {"job_id": job_id, ...})
+        await scheduler.shutdown()                    # shutdown 이벤트에서
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 1,
+        max_queue: int = 32,
+        on_position: Optional[Callable[[str, Optional[int]], None]] = None
+    ):
+        if num_workers < 1:
+            raise ValueError("num_workers는 1 이상이어야 합니다.")
+        self.num_workers = num_workers
+        self.max_queue = max_queue
+        self._on_position = on_position
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers = []
+        self._counter = itertools.count()
+        # 대기 중인 작업 ID → 정렬 키 (priority, seq)
+        self._queued: Dict[str, Tuple[int, int]] = {}
+        # 한 번에 처리하는 작업 묶음 (대표 작업 ID → 함께 순서를 알릴 작업 ID들)
+        self._linked: Dict[str, Tuple[str, ...]] = {}
+        self._running = set()
+        # 최근 작업 소요 시간의 지수 이동 평균
+        self._avg_job_seconds: Optional[float] = None
+
+    async def start(self):
+        """워커 시작 (이벤트 루프 안에서 호출)"""
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"generation-worker-{i}")
+            for i in range(self.num_workers)
+        ]
+
+    def submit(
+        self,
+        job_id: str,
+        priority: str,
+        fn: Callable[..., Awaitable],
+        kwargs: Optional[Dict] = None,
+        linked_job_ids: Sequence[str] = ()
+    ) -> int:
+        """
+        작업을 대기열에 추가
+
+        Args:
+            job_id: 작업 ID
+            priority: PRIORITIES의 키
+            fn: 실행할 코루틴 함수 (fn(**kwargs))
+            kwargs: fn에 전달할 인자
+            linked_job_ids: 같은 실행에서 함께 처리되는 다른 작업 ID (대기 순서를 같이 알림)
+
+        Returns:
+            int: 대기 순서 (1부터)
+
+        Raises:
+            QueueFull: 대기열이 가득 참
+            ValueError: 알 수 없는 우선순위
+        """
+        if self._queue is None:
+            raise RuntimeError("스케줄러가 시작되지 않았습니다. start()를 먼저 호출하세요.")
+        if priority not in PRIORITIES:
+            raise ValueError(f"지원하지 않는 우선순위: {priority} (가능: {', '.join(PRIORITIES)})")
+        if self.is_full():
+            raise QueueFull(self.retry_after())
+
+        key = (PRIORITIES[priority], next(self._counter))
+        self._queued[job_id] = key
+        self._linked[job_id] = (job_id,) + tuple(linked_job_ids)
+        self._queue.put_nowait((key, job_id, fn, kwargs or {}))
+        self._publish_positions()
+        return self.position(job_id)
+
+    def is_full(self) -> bool:
+        return len(self._queued) >= self.max_queue
+
+    def position(self, job_id: str) -> Optional[int]:
+        """대기 순서 (1부터, 대기 중이 아니면 None)"""
+        key = self._queued.get(job_id)
+        if key is None:
+            return None
+        return 1 + sum(1 for other in self._queued.values() if other < key)
+
+    def retry_after(self) -> int:
+        """대기열이 빌 때까지 예상 시간 (초)"""
+        job_seconds = self._avg_job_seconds or DEFAULT_JOB_SECONDS
+        pending = len(self._queued) + len(self._running)
+        return max(1, math.ceil(job_seconds * pending / self.num_workers))
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.num_workers,
+            "running": len(self._running),
+            "queued": len(self._queued),
+            "max_queue": self.max_queue,
+            "avg_job_seconds": round(self._avg_job_seconds, 2) if self._avg_job_seconds else None,
+        }
+
+    async def shutdown(self):
+        """워커 종료 (대기 중인 작업은 실행하지 않음)"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _worker(self):
+        while True:
+            _, job_id, fn, kwargs = await self._queue.get()
+            self._queued.pop(job_id, None)
+            self._running.add(job_id)
+            self._publish_positions(started=self._linked.pop(job_id, (job_id,)))
+            start = time.perf_counter()
+            try:
+                await fn(**kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 파이프라인 함수가 작업 상태에 오류를 기록하므로 워커는 계속 진행
+                print(f"❌ 스케줄러 작업 오류 (job_id: {job_id}): {e}")
+            finally:
+                self._running.discard(job_id)
+                self._record_duration(time.perf_counter() - start)
+                self._queue.task_done()
+
+    def _record_duration(self, seconds: float):
+        if self._avg_job_seconds is None:
+            self._avg_job_seconds = seconds
+        else:
+            self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * seconds
+
+    def _publish_positions(self, started: Sequence[str] = ()):
+        """대기 중인 작업의 순서를 알림 (started: 방금 실행을 시작해 대기열에서 빠진 작업 ID들)"""
+        if self._on_position is None:
+            return
+        try:
+            for job_id in started:
+                self._on_position(job_id, None)
+            ordered = sorted(self._queued.items(), key=lambda item: item[1])
+            for position, (job_id, _) in enumerate(ordered, start=1):
+                for linked_id in self._linked.get(job_id, (job_id,)):
+                    self._on_position(linked_id, position)
+        except Exception as e:
+            print(f"⚠️  대기 순서 갱신 실패: {e}")
@@ -0,0 +1,541 @@
+"""
+생성 작업 저장소
+작업 상태와 결과 모션을 보관하고, TTL과 최대 작업 수/메모리 한도에 따라 오래된 작업을 정리합니다.
+
+결과 모션은 float32 배열로 저장합니다. (파이썬 리스트 대비 약 1/8 메모리)
+    7200프레임 × 22관절 × 3 → 리스트 약 15MB, float32 배열 약 1.9MB
+
+정리된 작업 ID는 일정 개수까지 기억해 두어 조회 시 JobExpired(→ 410)로 구분합니다.
+
+백엔드:
+    memory  - 프로세스 메모리 (기본값, 단일 API 프로세스)
+    sqlite  - 로컬 SQLite 파일 (WAL 모드). 같은 호스트의 여러 uvicorn 워커가 작업 상태를 공유
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# 정리된 작업 ID를 기억해 두는 최대 개수
+_MAX_TOMBSTONES = 10000
+
+# 더 이상 바뀌지 않는 작업 상태 (정리 대상)
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class JobNotFound(KeyError):
+    """존재하지 않는 작업"""
+
+
+class JobExpired(KeyError):
+    """TTL 또는 저장소 한도로 정리된 작업"""
+
+
+def compact_motion_data(motion_data: Dict) -> Dict:
+    """결과 모션의 'data'를 float32 배열로 변환 (리스트로 들어와도 처리)"""
+    compact = dict(motion_data)
+    compact["data"] = np.asarray(compact["data"], dtype=np.float32)
+    return compact
+
+
+def compact_source(source: Optional[Dict]) -> Optional[Dict]:
+    """변형/편집용 원본 모션을 float32 배열로 변환"""
+    if source is None:
+        return None
+    compact = dict(source)
+    compact["motion"] = np.asarray(compact["motion"], dtype=np.float32)
+    if compact.get("raw") is not None:
+        compact["raw"] = np.asarray(compact["raw"], dtype=np.float32)
+    return compact
+
+
+def _result_nbytes(motion_data: Optional[Dict], source: Optional[Dict]) -> int:
+    nbytes = 0
+    if motion_data is not None:
+        nbytes += motion_data["data"].nbytes
+    if source is not None:
+        nbytes += source["motion"].nbytes
+        if source.get("raw") is not None:
+            nbytes += source["raw"].nbytes
+    return nbytes
+
+
+class JobStore:
+    """
+    작업 저장소 인터페이스
+
+    작업 메타데이터(status, progress, message 등)는 get()으로, 결과 모션은 get_result()로,
+    변형/편집에 필요한 원본 모션과 생성 파라미터는 get_source()로 조회합니다.
+    메타데이터의 version은 작업이 바뀔 때마다 1씩 증가합니다. (롱 폴링/SSE에서 변경 감지)
+    """
+
+    def create(self, job_id: str, **fields):
+        """새 작업 등록"""
+        raise NotImplementedError
+
+    def update(self, job_id: str, **fields):
+        """작업 메타데이터 갱신"""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, motion_data: Dict, source: Optional[Dict] = None,
+                 params: Optional[Dict] = None, message: str = "안무 생성이 완료되었습니다."):
+        """작업을 완료 상태로 만들고 결과 저장"""
+        raise NotImplementedError
+
+    def fail(self, job_id: str, error: str):
+        """작업을 실패 상태로 기록"""
+        self.update(job_id, status="failed", message=f"생성 실패: {error}", error=error)
+
+    def get(self, job_id: str) -> Dict:
+        """작업 메타데이터 조회 (JobNotFound / JobExpired)"""
+        raise NotImplementedError
+
+    def get_result(self, job_id: str, start: Optional[int] = None, end: Optional[int] = None) -> Optional[Dict]:
+        """
+        결과 모션 조회 ('data'는 float32 배열, 완료 전이면 None)
+        start/end를 주면 'data'만 [start:end] 프레임 구간으로 잘라서 반환 ('frames'는 전체 프레임 수 유지)
+        """
+        raise NotImplementedError
+
+    def get_source(self, job_id: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """(원본 모션, 생성 파라미터) 조회 (완료 전이면 (None, None))"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        """저장소 사용량"""
+        raise NotImplementedError
+
+
+class InMemoryJobStore(JobStore):
+    """
+    프로세스 메모리 작업 저장소
+
+    완료/실패 후 ttl_seconds가 지난 작업과, 작업 수(max_jobs) 또는 결과 크기(max_bytes) 한도를
+    넘었을 때 가장 먼저 끝난 작업부터 정리합니다. 진행 중인 작업은 정리하지 않습니다.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_jobs: int = 200, max_bytes: int = 512 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self._jobs: Dict[str, Dict] = {}
+        # 끝난 작업 ID → 종료 시각 (먼저 끝난 순서)
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._tombstones: "OrderedDict[str, None]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.RLock()
+
+    def create(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id] = {
+                "meta": {**fields, "version": 1},
+                "result": None,
+                "source": None,
+                "params": None,
+                "nbytes": 0,
+            }
+            self._evict()
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._lookup(job_id)
+            job["meta"].update(fields)
+            job["meta"]["version"] += 1
+            if fields.get("status") in FINISHED_STATUSES:
+                self._mark_finished(job_id)
+
+    def complete(self, job_id: str, motion_data: Dict, source: Optional[Dict] = None,
+                 params: Optional[Dict] = None, message: str = "안무 생성이 완료되었습니다."):
+        motion_data = compact_motion_data(motion_data)
+        source = compact_source(source)
+        nbytes = _result_nbytes(motion_data, source)
+        with self._lock:
+            job = self._lookup(job_id)
+            self._nbytes += nbytes - job["nbytes"]
+            job.update(result=motion_data, source=source, params=params, nbytes=nbytes)
+            job["meta"].update(status="completed", progress=100, message=message)
+            job["meta"]["version"] += 1
+            self._mark_finished(job_id)
+
+    def get(self, job_id: str) -> Dict:
+        with self._lock:
+            self._evict()
+            return dict(self._lookup(job_id)["meta"])
+
+    def get_result(self, job_id: str, start: Optional[int] = None, end: Optional[int] = None) -> Optional[Dict]:
+        with self._lock:
+            result = self._lookup(job_id)["result"]
+        if result is None or (start is None and end is None):
+            return result
+        return {**result, "data": result["data"][start:end]}
+
+    def get_source(self, job_id: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        with self._lock:
+            job = self._lookup(job_id)
+            return job["source"], job["params"]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "jobs": len(self._jobs),
+                "finished_jobs": len(self._finished),
+                "result_bytes": self._nbytes,
+                "max_jobs": self.max_jobs,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+    def _lookup(self, job_id: str) -> Dict:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        if job_id in self._tombstones:
+            raise JobExpired(job_id)
+        raise JobNotFound(job_id)
+
+    def _mark_finished(self, job_id: str):
+        self._finished[job_id] = time.monotonic()
+        self._finished.move_to_end(job_id)
+        self._evict()
+
+    def _evict(self):
+        """TTL이 지난 작업 → 작업 수/메모리 한도를 넘는 만큼 먼저 끝난 작업 순으로 정리"""
+        now = time.monotonic()
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            expired = now - finished_at > self.ttl_seconds
+            over_limit = len(self._jobs) > self.max_jobs or self._nbytes > self.max_bytes
+            if not (expired or over_limit):
+                break
+            self._remove(job_id)
+
+    def _remove(self, job_id: str):
+        self._finished.pop(job_id, None)
+        job = self._jobs.pop(job_id, None)
+        if job is not None:
+            self._nbytes -= job["nbytes"]
+        self._tombstones[job_id] = None
+        while len(self._tombstones) > _MAX_TOMBSTONES:
+            self._tombstones.popitem(last=False)
+
+
+# SQLite 작업 테이블에 컬럼으로 저장하는 메타데이터 (나머지는 extra JSON)
+_META_COLUMNS = ("status", "progress", "message", "created_at", "version")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    progress    INTEGER NOT NULL DEFAULT 0,
+    message     TEXT,
+    created_at  TEXT,
+    version     INTEGER NOT NULL DEFAULT 1,
+    extra       TEXT NOT NULL DEFAULT '{}',
+    finished_at REAL,
+    nbytes      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at);
+CREATE TABLE IF NOT EXISTS results (
+    job_id       TEXT PRIMARY KEY REFERENCES jobs (job_id) ON DELETE CASCADE,
+    motion_meta  TEXT NOT NULL,
+    data         BLOB NOT NULL,
+    data_shape   TEXT NOT NULL,
+    source_fps   REAL,
+    source       BLOB,
+    source_shape TEXT,
+    raw          BLOB,
+    raw_shape    TEXT,
+    params       TEXT
+);
+CREATE TABLE IF NOT EXISTS tombstones (
+    job_id     TEXT PRIMARY KEY,
+    expired_at REAL NOT NULL
+);
+"""
+
+
+def json_default(value):
+    """numpy 값이 섞인 오디오 분석 결과 등을 JSON으로 저장"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"JSON으로 변환할 수 없는 값: {type(value)}")
+
+
+def _to_blob(array: Optional[np.ndarray]):
+    """배열 → (little-endian float32 바이트, shape JSON)"""
+    if array is None:
+        return None, None
+    array = np.ascontiguousarray(array, dtype="<f4")
+    return array.tobytes(), json.dumps(array.shape)
+
+
+def _from_blob(blob: Optional[bytes], shape: Optional[str]) -> Optional[np.ndarray]:
+    if blob is None:
+        return None
+    return np.frombuffer(blob, dtype="<f4").reshape(json.loads(shape))
+
+
+class SQLiteDatabase:
+    """
+    WAL 모드 SQLite 파일 접근 (스레드마다 연결 하나)
+    작업 저장소와 작업 대기열(job_queue.SQLiteJobQueue)이 같은 파일을 함께 사용할 수 있습니다.
+    """
+
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(schema)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """쓰기 트랜잭션 (BEGIN IMMEDIATE로 시작해 다른 프로세스와의 쓰기 충돌을 락 대기로 처리)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class SQLiteJobStore(SQLiteDatabase, JobStore):
+    """
+    SQLite 작업 저장소 (WAL 모드)
+
+    메타데이터는 jobs 테이블, 결과/원본 모션은 results 테이블에 float32 BLOB으로 저장합니다.
+    WAL 모드라 여러 프로세스가 동시에 읽는 동안에도 쓰기가 가능하며, 외부 서비스 없이
+    같은 호스트의 API 워커들이 작업 상태를 공유합니다. 연결은 스레드마다 하나씩 사용합니다.
+    정리 규칙은 InMemoryJobStore와 같습니다. (종료 시각은 프로세스 간 공유를 위해 wall clock)
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 3600, max_jobs: int = 200,
+                 max_bytes: int = 512 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        super().__init__(path, _SCHEMA)
+        # version 컬럼이 없던 이전 파일
+        conn = self._connection()
+        if "version" not in {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    def create(self, job_id: str, **fields):
+        columns, extra = self._split(fields)
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, status, progress, message, created_at, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, columns.get("status", "pending"), columns.get("progress", 0),
+                 columns.get("message"), columns.get("created_at"), json.dumps(extra, default=json_default)),
+            )
+            self._evict(conn)
+
+    def update(self, job_id: str, **fields):
+        columns, extra = self._split(fields)
+        finished = fields.get("status") in FINISHED_STATUSES
+        with self._transaction() as conn:
+            row = self._lookup(conn, job_id, "extra")
+            assignments = [f"{name} = ?" for name in columns] + ["version = version + 1"]
+            values = list(columns.values())
+            if extra:
+                merged = json.loads(row["extra"])
+                merged.update(extra)
+                assignments.append("extra = ?")
+                values.append(json.dumps(merged, default=json_default))
+            if finished:
+                assignments.append("finished_at = ?")
+                values.append(time.time())
+            conn.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE job_id = ?", values + [job_id])
+            if finished:
+                self._evict(conn)
+
+    def complete(self, job_id: str, motion_data: Dict, source: Optional[Dict] = None,
+                 params: Optional[Dict] = None, message: str = "안무 생성이 완료되었습니다."):
+        motion_data = compact_motion_data(motion_data)
+        source = compact_source(source)
+        nbytes = _result_nbytes(motion_data, source)
+
+        motion_meta = {key: value for key, value in motion_data.items() if key != "data"}
+        data, data_shape = _to_blob(motion_data["data"])
+        source_blob, source_shape = _to_blob(source["motion"] if source else None)
+        raw_blob, raw_shape = _to_blob(source.get("raw") if source else None)
+
+        with self._transaction() as conn:
+            self._lookup(conn, job_id, "job_id")
+            conn.execute(
+                "INSERT OR REPLACE INTO results (job_id, motion_meta, data, data_shape, source_fps, "
+                "source, source_shape, raw, raw_shape, params) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(motion_meta, default=json_default), data, data_shape,
+                 source["fps"] if source else None, source_blob, source_shape, raw_blob, raw_shape,
+                 json.dumps(params, default=json_default) if params is not None else None),
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'completed', progress = 100, message = ?, finished_at = ?, nbytes = ?, "
+                "version = version + 1 "
+                "WHERE job_id = ?",
+                (message, time.time(), nbytes, job_id),
+            )
+            self._evict(conn)
+
+    def get(self, job_id: str) -> Dict:
+        conn = self._connection()
+        row = self._lookup(conn, job_id, "status, progress, message, created_at, version, extra, finished_at")
+        if row["finished_at"] is not None and time.time() - row["finished_at"] > self.ttl_seconds:
+            with self._transaction() as conn:
+                self._evict(conn)
+            raise JobExpired(job_id)
+        meta = json.loads(row["extra"])
+        meta.update({name: row[name] for name in _META_COLUMNS})
+        return meta
+
+    def get_result(self, job_id: str, start: Optional[int] = None, end: Optional[int] = None) -> Optional[Dict]:
+        conn = self._connection()
+        self._lookup(conn, job_id, "job_id")
+        if start is None and end is None:
+            row = conn.execute(
+                "SELECT motion_meta, data, data_shape FROM results WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            motion_data = json.loads(row["motion_meta"])
+            motion_data["data"] = _from_blob(row["data"], row["data_shape"])
+            return motion_data
+
+        row = conn.execute("SELECT motion_meta, data_shape FROM results WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        # 프레임이 첫 번째 축이므로 프레임 구간은 BLOB의 연속된 바이트 → 필요한 부분만 읽음
+        shape = json.loads(row["data_shape"])
+        start, end, _ = slice(start, end).indices(shape[0])
+        end = max(start, end)
+        frame_bytes = 4 * int(np.prod(shape[1:]))
+        data = conn.execute(
+            "SELECT substr(data, ?, ?) FROM results WHERE job_id = ?",
+            (start * frame_bytes + 1, (end - start) * frame_bytes, job_id)
+        ).fetchone()[0]
+        motion_data = json.loads(row["motion_meta"])
+        motion_data["data"] = _from_blob(bytes(data), json.dumps([end - start] + shape[1:]))
+        return motion_data
+
+    def get_source(self, job_id: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        conn = self._connection()
+        self._lookup(conn, job_id, "job_id")
+        row = conn.execute(
+            "SELECT source_fps, source, source_shape, raw, raw_shape, params FROM results WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None, None
+        params = json.loads(row["params"]) if row["params"] else None
+        if row["source"] is None:
+            return None, params
+        source = {
+            "motion": _from_blob(row["source"], row["source_shape"]),
+            "fps": row["source_fps"],
+            "raw": _from_blob(row["raw"], row["raw_shape"]),
+        }
+        return source, params
+
+    def stats(self) -> Dict:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT COUNT(*) AS jobs, COUNT(finished_at) AS finished_jobs, COALESCE(SUM(nbytes), 0) AS nbytes "
+            "FROM jobs"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "jobs": row["jobs"],
+            "finished_jobs": row["finished_jobs"],
+            "result_bytes": row["nbytes"],
+            "max_jobs": self.max_jobs,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    @staticmethod
+    def _split(fields: Dict) -> Tuple[Dict, Dict]:
+        columns = {name: fields[name] for name in _META_COLUMNS if name in fields}
+        extra = {name: value for name, value in fields.items() if name not in _META_COLUMNS}
+        return columns, extra
+
+    @staticmethod
+    def _lookup(conn: sqlite3.Connection, job_id: str, columns: str) -> sqlite3.Row:
+        row = conn.execute(f"SELECT {columns} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is not None:
+            return row
+        if conn.execute("SELECT 1 FROM tombstones WHERE job_id = ?", (job_id,)).fetchone():
+            raise JobExpired(job_id)
+        raise JobNotFound(job_id)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """TTL이 지난 작업 → 작업 수/메모리 한도를 넘는 만큼 먼저 끝난 작업 순으로 정리 (트랜잭션 안에서 호출)"""
+        now = time.time()
+        total = conn.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM jobs").fetchone()
+        jobs, nbytes = total[0], total[1]
+
+        expired = []
+        for row in conn.execute(
+            "SELECT job_id, finished_at, nbytes FROM jobs WHERE finished_at IS NOT NULL ORDER BY finished_at"
+        ):
+            over_limit = jobs > self.max_jobs or nbytes > self.max_bytes
+            if not (now - row["finished_at"] > self.ttl_seconds or over_limit):
+                break
+            expired.append(row["job_id"])
+            jobs -= 1
+            nbytes -= row["nbytes"]
+
+        if not expired:
+            return
+        conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in expired])
+        conn.executemany(
+            "INSERT OR REPLACE INTO tombstones (job_id, expired_at) VALUES (?, ?)",
+            [(job_id, now) for job_id in expired],
+        )
+        conn.execute(
+            "DELETE FROM tombstones WHERE rowid NOT IN "
+            "(SELECT rowid FROM tombstones ORDER BY expired_at DESC LIMIT ?)",
+            (_MAX_TOMBSTONES,),
+        )
+
+
+JOB_STORE_BACKENDS = ("memory", "sqlite")
+
+
+def create_job_store(backend: str = "memory", path: Optional[str] = None, **limits) -> JobStore:
+    """
+    설정에 맞는 작업 저장소 생성
+
+    Args:
+        backend: "memory" 또는 "sqlite"
+        path: SQLite 파일 경로 (sqlite만)
+        limits: ttl_seconds, max_jobs, max_bytes
+    """
+    if backend == "memory":
+        return InMemoryJobStore(**limits)
+    if backend == "sqlite":
+        return SQLiteJobStore(path or "jobs.sqlite3", **limits)
+    raise ValueError(f"지원하지 않는 작업 저장소: {backend} (가능: {', '.join(JOB_STORE_BACKENDS)})")
@@ -5,12 +5,17 @@ MDM 저장소의 코드를 사용하여 실제 모션 생성
 import os
 import sys
 import json
+import threading
+import time
 import torch
 import numpy as np
 from pathlib import Path
-from typing import Optional
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Tuple
 import inspect
 
+from .cpu_inference import resolve_cpu_profile, configure_threads, apply_cpu_profile
+
 # Python 3.12 호환성 패치 (chumpy)
 if not hasattr(inspect, 'getargspec'):
     inspect.getargspec = inspect.getfullargspec
@@ -33,35 +38,71 @@ mdm_repo_path = base_dir / "external" / "motion-diffusion-model"
 if mdm_repo_path.exists():
     sys.path.insert(0, str(mdm_repo_path))
 
+
+def _smpl_dir() -> Path:
+    """SMPL 에셋 디렉토리 (body_models/smpl 우선, 없으면 저장소 루트의 smpl)"""
+    for candidate in (mdm_repo_path / "body_models" / "smpl", mdm_repo_path / "smpl"):
+        if candidate.exists():
+            return candidate
+    return mdm_repo_path / "body_models" / "smpl"
+
+
+def _use_absolute_asset_paths():
+    """
+    MDM의 SMPL 경로 상수(utils.config)를 절대 경로로 교체
+    model.smpl이 임포트 시점에 이 값을 기본 인자로 사용하므로 모델 모듈보다 먼저 호출해야 합니다.
+    이렇게 하면 os.chdir 없이 어느 작업 디렉토리에서든 모델을 로드할 수 있습니다.
+    """
+    import utils.config as mdm_paths
+    
+    smpl_dir = _smpl_dir()
+    mdm_paths.SMPL_DATA_PATH = str(smpl_dir)
+    mdm_paths.SMPL_KINTREE_PATH = str(smpl_dir / "kintree_table.pkl")
+    mdm_paths.SMPL_MODEL_PATH = str(smpl_dir / "SMPL_NEUTRAL.pkl")
+    mdm_paths.JOINT_REGRESSOR_TRAIN_EXTRA = str(smpl_dir / "J_regressor_extra.npy")
+    if not os.path.exists(mdm_paths.SMPL_MODEL_PATH):
+        print(f"⚠️  SMPL 파일을 찾을 수 없습니다: {mdm_paths.SMPL_MODEL_PATH}")
+
+
 try:
+    _use_absolute_asset_paths()
     from utils.fixseed import fixseed
-    from utils.model_util import create_model_and_diffusion, load_saved_model
+    from utils.model_util import create_model_and_diffusion
     from utils import dist_util
     from utils.sampler_util import ClassifierFreeSampleModel
-    from data_loaders.get_data import get_dataset_loader
+    from data_loaders.get_data import get_dataset
     from data_loaders.tensors import collate
+    from .checkpoint_io import find_weights_path, load_checkpoint_state_dict, load_model_weights
     MDM_AVAILABLE = True
 except ImportError as e:
     print(f"⚠️  MDM 모듈을 임포트할 수 없습니다: {e}")
     print("   MDM 저장소의 의존성을 설치해야 합니다.")
     MDM_AVAILABLE = False
 
+# MDM 모델 생성은 전역 상태(dist_util, utils.config)를 사용하므로 한 번에 하나씩만 로드
+_load_lock = threading.Lock()
+
 
 class MDMIntegration:
     """
     실제 MDM 모델을 사용하여 모션을 생성합니다.
     """
     
-    def __init__(self, model_path: str, args_path: Optional[str] = None):
+    def __init__(self, model_path: str, args_path: Optional[str] = None, cpu_profile: Optional[dict] = None):
         """
         MDM 통합 초기화
         
         Args:
             model_path: 모델 체크포인트 경로 (.pt 파일)
             args_path: args.json 경로 (없으면 자동으로 찾음)
+            cpu_profile: CPU 추론 프로파일 (services/cpu_inference.py 참고)
         """
         self.model_path = model_path
         self.args_path = args_path or str(Path(model_path).parent / "args.json")
+        self.weights_path = None
+        self.cpu_profile = resolve_cpu_profile(cpu_profile)
+        self.cpu_profile_applied = None
+        self._swap_lock = threading.Lock()
         
         self.model = None
         self.diffusion = None
@@ -80,6 +121,13 @@ class MDMIntegration:
         device_id = 0 if torch.cuda.is_available() else -1
         dist_util.setup_dist(device=device_id)
         print(f"🔧 Using device: {self.device}")
+        
+        # CPU 스레드 수는 모델 로드(병렬 작업 시작) 전에 설정
+        if self.device.type == 'cpu':
+            configure_threads(
+                self.cpu_profile["intra_op_threads"],
+                self.cpu_profile["inter_op_threads"]
+            )
     
     def _load_args(self):
         """모델 args.json 로드"""
@@ -119,84 +167,87 @@ class MDMIntegration:
     
     def load_model(self) -> bool:
         """
-        MDM 모델 로드
+        MDM 모델 로드 (이미 로드된 경우 재로드)
+        
+        모든 에셋은 MDM 저장소 절대 경로로 로드하며 작업 디렉토리를 바꾸지 않으므로
+        요청을 처리하는 중에 백그라운드 스레드에서 호출해도 안전합니다.
         
         Returns:
             bool: 로드 성공 여부
         """
-        try:
-            abs_path = str(mdm_repo_path)
-            
-            # 작업 디렉토리를 MDM 저장소로 먼저 변경 (모든 상대 경로 문제 해결)
-            original_cwd = os.getcwd()
-            os.chdir(abs_path)
-            
+        # 모델은 지역 변수에 만든 뒤 마지막에 교체하므로 로드/재로드 중에도
+        # 기존 모델로 생성 요청을 계속 처리할 수 있습니다.
+        with _load_lock:
             try:
-                print("📥 데이터 로더 생성 중...")
-                
-                # SMPL 경로 확인 및 복사 (필요시)
-                smpl_src = os.path.join(abs_path, 'smpl')
-                smpl_dst = os.path.join(abs_path, 'body_models', 'smpl')
-                if os.path.exists(smpl_src) and not os.path.exists(smpl_dst):
-                    import shutil
-                    os.makedirs(os.path.dirname(smpl_dst), exist_ok=True)
-                    shutil.copytree(smpl_src, smpl_dst)
-                    print("✅ SMPL 파일 복사 완료")
-                
-                # SMPL 파일 존재 확인
-                smpl_path = os.path.join(abs_path, 'body_models', 'smpl', 'SMPL_NEUTRAL.pkl')
-                if not os.path.exists(smpl_path):
-                    # 절대 경로로도 확인
-                    if os.path.exists('./body_models/smpl/SMPL_NEUTRAL.pkl'):
-                        print("✅ SMPL 파일 확인됨 (상대 경로)")
-                    else:
-                        print(f"⚠️  SMPL 파일을 찾을 수 없습니다: {smpl_path}")
-                        print(f"   현재 디렉토리: {os.getcwd()}")
-                        print(f"   body_models/smpl 존재: {os.path.exists('./body_models/smpl')}")
+                print("📥 데이터셋 메타데이터 로드 중...")
+                data = self._build_data_handle()
                 
-                data = get_dataset_loader(
-                    name=self.args.dataset,
-                    batch_size=self.args.batch_size,
-                    num_frames=196,
-                    split='test',
-                    hml_mode='text_only'
-                )
-            
                 print("📥 모델 및 Diffusion 생성 중...")
-                self.model, self.diffusion = create_model_and_diffusion(self.args, data)
+                model, diffusion = create_model_and_diffusion(self.args, data)
                 
-                print(f"📥 체크포인트 로드 중: {self.model_path}")
-                load_saved_model(self.model, self.model_path, use_avg=self.args.use_ema)
+                # 변환된 safetensors가 있으면 mmap으로 로드 (scripts/convert_checkpoint.py)
+                weights_path = find_weights_path(self.model_path, use_ema=self.args.use_ema)
+                print(f"📥 체크포인트 로드 중: {weights_path}")
+                state_dict = load_checkpoint_state_dict(weights_path, use_ema=self.args.use_ema)
+                load_model_weights(model, state_dict)
                 
                 # Classifier-free guidance 설정
                 if self.args.guidance_param != 1:
-                    self.model = ClassifierFreeSampleModel(self.model)
+                    model = ClassifierFreeSampleModel(model)
+                
+                model.to(self.device)
+                model.eval()
+                
+                # CPU 추론 프로파일 (양자화, 컴파일)
+                cpu_profile_applied = None
+                if self.device.type == 'cpu':
+                    cpu_profile_applied = apply_cpu_profile(model, self.cpu_profile)
                 
-                self.model.to(self.device)
-                self.model.eval()
+                with self._swap_lock:
+                    self.model, self.diffusion = model, diffusion
+                    self.weights_path = weights_path
+                    self.cpu_profile_applied = cpu_profile_applied
                 
                 print("✅ MDM 모델 로드 완료")
                 return True
-            finally:
-                # 작업 디렉토리 복원
-                os.chdir(original_cwd)
-            
-        except Exception as e:
-            import traceback
-            print(f"❌ 모델 로드 실패: {e}")
-            traceback.print_exc()
-            # 작업 디렉토리 복원
-            if 'original_cwd' in locals():
-                os.chdir(original_cwd)
-            return False
+                
+            except Exception as e:
+                import traceback
+                print(f"❌ 모델 로드 실패: {e}")
+                traceback.print_exc()
+                return False
+    
+    def _build_data_handle(self):
+        """
+        create_model_and_diffusion에 넘길 데이터 핸들 생성
+        
+        모델 생성에는 data.dataset만 사용되므로 DataLoader 대신 데이터셋을
+        MDM 저장소 절대 경로(abs_path) 기준으로 직접 로드합니다.
+        """
+        if 'abs_path' in inspect.signature(get_dataset).parameters:
+            dataset = get_dataset(
+                name=self.args.dataset,
+                num_frames=196,
+                split='test',
+                hml_mode='text_only',
+                abs_path=str(mdm_repo_path)
+            )
+            return SimpleNamespace(dataset=dataset)
+        
+        # abs_path를 지원하지 않는 구버전 MDM은 데이터셋 경로가 cwd 기준이므로 로드하지 않음
+        # (텍스트 조건 모델은 num_actions 외에 데이터셋 정보를 사용하지 않음)
+        print("⚠️  MDM get_dataset이 abs_path를 지원하지 않아 데이터셋 없이 모델을 생성합니다.")
+        return SimpleNamespace(dataset=SimpleNamespace())
     
     def generate(
         self,
         caption: str,
         length: float = 10.0,
         guidance_scale: float = 2.5,
-        num_samples: int = 1
-    ) -> np.ndarray:
+        num_samples: int = 1,
+        step_callback: Optional[Callable[[int, int, float], None]] = None,
+        return_raw: bool = False
+    ):
         """
         텍스트 프롬프트로 모션 생성
         
@@ -205,97 +256,251 @@ class MDMIntegration:
             length: 모션 길이 (초)
             guidance_scale: 가이던스 스케일
             num_samples: 생성할 샘플 수
+            step_callback: 디노이징 스텝마다 (현재 스텝, 전체 스텝, 스텝 소요 시간(초))로 호출
+            return_raw: True면 (모션, 모델 특징 공간 샘플 [263, 1, frames]) 반환 (변형 생성용)
             
         Returns:
             np.ndarray: 모션 데이터 [frames, joints, features]
         """
-        if self.model is None:
+        # 재로드 중에도 일관된 모델로 생성하도록 현재 모델을 고정
+        with self._swap_lock:
+            model, diffusion = self.model, self.diffusion
+        if model is None:
             raise RuntimeError("모델이 로드되지 않았습니다. load_model()을 먼저 호출하세요.")
         
         try:
             fixseed(self.args.seed)
             
             # 프레임 수 계산
-            fps = 20.0 if self.args.dataset == 'humanml' else 12.5
+            fps = self.fps
             max_frames = 196 if self.args.dataset in ['kit', 'humanml'] else 60
             n_frames = min(max_frames, int(length * fps))
             
-            # 텍스트 설정
-            texts = [caption] * num_samples
-            
             # 모션 shape
-            motion_shape = (num_samples, self.model.njoints, self.model.nfeats, n_frames)
-            
-            # 모델 kwargs 생성
-            collate_args = [
-                {'inp': torch.zeros(n_frames), 'tokens': None, 'lengths': n_frames, 'text': txt}
-                for txt in texts
-            ]
-            _, model_kwargs = collate(collate_args)
-            model_kwargs['y'] = {
-                key: val.to(self.device) if torch.is_tensor(val) else val
-                for key, val in model_kwargs['y'].items()
-            }
-            
-            # Guidance scale 설정
-            if guidance_scale != 1:
-                model_kwargs['y']['scale'] = torch.ones(num_samples, device=self.device) * guidance_scale
-            
-            # 텍스트 임베딩 (한 번만 인코딩)
-            if 'text' in model_kwargs['y'].keys():
-                model_kwargs['y']['text_embed'] = self.model.encode_text(model_kwargs['y']['text'])
+            motion_shape = (num_samples, model.njoints, model.nfeats, n_frames)
+            model_kwargs = self._build_model_kwargs(model, [caption] * num_samples, n_frames, guidance_scale)
             
             print(f"🎬 모션 생성 중... (길이: {length}초, 프레임: {n_frames})")
             
             # 샘플링
-            sample = self.diffusion.p_sample_loop(
-                self.model,
-                motion_shape,
-                clip_denoised=False,
-                model_kwargs=model_kwargs,
-                skip_timesteps=0,
-                init_image=None,
-                progress=True,
-                dump_steps=None,
-                noise=None,
-                const_noise=False,
-            )
+            sample = self._sample(model, diffusion, motion_shape, model_kwargs, step_callback=step_callback)
             
             # 첫 번째 샘플만 반환
-            # HumanML3D 벡터 형식 (263차원)을 관절 회전 형식으로 변환
-            motion = sample[0].cpu().numpy()  # 실제 형식 확인 필요
-            
-            # 형식 확인 및 변환
-            print(f"🔍 원본 모션 shape: {motion.shape}")
-            
-            # [features, 1, frames] 형식 -> [frames, joints, 3]
-            if len(motion.shape) == 3:
-                if motion.shape[0] == 263 and motion.shape[1] == 1:
-                    # [263, 1, frames] -> [frames, 263] -> [frames, 22, 3]
-                    motion = motion.transpose(2, 0, 1)  # [frames, 263, 1]
-                    if motion.shape[2] == 1:
-                        motion = motion.squeeze(2)  # [frames, 263]
-                    # 263차원에서 처음 66개 값이 관절 회전 (22관절 * 3)
-                    motion = motion[:, :66].reshape(motion.shape[0], 22, 3)
-                    print(f"✅ 모션 생성 완료 (변환됨): {motion.shape}")
-                elif motion.shape[2] == 1:
-                    # [frames, features, 1] -> [frames, features]
-                    motion = motion.squeeze(2)
-                    if motion.shape[1] == 263:
-                        motion = motion[:, :66].reshape(motion.shape[0], 22, 3)
-                        print(f"✅ 모션 생성 완료 (변환됨): {motion.shape}")
-            elif len(motion.shape) == 2:
-                # [frames, features] 형식
-                if motion.shape[1] == 263:
-                    motion = motion[:, :66].reshape(motion.shape[0], 22, 3)
-                    print(f"✅ 모션 생성 완료 (변환됨): {motion.shape}")
-            
+            raw = sample[0].cpu().numpy()
+            motion = self._features_to_joints(raw)
+            if return_raw:
+                return motion, raw.astype(np.float32)
             return motion
             
         except Exception as e:
             print(f"❌ 모션 생성 실패: {e}")
             raise
     
+    def vary(
+        self,
+        raw_motion: np.ndarray,
+        caption: str,
+        strength: float = 0.3,
+        num_variants: int = 1,
+        guidance_scale: float = 2.5,
+        step_callback: Optional[Callable[[int, int, float], None]] = None,
+        seed: Optional[int] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        생성된 샘플을 부분적으로 다시 노이즈를 입혀 변형 생성
+        strength 비율의 타임스텝까지만 노이즈를 입히고(q_sample) 남은 스텝만 디노이징하므로
+        비용은 전체 샘플링의 약 strength배입니다. 변형들은 한 배치로 샘플링합니다.
+        
+        Args:
+            raw_motion: generate(return_raw=True)가 반환한 모델 특징 공간 샘플 [263, 1, frames]
+            caption: 텍스트 프롬프트
+            strength: 재노이징 깊이 (0-1, 클수록 원본과 달라짐)
+            num_variants: 생성할 변형 수
+            guidance_scale: 가이던스 스케일
+            step_callback: 디노이징 스텝마다 (현재 스텝, 전체 스텝, 스텝 소요 시간(초))로 호출
+            seed: 난수 시드 (None이면 매번 다른 변형)
+            
+        Returns:
+            [(모션 [frames, joints, 3], 모델 특징 공간 샘플), ...]
+        """
+        with self._swap_lock:
+            model, diffusion = self.model, self.diffusion
+        if model is None:
+            raise RuntimeError("모델이 로드되지 않았습니다. load_model()을 먼저 호출하세요.")
+        
+        if seed is not None:
+            fixseed(seed)
+        
+        raw_motion = np.asarray(raw_motion, dtype=np.float32)
+        n_frames = raw_motion.shape[-1]
+        init_image = torch.from_numpy(raw_motion).to(self.device).unsqueeze(0).repeat(num_variants, 1, 1, 1)
+        
+        # 남길 디노이징 스텝 수 (최소 1)
+        steps = min(diffusion.num_timesteps, max(1, int(round(diffusion.num_timesteps * strength))))
+        skip_timesteps = diffusion.num_timesteps - steps
+        
+        model_kwargs = self._build_model_kwargs(model, [caption] * num_variants, n_frames, guidance_scale)
+        
+        print(f"🎲 변형 생성 중... (변형: {num_variants}개, 디노이징 {steps}/{diffusion.num_timesteps} 스텝)")
+        sample = self._sample(
+            model, diffusion, tuple(init_image.shape), model_kwargs,
+            skip_timesteps=skip_timesteps, init_image=init_image, step_callback=step_callback
+        )
+        raws = sample.cpu().numpy().astype(np.float32)
+        return [(self._features_to_joints(raw), raw) for raw in raws]
+    
+    def inpaint(
+        self,
+        raw_motion: np.ndarray,
+        caption: str,
+        start_frame: int,
+        end_frame: int,
+        context_frames: int = 20,
+        guidance_scale: float = 2.5,
+        step_callback: Optional[Callable[[int, int, float], None]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        샘플의 [start_frame, end_frame) 구간만 다시 생성 (마스크 인페인팅)
+        편집 구간 앞뒤 context_frames를 고정 프레임으로 붙인 창만 샘플링하므로
+        비용은 곡 길이가 아니라 편집 길이에 비례합니다.
+        
+        Args:
+            raw_motion: 모델 특징 공간 샘플 [263, 1, frames]
+            caption: 편집 구간 텍스트 프롬프트
+            start_frame, end_frame: 편집 구간 (모델 프레임 레이트 기준)
+            context_frames: 앞뒤로 고정해 둘 프레임 수 (창이 최대 길이를 넘으면 줄어듦)
+            guidance_scale: 가이던스 스케일
+            step_callback: 디노이징 스텝마다 (현재 스텝, 전체 스텝, 스텝 소요 시간(초))로 호출
+            
+        Returns:
+            (편집 구간 모션 [end-start, joints, 3], 편집 구간 특징 공간 샘플 [263, 1, end-start])
+        """
+        with self._swap_lock:
+            model, diffusion = self.model, self.diffusion
+        if model is None:
+            raise RuntimeError("모델이 로드되지 않았습니다. load_model()을 먼저 호출하세요.")
+        
+        raw_motion = np.asarray(raw_motion, dtype=np.float32)
+        total_frames = raw_motion.shape[-1]
+        max_frames = 196 if self.args.dataset in ['kit', 'humanml'] else 60
+        edit_frames = end_frame - start_frame
+        if not 0 <= start_frame < end_frame <= total_frames:
+            raise ValueError(f"잘못된 편집 구간: {start_frame}-{end_frame} (전체 {total_frames}프레임)")
+        # 생성 샘플이 max_frames로 잘리므로 정상 경로에서는 편집 구간이 이보다 길 수 없음
+        if edit_frames > max_frames:
+            raise ValueError(f"편집 구간이 너무 깁니다: {edit_frames}프레임 (최대 {max_frames}프레임)")
+        
+        # 편집 구간 + 앞뒤 고정 프레임 창
+        context_frames = max(0, min(context_frames, (max_frames - edit_frames) // 2))
+        window_start = max(0, start_frame - context_frames)
+        window_end = min(total_frames, end_frame + context_frames)
+        window = torch.from_numpy(np.ascontiguousarray(raw_motion[..., window_start:window_end]))
+        window = window.to(self.device).unsqueeze(0)
+        
+        # True인 프레임은 원본 유지 (MDM inpainting_mask 규약)
+        edit_slice = slice(start_frame - window_start, end_frame - window_start)
+        inpainting_mask = torch.ones_like(window, dtype=torch.bool)
+        inpainting_mask[..., edit_slice] = False
+        
+        model_kwargs = self._build_model_kwargs(model, [caption], window.shape[-1], guidance_scale)
+        model_kwargs['y']['inpainted_motion'] = window
+        model_kwargs['y']['inpainting_mask'] = inpainting_mask
+        
+        print(f"✂️  구간 편집 중... (편집: {start_frame}-{end_frame}프레임, 창: {window_start}-{window_end}프레임)")
+        sample = self._sample(model, diffusion, tuple(window.shape), model_kwargs, step_callback=step_callback)
+        raw_edit = sample[0].cpu().numpy().astype(np.float32)[..., edit_slice]
+        return self._features_to_joints(raw_edit), raw_edit
+    
+    def _build_model_kwargs(self, model, texts: List[str], n_frames: int, guidance_scale: float) -> dict:
+        """텍스트 조건, 가이던스 스케일, 텍스트 임베딩을 담은 model_kwargs 생성"""
+        collate_args = [
+            {'inp': torch.zeros(n_frames), 'tokens': None, 'lengths': n_frames, 'text': txt}
+            for txt in texts
+        ]
+        _, model_kwargs = collate(collate_args)
+        model_kwargs['y'] = {
+            key: val.to(self.device) if torch.is_tensor(val) else val
+            for key, val in model_kwargs['y'].items()
+        }
+        
+        # Guidance scale 설정
+        if guidance_scale != 1:
+            model_kwargs['y']['scale'] = torch.ones(len(texts), device=self.device) * guidance_scale
+        
+        # 텍스트 임베딩 (한 번만 인코딩)
+        if 'text' in model_kwargs['y'].keys():
+            model_kwargs['y']['text_embed'] = model.encode_text(model_kwargs['y']['text'])
+        return model_kwargs
+    
+    @staticmethod
+    def _features_to_joints(motion: np.ndarray) -> np.ndarray:
+        """HumanML3D 벡터 형식 (263차원) 샘플을 [frames, 22, 3] 형식으로 변환"""
+        print(f"🔍 원본 모션 shape: {motion.shape}")
+        
+        # [features, 1, frames] 형식 -> [frames, joints, 3]
+        if len(motion.shape) == 3:
+            if motion.shape[0] == 263 and motion.shape[1] == 1:
+                # [263, 1, frames] -> [frames, 263] -> [frames, 22, 3]
+                motion = motion.transpose(2, 0, 1)  # [frames, 263, 1]
+                if motion.shape[2] == 1:
+                    motion = motion.squeeze(2)  # [frames, 263]
+                # 263차원에서 처음 66개 값이 관절 회전 (22관절 * 3)
+                motion = motion[:, :66].reshape(motion.shape[0], 22, 3)
+                print(f"✅ 모션 생성 완료 (변환됨): {motion.shape}")
+            elif motion.shape[2] == 1:
+                # [frames, features, 1] -> [frames, features]
+                motion = motion.squeeze(2)
+                if motion.shape[1] == 263:
+                    motion = motion[:, :66].reshape(motion.shape[0], 22, 3)
+                    print(f"✅ 모션 생성 완료 (변환됨): {motion.shape}")
+        elif len(motion.shape) == 2:
+            # [frames, features] 형식
+            if motion.shape[1] == 263:
+                motion = motion[:, :66].reshape(motion.shape[0], 22, 3)
+                print(f"✅ 모션 생성 완료 (변환됨): {motion.shape}")
+        
+        return motion
+    
+    @staticmethod
+    def _sample(
+        model,
+        diffusion,
+        motion_shape: tuple,
+        model_kwargs: dict,
+        skip_timesteps: int = 0,
+        init_image=None,
+        step_callback: Optional[Callable[[int, int, float], None]] = None
+    ):
+        """
+        p_sample_loop_progressive로 디노이징하면서 스텝마다 step_callback 호출
+        (p_sample_loop와 같은 결과, 콜백이 없으면 tqdm 진행 표시)
+        """
+        total_steps = diffusion.num_timesteps - skip_timesteps
+        sample = None
+        step_start = time.perf_counter()
+        for step, out in enumerate(diffusion.p_sample_loop_progressive(
+            model,
+            motion_shape,
+            clip_denoised=False,
+            model_kwargs=model_kwargs,
+            skip_timesteps=skip_timesteps,
+            init_image=init_image,
+            progress=step_callback is None,
+            noise=None,
+            const_noise=False,
+        ), start=1):
+            sample = out["sample"]
+            if step_callback is not None:
+                now = time.perf_counter()
+                step_callback(step, total_steps, now - step_start)
+                step_start = now
+        return sample
+    
+    @property
+    def fps(self) -> float:
+        """모델이 생성하는 모션의 프레임 레이트 (HumanML3D 20fps, KIT 12.5fps)"""
+        return 20.0 if self.args.dataset == 'humanml' else 12.5
+    
     def is_loaded(self) -> bool:
         """모델이 로드되었는지 확인"""
         return self.model is not None
@@ -315,7 +520,7 @@ def get_mdm_integration() -> Optional[MDMIntegration]:
                     config = json.load(f)
                 model_path = config.get("model_path")
                 if model_path and os.path.exists(model_path):
-                    _mdm_integration = MDMIntegration(model_path)
+                    _mdm_integration = MDMIntegration(model_path, cpu_profile=config.get("cpu_profile"))
                     if _mdm_integration.load_model():
                         return _mdm_integration
         except Exception as e:
@@ -7,7 +7,7 @@ import sys
 import json
 import numpy as np
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 # MDM 저장소 경로 추가
 base_dir = Path(__file__).parent.parent
@@ -16,14 +16,25 @@ mdm_repo_path = base_dir / "external" / "motion-diffusion-model"
 if mdm_repo_path.exists():
     sys.path.insert(0, str(mdm_repo_path))
 
-# 실제 MDM 통합 사용 시도
-try:
-    from .mdm_integration import MDMIntegration, get_mdm_integration, MDM_AVAILABLE
-    USE_REAL_MDM = MDM_AVAILABLE
-except ImportError:
-    USE_REAL_MDM = False
-    MDMIntegration = None
-    get_mdm_integration = None
+
+
+def _import_mdm_integration():
+    """
+    실제 MDM 통합 모듈 임포트
+    torch, MDM 저장소, NumPy/chumpy 호환성 패치는 이 함수가 처음 호출될 때 로드됩니다.
+    
+    Returns:
+        mdm_integration 모듈 (MDM을 사용할 수 없으면 None)
+    """
+    try:
+        from . import mdm_integration
+    except ImportError:
+        return None
+    return mdm_integration if mdm_integration.MDM_AVAILABLE else None
+
+
+# 모의 모드 모션의 프레임 레이트
+MOCK_FPS = 30
 
 
 class MDMLoader:
@@ -88,10 +99,14 @@ class MDMLoader:
                 return False
             
             # 실제 MDM 통합 사용 시도
-            if USE_REAL_MDM and MDMIntegration:
+            integration_module = _import_mdm_integration()
+            if integration_module is not None:
                 try:
                     print(f"📥 실제 MDM 모델 로드 시도: {model_path}")
-                    self.mdm_integration = MDMIntegration(model_path)
+                    self.mdm_integration = integration_module.MDMIntegration(
+                        model_path,
+                        cpu_profile=self.config.get("cpu_profile")
+                    )
                     if self.mdm_integration.load_model():
                         print("✅ 실제 MDM 모델 로드 완료")
                         return True
@@ -114,8 +129,10 @@ class MDMLoader:
         caption: str,
         length: float = 10.0,
         guidance_scale: float = 1.0,
-        num_samples: int = 1
-    ) -> np.ndarray:
+        num_samples: int = 1,
+        step_callback: Optional[Callable[[int, int, float], None]] = None,
+        return_raw: bool = False
+    ):
         """
         텍스트 프롬프트로 모션을 생성합니다.
         
@@ -124,6 +141,8 @@ class MDMLoader:
             length: 모션 길이 (초)
             guidance_scale: 가이던스 스케일
             num_samples: 생성할 샘플 수
+            step_callback: 디노이징 스텝마다 (현재 스텝, 전체 스텝, 스텝 소요 시간)로 호출 (실제 MDM만)
+            return_raw: True면 (모션, 모델 특징 공간 샘플) 반환 (모의 모드면 샘플은 None)
             
         Returns:
             np.ndarray: 모션 데이터 [frames, joints, 3]
@@ -136,7 +155,9 @@ class MDMLoader:
                     caption=caption,
                     length=length,
                     guidance_scale=guidance_scale,
-                    num_samples=num_samples
+                    num_samples=num_samples,
+                    step_callback=step_callback,
+                    return_raw=return_raw
                 )
                 return motion
             except Exception as e:
@@ -145,16 +166,77 @@ class MDMLoader:
         
         # 모의 모드
         print("⚠️  모의 모드로 모션 생성")
-        return self._generate_mock_motion(caption, length)
+        motion = self._generate_mock_motion(caption, length, fps=self.fps)
+        return (motion, None) if return_raw else motion
+    
+    def vary(
+        self,
+        raw_motion: np.ndarray,
+        caption: str,
+        strength: float = 0.3,
+        num_variants: int = 1,
+        guidance_scale: float = 1.0,
+        step_callback: Optional[Callable[[int, int, float], None]] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        MDM 샘플을 부분 재노이징하여 변형 생성 (실제 MDM이 로드된 경우만)
+        
+        Returns:
+            [(모션 [frames, joints, 3], 모델 특징 공간 샘플), ...]
+        """
+        if not self.is_loaded() or not getattr(self, 'mdm_integration', None):
+            raise RuntimeError("MDM 모델이 로드되지 않아 변형을 생성할 수 없습니다.")
+        return self.mdm_integration.vary(
+            raw_motion,
+            caption=caption,
+            strength=strength,
+            num_variants=num_variants,
+            guidance_scale=guidance_scale,
+            step_callback=step_callback
+        )
+    
+    def inpaint(
+        self,
+        raw_motion: np.ndarray,
+        caption: str,
+        start_frame: int,
+        end_frame: int,
+        context_frames: int = 20,
+        guidance_scale: float = 1.0,
+        step_callback: Optional[Callable[[int, int, float], None]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        MDM 샘플의 일부 구간만 인페인팅으로 다시 생성 (실제 MDM이 로드된 경우만)
+        
+        Returns:
+            (편집 구간 모션 [frames, joints, 3], 편집 구간 특징 공간 샘플)
+        """
+        if not self.is_loaded() or not getattr(self, 'mdm_integration', None):
+            raise RuntimeError("MDM 모델이 로드되지 않아 구간을 편집할 수 없습니다.")
+        return self.mdm_integration.inpaint(
+            raw_motion,
+            caption=caption,
+            start_frame=start_frame,
+            end_frame=end_frame,
+            context_frames=context_frames,
+            guidance_scale=guidance_scale,
+            step_callback=step_callback
+        )
+    
+    @property
+    def fps(self) -> float:
+        """generate()가 반환하는 모션의 프레임 레이트"""
+        if hasattr(self, 'mdm_integration') and self.mdm_integration and self.mdm_integration.is_loaded():
+            return self.mdm_integration.fps
+        return MOCK_FPS
     
-    def _generate_mock_motion(self, caption: str, length: float) -> np.ndarray:
+    def _generate_mock_motion(self, caption: str, length: float, fps: float = MOCK_FPS) -> np.ndarray:
         """
         모의 모션 데이터 생성 (테스트용)
         프롬프트에 따라 다른 모션 생성
         """
         import hashlib
         
-        fps = 30
         frames = int(length * fps)
         joints = 22  # SMPL 포맷
         
@@ -0,0 +1,81 @@
+"""
+모델 워밍업
+서버가 바로 요청을 받을 수 있도록 MDM 모델을 백그라운드 스레드에서 로드하고
+로딩 상태(loading, ready, degraded, failed)를 관리합니다.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+class ModelState:
+    """모델 로딩 상태"""
+    LOADING = "loading"    # 로드 중
+    READY = "ready"        # 실제 MDM 모델 사용 가능
+    DEGRADED = "degraded"  # 모델 없이 모의 모드로 동작
+    FAILED = "failed"      # 로드 중 오류 (모의 모드로 동작)
+
+
+class ModelWarmup:
+    """
+    백그라운드 모델 로더
+
+    load_fn은 실제 모델이 로드되면 True, 모의 모드로 동작하면 False를 반환해야 합니다.
+    """
+
+    def __init__(self, load_fn: Callable[[], bool]):
+        self._load_fn = load_fn
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.state = ModelState.LOADING
+        self.error: Optional[str] = None
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+    def start(self):
+        """로딩 스레드 시작 (이미 시작했으면 무시)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        self.started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        print("🔄 백그라운드 모델 로딩 시작...")
+        try:
+            loaded = self._load_fn()
+            self.state = ModelState.READY if loaded else ModelState.DEGRADED
+        except Exception as e:
+            self.error = str(e)
+            self.state = ModelState.FAILED
+            print(f"❌ 백그라운드 모델 로딩 실패: {e}")
+        finally:
+            self.load_seconds = round(time.perf_counter() - start, 2)
+            self.finished_at = datetime.now().isoformat()
+            self._done.set()
+        print(f"✅ 모델 로딩 종료: {self.state} ({self.load_seconds}초)")
+
+    def is_settled(self) -> bool:
+        """로딩이 끝났는지 (성공/모의/실패 무관)"""
+        return self._done.is_set()
+
+    def is_ready(self) -> bool:
+        """실제 모델 사용 가능 여부"""
+        return self.state == ModelState.READY
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """로딩이 끝날 때까지 대기. 시간 내에 끝나면 True"""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict:
+        """상태 요약 (/health, /ready 응답용)"""
+        return {
+            "state": self.state,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "load_seconds": self.load_seconds,
+        }
@@ -0,0 +1,291 @@
+"""
+모션 결과 인코딩
+결과 모션(float32 [frames, joints, 3])을 전송 형식으로 변환합니다.
+
+- json: {"data": [[[x, y, z], ...], ...], ...} (orjson이 배열을 직접 인코딩, precision으로 소수 자릿수 제한)
+- f32:  16바이트 헤더 + little-endian float32 배열 (브라우저에서 파싱 없이 Float32Array로 사용)
+        헤더: magic "KPM1"(4바이트) | frames(uint32) | joints(uint32) | fps(float32), 모두 little-endian
+- npy:  NumPy .npy (np.load로 바로 읽음)
+- q16:  채널(관절 × xyz)마다 scale/offset으로 양자화한 int16 배열 (선택적으로 프레임 간 delta)
+        헤더: magic "KPQ1" | frames(uint32) | joints(uint32) | fps(float32) | flags(uint32, bit0: delta)
+        이어서 scale float32[C], offset float32[C], 데이터 int16[frames][C] (C = joints × 3)
+        복원: x = offset + q × scale, 최대 오차는 채널별 scale / 2 = (max - min) / 131068 (+ float32 반올림)
+
+형식은 결과 조회 API의 format 파라미터 또는 Accept 헤더로 선택합니다.
+응답 본문은 Accept-Encoding에 따라 gzip 또는 zstd(zstandard 설치 시)로 압축할 수 있습니다.
+"""
+import gzip
+import io
+import json
+import struct
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    # 없으면 표준 json + tolist()로 인코딩 (느림)
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    # 선택 의존성: 없으면 gzip만 사용
+    zstandard = None
+
+# 형식 → 미디어 타입
+RESULT_MEDIA_TYPES = {
+    "json": "application/json",
+    "f32": "application/octet-stream",
+    "npy": "application/x-npy",
+    "q16": "application/vnd.kpop-motion.q16",
+}
+
+F32_MAGIC = b"KPM1"
+# magic, frames, joints, fps (16바이트 → 뒤따르는 float32 데이터가 4바이트 정렬됨)
+F32_HEADER = struct.Struct("<4sIIf")
+
+Q16_MAGIC = b"KPQ1"
+# magic, frames, joints, fps, flags (20바이트)
+Q16_HEADER = struct.Struct("<4sIIfI")
+Q16_DELTA = 1
+# int16 양자화 단계 수 (-32767 ~ 32767)
+_Q16_STEPS = 65534
+
+# 이보다 작은 본문은 압축하지 않음 (바이트)
+MIN_COMPRESS_BYTES = 1024
+
+
+def negotiate_format(format: Optional[str], accept: Optional[str]) -> Optional[str]:
+    """
+    응답 형식 선택
+
+    Args:
+        format: 명시적으로 요청한 형식 (RESULT_MEDIA_TYPES의 키, 있으면 Accept보다 우선)
+        accept: Accept 헤더
+
+    Returns:
+        str: 형식 이름 (Accept에 지원하는 타입이 없으면 None, 모르는 format이면 ValueError)
+    """
+    if format:
+        if format not in RESULT_MEDIA_TYPES:
+            raise ValueError(f"지원하지 않는 형식: {format} (가능: {', '.join(RESULT_MEDIA_TYPES)})")
+        return format
+    if not accept:
+        return "json"
+
+    # q 값이 높은 순서, 같으면 나열 순서
+    candidates = []
+    for order, item in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            candidates.append((-quality, order, media_type.lower()))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in ("*/*", "application/*"):
+            return "json"
+        for name, supported in RESULT_MEDIA_TYPES.items():
+            if media_type == supported:
+                return name
+    return None
+
+
+def _as_f32(data: np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(data, dtype="<f4")
+
+
+def _buffer(array: np.ndarray):
+    """연속 배열의 바이트 버퍼 (복사 없이)"""
+    return memoryview(array).cast("B") if array.size else b""
+
+
+def encode_f32(data: np.ndarray, fps: float) -> bytes:
+    """[frames, joints, 3] 모션 → 헤더 + float32 바이트 (배열 버퍼를 그대로 복사)"""
+    data = _as_f32(data)
+    header = F32_HEADER.pack(F32_MAGIC, data.shape[0], data.shape[1], fps)
+    return b"".join((header, _buffer(data)))
+
+
+def decode_f32(payload: bytes) -> np.ndarray:
+    """encode_f32의 역변환 ([frames, joints, 3] float32)"""
+    magic, frames, joints, _ = F32_HEADER.unpack_from(payload)
+    if magic != F32_MAGIC:
+        raise ValueError("모션 데이터 형식이 아닙니다.")
+    return np.frombuffer(payload, dtype="<f4", offset=F32_HEADER.size).reshape(frames, joints, 3)
+
+
+def encode_npy(data: np.ndarray) -> bytes:
+    """모션 → .npy 바이트"""
+    buffer = io.BytesIO()
+    np.save(buffer, _as_f32(data), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _channels(data: np.ndarray) -> np.ndarray:
+    """[frames, joints, 3] → [frames, joints × 3] float32"""
+    data = np.asarray(data, dtype=np.float32)
+    return data.reshape(data.shape[0], int(np.prod(data.shape[1:])))
+
+
+def quantize(data: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    [frames, joints, 3] 모션을 채널별 int16으로 양자화
+
+    Returns:
+        (q int16 [frames, C], scale float32 [C], offset float32 [C]) - x ≈ offset + q × scale
+    """
+    flat = _channels(data)
+    if flat.shape[0] == 0:
+        zeros = np.zeros(flat.shape[1], dtype=np.float32)
+        return np.zeros(flat.shape, dtype=np.int16), zeros + 1, zeros
+    low, high = flat.min(axis=0), flat.max(axis=0)
+    offset = ((low + high) / 2).astype(np.float32)
+    scale = ((high - low) / _Q16_STEPS).astype(np.float32)
+    # 값이 일정한 채널은 0으로만 표현
+    scale[scale == 0] = 1.0
+    q = np.rint((flat - offset) / scale)
+    return np.clip(q, -32767, 32767).astype(np.int16), scale, offset
+
+
+def max_quantization_error(data: np.ndarray) -> float:
+    """
+    q16 인코딩의 최대 절대 오차
+    양자화 오차(채널 값 범위 중 가장 넓은 것 / 131068) + float32 복원 시 반올림 오차
+    """
+    flat = _channels(data)
+    if flat.size == 0:
+        return 0.0
+    quantization = (flat.max(axis=0) - flat.min(axis=0)).max() / _Q16_STEPS / 2
+    rounding = 2 * np.abs(flat).max() * np.finfo(np.float32).eps
+    return float(quantization + rounding)
+
+
+def encode_q16(data: np.ndarray, fps: float, delta: bool = False) -> bytes:
+    """
+    [frames, joints, 3] 모션 → q16 바이트
+    delta=True면 첫 프레임 이후는 이전 프레임과의 차이(int16 wraparound)를 저장해 압축률을 높임 (무손실)
+    """
+    q, scale, offset = quantize(data)
+    if delta and q.shape[0] > 1:
+        # int16 뺄셈은 2^16으로 wrap되므로 누적합으로 정확히 복원됨
+        q = np.concatenate([q[:1], np.diff(q, axis=0)])
+    header = Q16_HEADER.pack(Q16_MAGIC, data.shape[0], data.shape[1], fps, Q16_DELTA if delta else 0)
+    return b"".join((
+        header,
+        scale.astype("<f4").tobytes(),
+        offset.astype("<f4").tobytes(),
+        _buffer(np.ascontiguousarray(q, dtype="<i2")),
+    ))
+
+
+def decode_q16(payload: bytes) -> np.ndarray:
+    """encode_q16의 역변환 ([frames, joints, 3] float32)"""
+    magic, frames, joints, _, flags = Q16_HEADER.unpack_from(payload)
+    if magic != Q16_MAGIC:
+        raise ValueError("모션 데이터 형식이 아닙니다.")
+    channels = joints * 3
+    position = Q16_HEADER.size
+    scale = np.frombuffer(payload, dtype="<f4", count=channels, offset=position)
+    offset = np.frombuffer(payload, dtype="<f4", count=channels, offset=position + 4 * channels)
+    q = np.frombuffer(payload, dtype="<i2", offset=position + 8 * channels).reshape(frames, channels)
+    if flags & Q16_DELTA:
+        q = np.cumsum(q, axis=0, dtype=np.int16)
+    return (offset + q * scale).astype(np.float32).reshape(frames, joints, 3)
+
+
+def encode_motion(format: str, data: np.ndarray, fps: float, delta: bool = False) -> bytes:
+    """바이너리 형식(f32, npy, q16)으로 인코딩 (delta는 q16만)"""
+    if format == "f32":
+        return encode_f32(data, fps)
+    if format == "npy":
+        return encode_npy(data)
+    if format == "q16":
+        return encode_q16(data, fps, delta)
+    raise ValueError(f"바이너리 형식이 아닙니다: {format}")
+
+
+def encode_json(fields: Dict, data: np.ndarray, precision: Optional[int] = None) -> bytes:
+    """
+    결과 JSON 인코딩 ({**fields, "data": data})
+    orjson이 float32 배열을 리스트로 바꾸지 않고 직접 인코딩합니다. (float32 최단 표현)
+    precision을 주면 소수점 아래 자릿수로 반올림해 본문 크기를 줄입니다.
+    """
+    if orjson is not None:
+        data = np.ascontiguousarray(data, dtype=np.float32)
+        if precision is not None:
+            data = np.round(data, precision)
+        return orjson.dumps({**fields, "data": data}, option=orjson.OPT_SERIALIZE_NUMPY)
+    # 표준 json은 float64로 출력하므로 float64에서 반올림해야 자릿수가 줄어듦
+    data = np.asarray(data, dtype=np.float64)
+    if precision is not None:
+        data = np.round(data, precision)
+    return json.dumps({**fields, "data": data.tolist()}, ensure_ascii=False).encode("utf-8")
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> set:
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if any(param.replace(" ", "") in ("q=0", "q=0.0") for param in params):
+            continue
+        if coding:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def select_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Accept-Encoding에서 사용할 압축 방식 선택 (zstd 우선, 없으면 gzip, 둘 다 아니면 None)"""
+    accepted = _accepted_encodings(accept_encoding)
+    if zstandard is not None and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    본문 압축 (encoding은 select_encoding의 결과)
+
+    Returns:
+        (본문, Content-Encoding 값 또는 None)
+    """
+    if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    if encoding == "zstd":
+        compressed = zstandard.ZstdCompressor(level=3).compress(body)
+    else:
+        compressed = gzip.compress(body, compresslevel=6, mtime=0)
+    # 압축해도 줄지 않으면 (노이즈가 많은 데이터) 원본 그대로
+    if len(compressed) >= len(body):
+        return body, None
+    return compressed, encoding
+
+
+def compress_chunks(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """
+    조각 단위로 만들어지는 본문을 스트리밍 압축 (encoding은 select_encoding의 결과, None이면 그대로)
+    전체 본문을 모으지 않고 조각마다 압축해 내보냅니다.
+    """
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    else:
+        # wbits=31: gzip 헤더/트레일러
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
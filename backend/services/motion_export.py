@@ -0,0 +1,370 @@
+"""
+모션 내보내기
+결과 모션을 파일 형식(json, bvh, fbx, glb)으로 변환합니다.
+
+저장된 작업 결과(float32 [frames, joints, 3])와 클라이언트가 올린 모션
+(POST /api/export-motion, streaming_form으로 디코딩한 float32 배열)을 같은 export_motion_file로 변환합니다.
+BVH는 iter_bvh가 헤더 이후 프레임을 조각 단위로 만들어 StreamingResponse로 바로 보냅니다. (임시 파일 없음)
+GLB(바이너리 glTF 2.0)는 같은 스켈레톤을 노드로, 회전을 float32 쿼터니언 버퍼로 담아 텍스트 포맷 없이 만듭니다.
+"""
+import json
+import struct
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .motion_encoding import encode_json
+
+# 형식 → (미디어 타입, 확장자)
+EXPORT_FORMATS = {
+    "json": ("application/json", ".json"),
+    "bvh": ("text/plain", ".bvh"),
+    "fbx": ("application/octet-stream", ".fbx"),
+    "glb": ("model/gltf-binary", ".glb"),
+}
+
+
+def flatten_frames(data: np.ndarray) -> np.ndarray:
+    """[frames, joints, 3] 또는 [frames, joints × 3] → [frames, joints × 3] (변환기의 프레임 형식)"""
+    data = np.asarray(data, dtype=np.float32)
+    return data.reshape(data.shape[0], int(np.prod(data.shape[1:])))
+
+
+def iter_motion_file(format: str, motion_data: Dict) -> Iterator[bytes]:
+    """
+    모션을 내보내기 파일로 변환하며 조각 단위로 반환
+
+    Args:
+        format: EXPORT_FORMATS의 키
+        motion_data: 'data'가 float32 [frames, ...] 배열인 모션 (job_store.get_result() 등)
+
+    Returns:
+        Iterator[bytes]: 파일 내용 조각 (bvh는 프레임 조각 단위, 나머지는 한 조각)
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 형식: {format} (가능: {', '.join(EXPORT_FORMATS)})")
+    return _iter_motion_file(format, motion_data)
+
+
+def _iter_motion_file(format: str, motion_data: Dict) -> Iterator[bytes]:
+    # 제너레이터라 변환은 첫 조각을 읽을 때 시작 (StreamingResponse에서는 스레드풀)
+    if format == "bvh":
+        yield from iter_bvh(motion_data)
+        return
+    if format == "glb":
+        yield from iter_glb(motion_data)
+        return
+    data = motion_data["data"]
+    fields = {key: value for key, value in motion_data.items() if key != "data"}
+    if format == "json":
+        # 입력과 같은 프레임 구조 (저장된 결과는 결과 조회 API의 JSON과 같은 [frames][joints][3])
+        yield encode_json(fields, data)
+    else:
+        yield convert_to_fbx({**fields, "data": flatten_frames(data).tolist()})
+
+
+def export_motion_file(format: str, motion_data: Dict) -> bytes:
+    """모션을 내보내기 파일로 변환 (iter_motion_file의 조각을 합친 bytes)"""
+    return b"".join(iter_motion_file(format, motion_data))
+
+
+@dataclass(frozen=True)
+class BVHJoint:
+    """BVH 스켈레톤 관절 (index: 프레임 배열에서 이 관절 값의 위치, 값 index×3 ~ index×3+2)"""
+    name: str
+    parent: Optional[str]
+    offset: Tuple[float, float, float]
+    channels: int
+    index: int
+
+
+# BVH 스켈레톤 구조 정의
+BVH_SKELETON = (
+    BVHJoint("Hips", None, (0.0, 0.0, 0.0), 6, 0),
+    BVHJoint("Spine", "Hips", (0.0, 0.1, 0.0), 3, 1),
+    BVHJoint("Chest", "Spine", (0.0, 0.15, 0.0), 3, 2),
+    BVHJoint("Head", "Chest", (0.0, 0.2, 0.0), 3, 3),
+    BVHJoint("LeftUpperArm", "Chest", (-0.15, 0.1, 0.0), 3, 4),
+    BVHJoint("LeftForearm", "LeftUpperArm", (0.0, 0.25, 0.0), 3, 5),
+    BVHJoint("RightUpperArm", "Chest", (0.15, 0.1, 0.0), 3, 6),
+    BVHJoint("RightForearm", "RightUpperArm", (0.0, 0.25, 0.0), 3, 7),
+    BVHJoint("LeftThigh", "Hips", (-0.1, 0.0, 0.0), 3, 8),
+    BVHJoint("LeftShin", "LeftThigh", (0.0, 0.4, 0.0), 3, 9),
+    BVHJoint("RightThigh", "Hips", (0.1, 0.0, 0.0), 3, 10),
+    BVHJoint("RightShin", "RightThigh", (0.0, 0.4, 0.0), 3, 11),
+)
+# 이보다 값이 적은 프레임 배열은 0으로 내보냄 (22개 관절 × 3)
+BVH_MIN_FRAME_VALUES = 66
+# 루트 위치 채널 (기본 높이)
+BVH_ROOT_POSITION = (0.0, 1.0, 0.0)
+# StreamingResponse에 한 번에 쓰는 프레임 수
+BVH_CHUNK_FRAMES = 512
+
+
+@lru_cache(maxsize=8)
+def _bvh_layout(skeleton: Tuple[BVHJoint, ...]) -> Tuple[str, np.ndarray]:
+    """
+    스켈레톤별 HIERARCHY 텍스트와 MOTION 채널 순서 (스켈레톤마다 한 번만 계산)
+
+    Returns:
+        (HIERARCHY 텍스트, 채널별 프레임 값 인덱스 - 루트 위치 채널은 -1)
+    """
+    children: Dict[Optional[str], List[BVHJoint]] = {}
+    for joint in skeleton:
+        children.setdefault(joint.parent, []).append(joint)
+
+    lines = ["HIERARCHY"]
+    columns = []
+
+    def add_joint(joint: BVHJoint, indent: int):
+        pad = "  " * indent
+        lines.append(f"{pad}{'ROOT' if joint.parent is None else 'JOINT'} {joint.name}")
+        lines.append(f"{pad}{{")
+        lines.append(f"{pad}  OFFSET {joint.offset[0]:.6f} {joint.offset[1]:.6f} {joint.offset[2]:.6f}")
+        # 회전 채널은 Z, X, Y 순서 (값은 관절의 x, y, z)
+        base = joint.index * 3
+        if joint.channels == 6:
+            lines.append(f"{pad}  CHANNELS 6 Xposition Yposition Zposition Zrotation Xrotation Yrotation")
+            columns.extend([-1, -1, -1])
+        else:
+            lines.append(f"{pad}  CHANNELS 3 Zrotation Xrotation Yrotation")
+        columns.extend([base + 2, base, base + 1])
+
+        if joint.name in children:
+            for child in children[joint.name]:
+                add_joint(child, indent + 1)
+        else:
+            lines.append(f"{pad}  End Site")
+            lines.append(f"{pad}  {{")
+            lines.append(f"{pad}    OFFSET 0.0 0.0 0.0")
+            lines.append(f"{pad}  }}")
+        lines.append(f"{pad}}}")
+
+    for root in children.get(None, []):
+        add_joint(root, 0)
+    return "\n".join(lines) + "\n", np.array(columns)
+
+
+def bvh_channels(data: np.ndarray, skeleton: Tuple[BVHJoint, ...] = BVH_SKELETON) -> np.ndarray:
+    """
+    [frames, ...] 모션 → [frames, 채널] BVH MOTION 값 (float64)
+    관절 값(라디안)을 모든 프레임에 대해 한 번에 도로 변환하고, 루트 위치 채널은 BVH_ROOT_POSITION
+    """
+    _, columns = _bvh_layout(skeleton)
+    flat = flatten_frames(data)
+    channels = np.zeros((flat.shape[0], len(columns)), dtype=np.float64)
+    if flat.shape[1] >= max(BVH_MIN_FRAME_VALUES, columns.max() + 1):
+        rotation = columns >= 0
+        channels[:, rotation] = np.degrees(np.nan_to_num(flat[:, columns[rotation]].astype(np.float64)))
+    # 루트 위치 채널 (columns의 -1, 루트가 한 개라고 가정)
+    channels[:, columns < 0] = BVH_ROOT_POSITION
+    return channels
+
+
+def iter_bvh(motion_data: Dict, skeleton: Tuple[BVHJoint, ...] = BVH_SKELETON,
+             chunk_frames: int = BVH_CHUNK_FRAMES) -> Iterator[bytes]:
+    """
+    모션을 BVH로 변환하며 조각 단위로 반환 (헤더, 이후 chunk_frames 프레임씩)
+    문서 전체를 문자열로 만들지 않으므로 StreamingResponse나 파일에 바로 씁니다.
+    """
+    hierarchy, columns = _bvh_layout(skeleton)
+    data = motion_data["data"]
+    frames = len(data)
+    fps = motion_data.get("fps") or 30
+    yield f"{hierarchy}\nMOTION\nFrames: {frames}\nFrame Time: {1.0 / fps:.6f}\n".encode("utf-8")
+
+    # 한 조각 전체를 한 번의 % 연산으로 포맷 (값마다 f-string을 만들지 않음)
+    row_format = " ".join(["%.6f"] * len(columns)) + "\n"
+    for start in range(0, frames, chunk_frames):
+        block = bvh_channels(data[start:start + chunk_frames], skeleton)
+        yield ((row_format * block.shape[0]) % tuple(block.ravel().tolist())).encode("ascii")
+
+
+# GLB 청크 (glTF 2.0 바이너리 컨테이너)
+GLB_MAGIC = b"glTF"
+GLB_VERSION = 2
+_GLB_JSON_CHUNK = 0x4E4F534A    # "JSON"
+_GLB_BIN_CHUNK = 0x004E4942     # "BIN\0"
+_GLTF_FLOAT = 5126
+
+
+def _axis_quaternions(angles: np.ndarray, axis: int) -> np.ndarray:
+    """축 회전 각도(라디안) [...] → 쿼터니언 [..., 4] (x, y, z, w)"""
+    q = np.zeros(angles.shape + (4,), dtype=np.float64)
+    q[..., axis] = np.sin(angles / 2)
+    q[..., 3] = np.cos(angles / 2)
+    return q
+
+
+def _quaternion_multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """쿼터니언 곱 a × b ([..., 4], x, y, z, w)"""
+    ax, ay, az, aw = np.moveaxis(a, -1, 0)
+    bx, by, bz, bw = np.moveaxis(b, -1, 0)
+    return np.stack([
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    ], axis=-1)
+
+
+def joint_quaternions(data: np.ndarray, skeleton: Tuple[BVHJoint, ...] = BVH_SKELETON) -> np.ndarray:
+    """
+    [frames, ...] 모션 → 관절별 회전 쿼터니언 float32 [joints, frames, 4] (x, y, z, w)
+    BVH 채널(Zrotation Xrotation Yrotation)과 같은 회전 R = Rz · Rx · Ry를 모든 프레임에 대해 한 번에 계산하며,
+    관절마다 프레임이 연속되도록 배치해 glTF 애니메이션 출력 accessor가 그대로 가리킵니다.
+    """
+    flat = flatten_frames(data)
+    indices = np.array([joint.index for joint in skeleton])
+    angles = np.zeros((len(skeleton), flat.shape[0], 3), dtype=np.float64)
+    if flat.shape[1] >= max(BVH_MIN_FRAME_VALUES, indices.max() * 3 + 3):
+        # [frames, joints, 3] → [joints, frames, 3] (관절 값 x, y, z = X, Y, Z축 회전)
+        angles[:] = np.nan_to_num(flat.reshape(flat.shape[0], flat.shape[1] // 3, 3)[:, indices].transpose(1, 0, 2))
+    rotation = _quaternion_multiply(
+        _quaternion_multiply(_axis_quaternions(angles[..., 2], 2), _axis_quaternions(angles[..., 0], 0)),
+        _axis_quaternions(angles[..., 1], 1)
+    )
+    return np.ascontiguousarray(rotation, dtype="<f4")
+
+
+def _padded(chunk: bytes, pad: bytes) -> bytes:
+    """GLB 청크는 4바이트 정렬"""
+    return chunk + pad * (-len(chunk) % 4)
+
+
+def iter_glb(motion_data: Dict, skeleton: Tuple[BVHJoint, ...] = BVH_SKELETON) -> Iterator[bytes]:
+    """
+    모션을 GLB(바이너리 glTF 2.0)로 변환하며 조각 단위로 반환 (헤더+JSON, 시간 버퍼, 회전 버퍼)
+
+    스켈레톤 관절은 노드 계층(translation = 관절 오프셋, 루트는 BVH_ROOT_POSITION만큼 이동)으로,
+    애니메이션은 관절마다 rotation 채널 하나(LINEAR)로 기록합니다.
+    바이너리 버퍼는 시간 float32[frames] 뒤에 회전 float32[joints][frames][4]이며,
+    관절 j의 출력 accessor는 회전 버퍼의 j × frames × 16바이트 위치를 가리킵니다.
+    """
+    data = motion_data["data"]
+    frames = len(data)
+    fps = motion_data.get("fps") or 30
+    times = np.arange(frames, dtype="<f4") / np.float32(fps)
+    rotations = joint_quaternions(data, skeleton)
+
+    node_index = {joint.name: index for index, joint in enumerate(skeleton)}
+    nodes = []
+    for joint in skeleton:
+        translation = list(joint.offset)
+        if joint.parent is None:
+            translation = [offset + root for offset, root in zip(translation, BVH_ROOT_POSITION)]
+        node = {"name": joint.name, "translation": translation}
+        children = [node_index[child.name] for child in skeleton if child.parent == joint.name]
+        if children:
+            node["children"] = children
+        nodes.append(node)
+
+    gltf = {
+        "asset": {"version": "2.0", "generator": "K-Pop Motion Generation API"},
+        "scene": 0,
+        "scenes": [{"nodes": [node_index[joint.name] for joint in skeleton if joint.parent is None]}],
+        "nodes": nodes,
+    }
+    # 프레임이 없으면 스켈레톤만 (glTF의 최상위 배열은 비어 있으면 안 되고, accessor는 count ≥ 1이어야 함)
+    if frames:
+        gltf["buffers"] = [{"byteLength": times.nbytes + rotations.nbytes}]
+        frame_bytes = frames * 16
+        gltf["bufferViews"] = [
+            {"buffer": 0, "byteOffset": 0, "byteLength": times.nbytes},
+            {"buffer": 0, "byteOffset": times.nbytes, "byteLength": rotations.nbytes},
+        ]
+        gltf["accessors"] = [
+            {"bufferView": 0, "componentType": _GLTF_FLOAT, "count": frames, "type": "SCALAR",
+             "min": [float(times[0])], "max": [float(times[-1])]},
+        ] + [
+            {"bufferView": 1, "byteOffset": joint * frame_bytes, "componentType": _GLTF_FLOAT,
+             "count": frames, "type": "VEC4"}
+            for joint in range(len(skeleton))
+        ]
+        gltf["animations"] = [{
+            "name": motion_data.get("prompt") or "motion",
+            "samplers": [{"input": 0, "output": joint + 1, "interpolation": "LINEAR"}
+                         for joint in range(len(skeleton))],
+            "channels": [{"sampler": joint, "target": {"node": joint, "path": "rotation"}}
+                         for joint in range(len(skeleton))],
+        }]
+
+    json_chunk = _padded(json.dumps(gltf, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), b" ")
+    # float32 버퍼만 있으므로 BIN 청크는 항상 4바이트 정렬
+    bin_length = times.nbytes + rotations.nbytes
+    total = 12 + 8 + len(json_chunk) + (8 + bin_length if frames else 0)
+
+    header = struct.pack("<4sII", GLB_MAGIC, GLB_VERSION, total)
+    yield header + struct.pack("<II", len(json_chunk), _GLB_JSON_CHUNK) + json_chunk
+    if frames:
+        yield struct.pack("<II", bin_length, _GLB_BIN_CHUNK)
+        # 배열 버퍼를 복사 없이 그대로 전달
+        yield memoryview(times).cast("B")
+        yield memoryview(rotations).cast("B")
+
+
+def convert_to_fbx(motion_data: dict) -> bytes:
+    """
+    모션 데이터를 FBX 형식으로 변환
+    참고: 실제 FBX는 바이너리 형식이지만, 여기서는 ASCII FBX 형식으로 변환
+    프로덕션 환경에서는 Autodesk FBX SDK 사용을 권장합니다.
+    """
+    # FBX ASCII 형식으로 변환
+    fps = motion_data.get('fps', 30)
+    frames = motion_data.get('frames', 0)
+    joints = motion_data.get('joints', 22)
+    motion_frames = motion_data.get('data', [])
+    
+    # FBX ASCII 헤더
+    fbx_lines = [
+        "; FBX 7.4.0 project file",
+        "; Created by SOTA K-Pop Studio",
+        "",
+        "FBXHeaderExtension:  {",
+        "    FBXHeaderVersion: 1003",
+        "    FBXVersion: 7400",
+        "}",
+        "",
+        "GlobalSettings:  {",
+        "    Version: 1000",
+        "}",
+        "",
+        "Objects:  {",
+        "    Model: \"Model::RootNode\", \"Mesh\" {",
+        "        Version: 232",
+        "        Properties70:  {",
+        "            P: \"Lcl Translation\", \"Lcl Translation\", \"\", \"A\",0,0,0",
+        "            P: \"Lcl Rotation\", \"Lcl Rotation\", \"\", \"A\",0,0,0",
+        "            P: \"Lcl Scaling\", \"Lcl Scaling\", \"\", \"A\",1,1,1",
+        "        }",
+        "    }",
+        "}",
+        "",
+        "AnimationStack: \"Take 001\", \"Take\" {",
+        "    Version: 1",
+        "}",
+        "",
+        "AnimationLayer: \"AnimLayer::BaseLayer\", \"AnimLayer\" {",
+        "    Version: 1",
+        "}",
+        ""
+    ]
+    
+    # 모션 데이터를 FBX 형식으로 변환
+    # 실제 FBX는 더 복잡하지만, 여기서는 기본 구조만 제공
+    # 프로덕션에서는 FBX SDK를 사용하여 정확한 변환 수행
+    
+    # JSON 형식으로 모션 데이터 포함 (호환성을 위해)
+    fbx_data = {
+        "version": "FBX 7.4 (ASCII)",
+        "fps": fps,
+        "frames": frames,
+        "joints": joints,
+        "motion_data": motion_data,
+        "note": "This is a simplified FBX export. For production use, please use Autodesk FBX SDK (https://www.autodesk.com/developer-network/platform-technologies/fbx-sdk-2020-2)."
+    }
+    
+    # JSON을 바이너리로 인코딩
+    return json.dumps(fbx_data, indent=2, ensure_ascii=False).encode('utf-8')
@@ -4,9 +4,28 @@
 - 오디오 동기화
 - 스타일 조건부 생성
 """
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import numpy as np
-from .mdm_loader import MDMLoader, get_mdm_loader
+from .frame_rate import frame_count, resample_motion
+
+# 생성과 후처리를 수행하는 내부 프레임 레이트 (MDM HumanML3D 기본 20fps)
+DEFAULT_INTERNAL_FPS = 20
+# 결과 모션의 기본 출력 프레임 레이트
+DEFAULT_OUTPUT_FPS = 30
+
+# 변형 생성 시 재노이징 깊이 범위 (전체 디퓨전 스텝 대비 비율)
+MIN_VARIATION_STRENGTH = 0.1
+MAX_VARIATION_STRENGTH = 0.9
+
+
+# 구간 편집 시 앞뒤로 고정해 두는 문맥 길이와 경계 크로스페이드 길이 (초)
+EDIT_CONTEXT_SECONDS = 1.0
+EDIT_BLEND_SECONDS = 0.25
+
+
+def variation_strength(creativity: float) -> float:
+    """creativity(0-2)를 변형 재노이징 깊이(0.1-0.9)로 변환"""
+    return float(np.clip(0.15 + creativity * 0.35, MIN_VARIATION_STRENGTH, MAX_VARIATION_STRENGTH))
 
 
 class MotionGenerator:
@@ -16,18 +35,30 @@ class MotionGenerator:
     MDM (Motion Diffusion Model)을 사용하여 모션을 생성합니다.
     """
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        lazy: bool = False,
+        internal_fps: float = DEFAULT_INTERNAL_FPS
+    ):
         """
         모델 초기화
         
         Args:
             model_path: 사전 학습된 모델 경로 (선택사항)
+            lazy: True면 모델을 바로 로드하지 않음 (load_model()을 나중에 호출)
+            internal_fps: 생성과 후처리를 수행하는 프레임 레이트
         """
         self.mdm_loader = None
-        self._initialize_model()
+        self.internal_fps = internal_fps
+        if not lazy:
+            self._initialize_model()
     
     def _initialize_model(self):
         """MDM 모델 초기화"""
+        # torch와 MDM 저장소는 모델을 실제로 로드할 때 임포트
+        from .mdm_loader import get_mdm_loader
+        
         try:
             self.mdm_loader = get_mdm_loader()
             if not self.mdm_loader.is_loaded():
@@ -36,6 +67,20 @@ class MotionGenerator:
             print(f"⚠️  MDM 모델 초기화 실패: {e}")
             print("   모의 모드로 작동합니다.")
     
+    def load_model(self) -> bool:
+        """
+        MDM 모델 로드 (백그라운드 워밍업용)
+        
+        Returns:
+            bool: 실제 MDM 모델이 로드되었으면 True, 모의 모드면 False
+        """
+        self._initialize_model()
+        return self.is_model_loaded()
+    
+    def is_model_loaded(self) -> bool:
+        """실제 MDM 모델 사용 가능 여부"""
+        return bool(self.mdm_loader and self.mdm_loader.is_loaded())
+    
     def generate(
         self,
         prompt: str,
@@ -44,7 +89,11 @@ class MotionGenerator:
         energy: float = 0.75,
         smoothness: float = 0.5,
         bounce: float = 0.6,
-        creativity: float = 0.4
+        creativity: float = 0.4,
+        force_mock: bool = False,
+        output_fps: float = DEFAULT_OUTPUT_FPS,
+        step_callback: Optional[Callable[[int, int, float], None]] = None,
+        keep_source: bool = False
     ) -> Dict:
         """
         안무 생성
@@ -57,107 +106,385 @@ class MotionGenerator:
             smoothness: 부드러움 (0-1)
             bounce: 바운스 (0-1)
             creativity: 창의성 (0-2)
+            force_mock: True면 모델 상태와 무관하게 모의 모드로 생성
+            output_fps: 결과 모션의 프레임 레이트 (낮추면 미리보기 비용이 비례해서 줄어듦)
+            step_callback: MDM 디노이징 스텝마다 (현재 스텝, 전체 스텝, 스텝 소요 시간)로 호출
+            keep_source: True면 후처리 전 원본 모션을 'source'로 함께 반환 (변형 생성용)
             
         Returns:
             {
                 'frames': int,           # 프레임 수
                 'joints': int,          # 관절 수
-                'data': list,            # 모션 데이터 [frames, joints, 3]
+                'data': np.ndarray,      # 모션 데이터 [frames, joints, 3] float32
                 'style': str,
                 'prompt': str,
                 'fps': int,
-                'duration': float
+                'duration': float,
+                'source': dict           # keep_source=True일 때만 (_make_source 참고)
             }
         """
+        # 오디오 길이 가져오기
+        duration = audio_features['duration'] if audio_features else 10.0
+        
+        # 비트 정보 추출
+        beats = audio_features.get('beats', []) if audio_features else []
+        
+        # 생성/후처리 프레임 레이트 (출력 fps가 더 낮으면 출력 fps로 처리해서 미리보기 비용 절감)
+        work_fps = min(self.internal_fps, output_fps)
+        
+        # 1. 모션 생성 (MDM 또는 모의)
+        motion_data, source_fps, raw = self._synthesize(
+            prompt, style, duration, energy, bounce, creativity, beats, force_mock, work_fps,
+            step_callback=step_callback
+        )
+        
+        result = self._finish(
+            motion_data, source_fps, work_fps, output_fps,
+            audio_features, energy, smoothness, bounce, style, prompt, duration
+        )
+        if keep_source:
+            result['source'] = self._make_source(motion_data, source_fps, raw)
+        return result
+    
+    def generate_variations(
+        self,
+        source: Dict,
+        prompt: str,
+        style: str = "hiphop",
+        audio_features: Optional[Dict] = None,
+        energy: float = 0.75,
+        smoothness: float = 0.5,
+        bounce: float = 0.6,
+        creativity: float = 0.4,
+        num_variants: int = 1,
+        output_fps: float = DEFAULT_OUTPUT_FPS,
+        step_callback: Optional[Callable[[int, int, float], None]] = None,
+        keep_source: bool = False,
+        seed: Optional[int] = None
+    ) -> List[Dict]:
         """
-        안무 생성
+        완료된 생성 결과의 변형 생성
+        MDM 샘플이 있으면 creativity만큼 다시 노이즈를 입히고 남은 디노이징 스텝만 수행하므로
+        전체 생성보다 비용이 적습니다. 모의 모드 결과는 저주파 노이즈로 원본 모션을 흔들어 만듭니다.
         
         Args:
-            prompt: 텍스트 프롬프트
-            style: 스타일 (hiphop, pop, ballad 등)
-            audio_features: 오디오 분석 결과
-            energy: 에너지 레벨 (0-1)
-            smoothness: 부드러움 (0-1)
-            bounce: 바운스 (0-1)
-            creativity: 창의성 (0-2)
+            source: generate(keep_source=True)가 반환한 'source'
+            creativity: 재노이징 깊이 (variation_strength 참고)
+            num_variants: 생성할 변형 수
+            seed: 모의 모드 난수 시드 (None이면 매번 다른 변형)
+            (나머지는 generate와 동일)
             
+        Returns:
+            List[Dict]: 변형별 generate() 형식 결과
+        """
+        duration = audio_features['duration'] if audio_features else source['motion'].shape[0] / source['fps']
+        work_fps = min(self.internal_fps, output_fps)
+        strength = variation_strength(creativity)
+        
+        variants = None
+        if source.get('raw') is not None and self.is_model_loaded():
+            try:
+                variants = self.mdm_loader.vary(
+                    source['raw'],
+                    caption=f"{style} style, {prompt}",
+                    strength=strength,
+                    num_variants=num_variants,
+                    guidance_scale=1.0 + (creativity * 0.5),
+                    step_callback=step_callback
+                )
+                source_fps = self.mdm_loader.fps
+            except Exception as e:
+                print(f"⚠️  MDM 변형 생성 실패, 모의 변형으로 전환: {e}")
+                variants = None
+        
+        if variants is None:
+            rng = np.random.default_rng(seed)
+            source_fps = source['fps']
+            variants = [
+                (self._perturb_motion(source['motion'], source_fps, strength, rng), None)
+                for _ in range(num_variants)
+            ]
+        
+        results = []
+        for motion_data, raw in variants:
+            result = self._finish(
+                motion_data, source_fps, work_fps, output_fps,
+                audio_features, energy, smoothness, bounce, style, prompt, duration
+            )
+            if keep_source:
+                result['source'] = self._make_source(motion_data, source_fps, raw)
+            results.append(result)
+        return results
+    
+    def edit_range(
+        self,
+        source: Dict,
+        start: float,
+        end: float,
+        prompt: str,
+        style: str = "hiphop",
+        audio_features: Optional[Dict] = None,
+        energy: float = 0.75,
+        smoothness: float = 0.5,
+        bounce: float = 0.6,
+        creativity: float = 0.4,
+        output_fps: float = DEFAULT_OUTPUT_FPS,
+        window_prompt: Optional[str] = None,
+        step_callback: Optional[Callable[[int, int, float], None]] = None,
+        keep_source: bool = False
+    ) -> Dict:
+        """
+        완료된 생성 결과의 [start, end) 구간만 다시 생성
+        MDM 샘플이 있으면 앞뒤 문맥 프레임을 고정한 마스크 인페인팅으로 편집 구간만 샘플링하고,
+        모의 모드는 편집 구간만 다시 합성합니다. 새 구간은 경계에서 크로스페이드로 이어 붙입니다.
+        
+        Args:
+            source: generate(keep_source=True)가 반환한 'source'
+            start, end: 편집 구간 (초)
+            window_prompt: 편집 구간에 사용할 프롬프트 (None이면 prompt)
+            (나머지는 generate와 동일)
+            
+        Returns:
+            Dict: generate() 형식 결과 (전체 길이)
+        """
+        source_fps = source['fps']
+        motion = source['motion']
+        raw = source.get('raw')
+        total_frames = motion.shape[0]
+        duration = audio_features['duration'] if audio_features else total_frames / source_fps
+        work_fps = min(self.internal_fps, output_fps)
+        window_prompt = window_prompt or prompt
+        
+        start_frame = min(total_frames - 1, max(0, int(round(start * source_fps))))
+        end_frame = min(total_frames, max(start_frame + 1, int(round(end * source_fps))))
+        
+        edited = None
+        if raw is not None and self.is_model_loaded():
+            try:
+                window, raw_window = self.mdm_loader.inpaint(
+                    raw,
+                    caption=f"{style} style, {window_prompt}",
+                    start_frame=start_frame,
+                    end_frame=end_frame,
+                    context_frames=int(round(EDIT_CONTEXT_SECONDS * source_fps)),
+                    guidance_scale=1.0 + (creativity * 0.5),
+                    step_callback=step_callback
+                )
+                raw = raw.copy()
+                raw[..., start_frame:end_frame] = raw_window
+                edited = window
+            except ValueError:
+                raise
+            except Exception as e:
+                print(f"⚠️  MDM 구간 편집 실패, 모의 모드로 전환: {e}")
+        
+        if edited is None:
+            # 모의 모드: 편집 구간만 다시 합성 (비트는 구간 시작 기준으로 이동)
+            raw = None
+            window_start = start_frame / source_fps
+            window_end = end_frame / source_fps
+            beats = audio_features.get('beats', []) if audio_features else []
+            window_beats = [b - window_start for b in beats if window_start <= b < window_end]
+            edited = self._generate_mock_motion(
+                window_end - window_start, energy, bounce, window_prompt, style, window_beats, fps=source_fps
+            )
+            edited = self._fit_length(edited, end_frame - start_frame)
+        
+        motion = self._splice_window(
+            motion, edited, start_frame, int(round(EDIT_BLEND_SECONDS * source_fps))
+        )
+        
+        result = self._finish(
+            motion, source_fps, work_fps, output_fps,
+            audio_features, energy, smoothness, bounce, style, prompt, duration
+        )
+        if keep_source:
+            result['source'] = self._make_source(motion, source_fps, raw)
+        return result
+    
+    @staticmethod
+    def _fit_length(motion: np.ndarray, frames: int) -> np.ndarray:
+        """프레임 수를 frames로 맞춤 (남으면 자르고 모자라면 마지막 프레임 반복)"""
+        motion = np.asarray(motion)[:frames]
+        if len(motion) < frames:
+            motion = np.concatenate([motion, np.repeat(motion[-1:], frames - len(motion), axis=0)])
+        return motion
+    
+    @staticmethod
+    def _splice_window(motion: np.ndarray, window: np.ndarray, start_frame: int, blend_frames: int) -> np.ndarray:
+        """
+        motion[start_frame:start_frame + len(window)]를 window로 교체
+        경계 안쪽 blend_frames 동안 원본에서 새 구간으로 선형 크로스페이드 (곡의 시작/끝 경계는 제외)
+        """
+        motion = np.asarray(motion, dtype=np.float32)
+        window = np.asarray(window, dtype=np.float32)
+        end_frame = start_frame + len(window)
+        
+        weight = np.ones(len(window), dtype=np.float32)
+        blend_frames = min(blend_frames, len(window) // 2)
+        if blend_frames > 0:
+            ramp = np.arange(1, blend_frames + 1, dtype=np.float32) / (blend_frames + 1)
+            if start_frame > 0:
+                weight[:blend_frames] = ramp
+            if end_frame < len(motion):
+                weight[-blend_frames:] = ramp[::-1]
+        weight = weight.reshape((-1,) + (1,) * (window.ndim - 1))
+        
+        spliced = motion.copy()
+        spliced[start_frame:end_frame] = motion[start_frame:end_frame] * (1 - weight) + window * weight
+        return spliced
+    
+    def _finish(
+        self,
+        motion_data: np.ndarray,
+        source_fps: float,
+        work_fps: float,
+        output_fps: float,
+        audio_features: Optional[Dict],
+        energy: float,
+        smoothness: float,
+        bounce: float,
+        style: str,
+        prompt: str,
+        duration: float
+    ) -> Dict:
+        """원본 모션을 처리 프레임 레이트로 후처리하고 출력 fps의 결과 dict로 변환"""
+        # 처리 프레임 레이트로 변환 (후처리가 배열을 직접 수정하므로 복사본 사용)
+        motion_data = np.array(resample_motion(motion_data, source_fps, work_fps))
+        
+        # 2. 후처리 (비트 정렬, 파라미터 적용)는 처리 프레임 레이트에서 수행
+        motion_data = self._post_process(
+            motion_data, work_fps, audio_features, energy, smoothness, bounce
+        )
+        
+        # 3. 출력 프레임 레이트로 한 번만 리샘플링
+        fps = output_fps
+        motion_data = resample_motion(motion_data, work_fps, fps)
+        frames = motion_data.shape[0]
+        joints = motion_data.shape[1]
+        
+        return {
+            'frames': int(frames),
+            'joints': int(joints),
+            'data': np.asarray(motion_data, dtype=np.float32),  # JSON 응답 시 리스트로 변환
+            'style': style,
+            'prompt': prompt,
+            'fps': fps,
+            'duration': float(duration)
+        }
+    
+    @staticmethod
+    def _make_source(motion: np.ndarray, fps: float, raw: Optional[np.ndarray]) -> Dict:
+        """
+        변형/편집에 사용할 후처리 전 원본 모션
+        
         Returns:
             {
-                'frames': int,           # 프레임 수
-                'joints': int,          # 관절 수
-                'data': np.ndarray,      # 모션 데이터 [frames, joints, 3]
-                'style': str,
-                'prompt': str
+                'motion': np.ndarray,   # [frames, joints, 3] float32, fps 기준
+                'fps': float,
+                'raw': np.ndarray       # MDM 특징 공간 샘플 [263, 1, frames] (모의 모드면 None)
             }
         """
-        # 오디오 길이 가져오기
-        duration = audio_features['duration'] if audio_features else 10.0
+        return {
+            'motion': np.asarray(motion, dtype=np.float32).copy(),
+            'fps': float(fps),
+            'raw': raw,
+        }
+    
+    @staticmethod
+    def _perturb_motion(motion: np.ndarray, fps: float, strength: float, rng: np.random.Generator) -> np.ndarray:
+        """
+        모의 변형: 관절별 저주파 노이즈(2Hz 제어점을 선형 보간)를 더해 원본을 흔듦
+        노이즈 크기는 관절 좌표의 시간축 표준편차 × strength
+        """
+        motion = np.asarray(motion, dtype=np.float32)
+        frames = motion.shape[0]
+        knot_fps = 2.0
+        knots = rng.standard_normal((frame_count(frames / fps, knot_fps) + 1,) + motion.shape[1:]).astype(np.float32)
+        noise = resample_motion(knots, knot_fps, fps)[:frames]
+        if noise.shape[0] < frames:
+            noise = np.concatenate([noise, np.repeat(noise[-1:], frames - noise.shape[0], axis=0)])
+        scale = motion.std(axis=0, keepdims=True) * strength
+        return motion + noise * scale
+    
+    def _synthesize(
+        self,
+        prompt: str,
+        style: str,
+        duration: float,
+        energy: float,
+        bounce: float,
+        creativity: float,
+        beats: list,
+        force_mock: bool = False,
+        fps: Optional[float] = None,
+        step_callback: Optional[Callable[[int, int, float], None]] = None
+    ) -> Tuple[np.ndarray, float, Optional[np.ndarray]]:
+        """
+        원본 모션 생성 (모의 모드는 fps로 바로 생성, 기본값: internal_fps)
         
+        Returns:
+            (motion [frames, joints, 3], motion의 프레임 레이트, MDM 특징 공간 샘플 또는 None)
+        """
         # 스타일을 프롬프트에 추가
         enhanced_prompt = f"{style} style, {prompt}"
         
-        # 비트 정보 추출
-        beats = audio_features.get('beats', []) if audio_features else []
-        
         # MDM으로 모션 생성
-        if self.mdm_loader and self.mdm_loader.is_loaded():
+        if not force_mock and self.is_model_loaded():
             try:
                 # 가이던스 스케일 조정 (creativity에 따라)
                 guidance_scale = 1.0 + (creativity * 0.5)
                 
-                motion_data = self.mdm_loader.generate(
+                motion_data, raw = self.mdm_loader.generate(
                     caption=enhanced_prompt,
                     length=duration,
-                    guidance_scale=guidance_scale
+                    guidance_scale=guidance_scale,
+                    step_callback=step_callback,
+                    return_raw=True
                 )
+                return motion_data, self.mdm_loader.fps, raw
             except Exception as e:
                 print(f"⚠️  MDM 생성 실패, 모의 모드로 전환: {e}")
-                motion_data = self._generate_mock_motion(duration, energy, bounce, prompt, style, beats)
-        else:
-            # 모의 생성 (MDM이 없을 때)
-            motion_data = self._generate_mock_motion(duration, energy, bounce, prompt, style, beats)
-        
-        fps = 30
-        frames = motion_data.shape[0]
-        joints = motion_data.shape[1]
         
+        # 모의 생성 (MDM이 없을 때) - 처리 프레임 레이트로 바로 생성
+        fps = fps or self.internal_fps
+        motion_data = self._generate_mock_motion(
+            duration, energy, bounce, prompt, style, beats, fps=fps
+        )
+        return motion_data, fps, None
+    
+    def _post_process(
+        self,
+        motion: np.ndarray,
+        fps: float,
+        audio_features: Optional[Dict],
+        energy: float,
+        smoothness: float,
+        bounce: float
+    ) -> np.ndarray:
+        """비트 정렬과 파라미터 적용 (fps는 motion의 프레임 레이트)"""
         # 오디오 비트에 맞춰 정렬
         try:
             if audio_features and 'beats' in audio_features and audio_features.get('beats'):
-                motion_data = self._align_to_beats(motion_data, audio_features['beats'], fps)
+                motion = self._align_to_beats(motion, audio_features['beats'], fps)
         except Exception as e:
             print(f"⚠️  비트 정렬 실패 (계속 진행): {e}")
         
         # 파라미터에 따라 모션 조정
         try:
-            motion_data = self._apply_parameters(motion_data, energy, smoothness, bounce)
+            motion = self._apply_parameters(motion, energy, smoothness, bounce, fps)
         except Exception as e:
             print(f"⚠️  파라미터 적용 실패 (원본 사용): {e}")
         
-        # 데이터 타입 확인 및 변환
-        if isinstance(motion_data, np.ndarray):
-            motion_data_list = motion_data.tolist()
-        else:
-            motion_data_list = motion_data
-        
-        return {
-            'frames': int(frames),
-            'joints': int(joints),
-            'data': motion_data_list,  # JSON 직렬화를 위해 리스트로 변환
-            'style': style,
-            'prompt': prompt,
-            'fps': int(fps),
-            'duration': float(duration)
-        }
+        return motion
     
-    def _generate_mock_motion(self, duration: float, energy: float, bounce: float, prompt: str = "", style: str = "hiphop", beats: Optional[list] = None) -> np.ndarray:
+    def _generate_mock_motion(self, duration: float, energy: float, bounce: float, prompt: str = "", style: str = "hiphop", beats: Optional[list] = None, fps: float = DEFAULT_INTERNAL_FPS) -> np.ndarray:
         """
         모의 모션 데이터 생성 (MDM이 없을 때)
         프롬프트와 파라미터에 따라 다른 모션 생성
         """
         import hashlib
         
-        fps = 30
         frames = int(duration * fps)
         joints = 22  # SMPL 포맷
         
@@ -392,7 +719,7 @@ class MotionGenerator:
         
         return motion
     
-    def _apply_physics_constraints(self, motion: np.ndarray, fps: int) -> np.ndarray:
+    def _apply_physics_constraints(self, motion: np.ndarray, fps: float) -> np.ndarray:
         """
         물리적으로 자연스러운 움직임 보정
         - 속도 제한
@@ -440,7 +767,8 @@ class MotionGenerator:
         motion: np.ndarray,
         energy: float,
         smoothness: float,
-        bounce: float
+        bounce: float,
+        fps: float = DEFAULT_OUTPUT_FPS
     ) -> np.ndarray:
         """
         파라미터에 따라 모션을 조정합니다.
@@ -500,7 +828,8 @@ class MotionGenerator:
             motion[:, :, 1] *= bounce_factor
         
         # 자연스러운 시작/종료를 위한 페이드 인/아웃
-        fade_frames = min(10, len(motion) // 10)
+        # (30fps 기준 10프레임 ≈ 0.33초를 프레임 레이트에 맞게 환산)
+        fade_frames = min(int(round(fps / 3)), len(motion) // 10)
         if fade_frames > 0:
             # Fade in
             for i in range(fade_frames):
@@ -516,7 +845,7 @@ class MotionGenerator:
         
         return motion
     
-    def _align_to_beats(self, motion: np.ndarray, beats: list, fps: int) -> np.ndarray:
+    def _align_to_beats(self, motion: np.ndarray, beats: list, fps: float) -> np.ndarray:
         """
         모션을 오디오 비트에 맞춰 정렬 및 강조
         비트 타임스탬프에 맞춰 모션의 에너지를 증가시키고, 비트에 정확히 맞춥니다.
@@ -0,0 +1,58 @@
+"""
+결과 응답 캐시
+완료된 작업의 결과는 바뀌지 않으므로 인코딩(+압축)한 응답 본문을 한 번만 만들어 두고,
+같은 결과를 다시 요청하면 직렬화 없이 캐시된 바이트를 그대로 보냅니다.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class ResultCache:
+    """
+    바이트 크기 제한이 있는 LRU 캐시 (스레드 안전)
+
+    값은 (본문 bytes, 응답 헤더 dict)이며 본문 크기 합이 max_bytes를 넘으면 오래 안 쓴 항목부터 제거합니다.
+    (만료된 작업은 결과 API가 캐시 조회 전에 410을 반환하므로 따로 지우지 않고 LRU로 밀려남)
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[bytes, Dict[str, str]]]" = OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: Tuple[Hashable, ...], body: bytes, headers: Dict[str, str]):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= len(previous[0])
+            self._entries[key] = (body, headers)
+            self._nbytes += len(body)
+            while self._nbytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._nbytes -= len(evicted)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
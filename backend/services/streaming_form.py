@@ -0,0 +1,490 @@
+"""
+스트리밍 폼 파서
+POST /api/export-motion처럼 모션 JSON을 multipart 필드로 올리는 요청과 오디오 업로드 요청을
+본문 전체를 메모리나 임시 파일에 올리지 않고 받는 대로 파싱합니다.
+
+- multipart: python-multipart의 스트리밍 파서로 청크마다 필드 데이터를 전달 (본문/파트 복사본 없음)
+- motion_data JSON: MotionJSONDecoder가 "data" 배열을 프레임 단위로 float32 배열에 바로 기록
+  (파이썬 리스트/문자열 트리를 만들지 않으므로 메모리는 모션 크기에 비례)
+- 파일 업로드: 파일 파트를 UploadSpool에 청크마다 바로 기록 (받는 중에 크기 제한)
+"""
+import json
+import re
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    # python-multipart 0.0.13 이전
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from .upload_spool import SpooledFile, SpoolWriter, UploadSpool
+
+# 모션 이외 폼 필드의 최대 크기 (바이트)
+MAX_FIELD_BYTES = 64 * 1024
+# 파일/모션 이외 폼 필드의 최대 개수
+MAX_FIELDS = 32
+# 프레임 수를 모를 때 처음 할당하는 프레임 수 (부족하면 두 배씩 늘림)
+_INITIAL_FRAMES = 256
+# "frames" 값으로 미리 할당하는 최대 프레임 수 (클라이언트 값이므로 힌트로만 사용)
+_MAX_HINT_FRAMES = _INITIAL_FRAMES * 64
+
+_BRACKETS = re.compile(rb"[\[\]]")
+_OPEN, _CLOSE, _COMMA = ord("["), ord("]"), ord(",")
+_WHITESPACE = b" \t\r\n"
+_SEPARATORS = np.frombuffer(b", \t\r\n", dtype=np.uint8)
+
+
+class MotionJSONDecoder:
+    """
+    모션 JSON 객체({"data": [[...], ...], "fps": 30, ...})의 증분 디코더
+
+    "data"의 각 프레임은 [x0, y0, z0, ...] 또는 [[x, y, z], ...]이며, 프레임이 끝날 때마다
+    숫자만 float32로 변환해 미리 할당한 [frames, 값 수] 배열에 기록합니다.
+    ("frames" 키가 "data"보다 앞에 있으면 상한 안에서 그 크기로 할당, 프레임 모양이 다르면 ValueError)
+    나머지 키의 값은 원래 JSON 그대로 모았다가 close()에서 json.loads합니다.
+
+    사용법:
+        decoder = MotionJSONDecoder()
+        for chunk in chunks:
+            decoder.feed(chunk)
+        motion = decoder.close()    # {"fps": 30, ..., "data": float32 [frames, joints, 3]}
+    """
+
+    def __init__(self):
+        self._expect = "object"     # object, key, colon, value, comma, end
+        self._key: Optional[bytearray] = None
+        self._value: Optional[bytearray] = None
+        self._in_string = False
+        self._escape = False
+        self._nesting = 0
+        self._current_key: Optional[str] = None
+        self._fields: Dict[str, bytes] = {}
+
+        # "data" 배열 상태
+        self._in_data = False
+        self._data_depth = 0
+        self._frame_depth = 0
+        self._frame_carry = bytearray()
+        self._frame_open = False
+        self._data: Optional[np.ndarray] = None
+        self._frames = 0
+
+    def feed(self, chunk: bytes):
+        """JSON 바이트 일부 입력 (ValueError: 잘못된 JSON)"""
+        position = 0
+        while position < len(chunk):
+            if self._in_data:
+                position = self._feed_data(chunk, position)
+            else:
+                position = self._feed_fields(chunk, position)
+
+    def close(self) -> Dict:
+        """입력 완료 후 결과 반환 ('data'는 float32 배열, 없으면 None)"""
+        if self._expect != "end":
+            raise ValueError("motion_data JSON이 끝나지 않았습니다.")
+        motion = {}
+        for key, raw in self._fields.items():
+            try:
+                motion[key] = json.loads(raw)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{key} 값이 올바른 JSON이 아닙니다: {e}")
+        motion["data"] = self._finish_data()
+        return motion
+
+    def _feed_fields(self, chunk: bytes, position: int) -> int:
+        """최상위 객체의 키/값 (data 외) 파싱, data 배열이 시작되면 그 다음 위치 반환"""
+        for index in range(position, len(chunk)):
+            byte = chunk[index]
+            char = chr(byte)
+
+            if self._key is not None:
+                # 키 문자열
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._current_key = json.loads(b'"' + bytes(self._key) + b'"')
+                    self._key = None
+                    self._expect = "colon"
+                    continue
+                self._key.append(byte)
+                continue
+
+            if self._value is not None:
+                # 값 (문자열/중첩 객체 포함 원본 그대로 수집)
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif char == "\\":
+                        self._escape = True
+                    elif char == '"':
+                        self._in_string = False
+                elif char == '"':
+                    self._in_string = True
+                elif char in "[{":
+                    self._nesting += 1
+                elif char in "]}" and self._nesting > 0:
+                    self._nesting -= 1
+                elif self._nesting == 0 and char in ",}":
+                    self._fields[self._current_key] = bytes(self._value)
+                    self._value = None
+                    self._expect = "end" if char == "}" else "key"
+                    continue
+                self._value.append(byte)
+                continue
+
+            if byte in _WHITESPACE:
+                continue
+            if self._expect == "object" and char == "{":
+                self._expect = "key"
+            elif self._expect == "key" and char == '"':
+                self._key = bytearray()
+            elif self._expect in ("key", "comma") and char == "}":
+                self._expect = "end"
+            elif self._expect == "comma" and char == ",":
+                self._expect = "key"
+            elif self._expect == "colon" and char == ":":
+                self._expect = "value"
+            elif self._expect == "value":
+                if self._current_key == "data" and char == "[":
+                    self._in_data = True
+                    self._data_depth = self._frame_depth = 1
+                    return index + 1
+                self._value = bytearray([byte])
+                self._in_string = char == '"'
+                self._nesting = 1 if char in "[{" else 0
+            else:
+                raise ValueError(f"motion_data JSON 파싱 오류: 예상하지 못한 문자 {char!r}")
+        return len(chunk)
+
+    def _feed_data(self, chunk: bytes, position: int) -> int:
+        """
+        data 배열 파싱
+        대괄호 깊이를 누적합으로 한 번에 계산해 프레임 경계를 찾고, 청크 안의 완성된 프레임들을 한 번에 변환
+        끝나지 않은 프레임은 다음 청크까지 보관합니다.
+        """
+        view = np.frombuffer(chunk, dtype=np.uint8)[position:]
+        opens, closes = view == _OPEN, view == _CLOSE
+        # 각 바이트 직후의 깊이 (data 배열 안 = 1, 프레임 안 = 2, [x, y, z] 안 = 3)
+        depth = self._data_depth + np.cumsum(opens, dtype=np.int64) - np.cumsum(closes, dtype=np.int64)
+        data_end = np.flatnonzero(depth == 0)
+        end = int(data_end[0]) if data_end.size else len(view)
+        if end:
+            self._frame_depth = max(self._frame_depth, int(depth[:end].max()))
+            # 프레임 사이에는 쉼표/공백만 허용 ("data": [1, 2, 3]처럼 프레임이 아닌 값은 오류)
+            between = view[:end][(depth[:end] == 1) & ~closes[:end]]
+            if not np.isin(between, _SEPARATORS).all():
+                raise ValueError("motion_data.data는 프레임 배열의 배열이어야 합니다.")
+
+        frame_opens = np.flatnonzero(opens[:end] & (depth[:end] == 2))
+        frame_closes = np.flatnonzero(closes[:end] & (depth[:end] == 1))
+        last_close = -1
+        if frame_closes.size:
+            first = position if self._frame_open else position + int(frame_opens[0])
+            last_close = int(frame_closes[-1])
+            self._frame_carry += chunk[first:position + last_close + 1]
+            self._append_frames(bytes(self._frame_carry), len(frame_closes))
+            self._frame_carry.clear()
+            self._frame_open = False
+
+        pending = frame_opens[frame_opens > last_close]
+        if pending.size:
+            self._frame_open = True
+            self._frame_carry += chunk[position + int(pending[0]):position + end]
+        elif self._frame_open:
+            self._frame_carry += chunk[position:position + end]
+
+        if data_end.size:
+            self._in_data = False
+            self._data_depth = 0
+            self._expect = "comma"
+            return position + end + 1
+        if len(view):
+            self._data_depth = int(depth[-1])
+        return len(chunk)
+
+    def _append_frames(self, text: bytes, count: int):
+        """
+        완성된 프레임 count개(괄호 포함 바이트)를 배열에 기록
+        모든 프레임의 값 수가 같아야 하며, [[x, y, z], ...] 프레임은 관절마다 값 3개여야 함 (아니면 ValueError)
+        """
+        if self._frame_depth > 3:
+            raise ValueError("motion_data.data 프레임은 숫자 배열 또는 [x, y, z] 배열의 배열이어야 합니다.")
+        sizes, triples = _frame_shapes(text, count)
+        values = _parse_numbers(text)
+        if values is None or values.size != sizes.sum():
+            # 빈 배열, 숫자가 아닌 값 등: 프레임별로 변환해 정확한 값 수 확인 (숫자가 아니면 ValueError)
+            frames = [_parse_frame(frame, self._frames + row) for row, frame in enumerate(_split_frames(text))]
+            sizes = np.array([frame.size for frame in frames])
+            values = np.concatenate(frames) if frames else np.zeros(0, dtype=np.float32)
+
+        if self._data is None:
+            width = int(sizes[0])
+            hinted_joints = self._int_field("joints")
+            if hinted_joints and self._frame_depth == 3 and width != hinted_joints * 3:
+                raise ValueError(f"motion_data 프레임 0의 관절 수가 joints({hinted_joints})와 다릅니다.")
+            # frames는 클라이언트가 보낸 값이므로 힌트로만 사용 (상한까지만 미리 할당, 넘으면 두 배씩 늘림)
+            initial = min(self._int_field("frames") or _INITIAL_FRAMES, _MAX_HINT_FRAMES)
+            self._data = np.zeros((initial, width), dtype=np.float32)
+
+        width = self._data.shape[1]
+        irregular = np.flatnonzero(sizes != width)
+        if irregular.size:
+            row = int(irregular[0])
+            raise ValueError(
+                f"motion_data 프레임 {self._frames + row}의 값 수({int(sizes[row])})가 "
+                f"첫 프레임({width})과 다릅니다."
+            )
+        if self._frame_depth == 3 and not triples.all():
+            row = int(np.flatnonzero(~triples)[0])
+            raise ValueError(f"motion_data 프레임 {self._frames + row}의 관절 값은 [x, y, z]여야 합니다.")
+        rows = values.reshape(count, width)
+
+        needed = self._frames + count
+        if needed > self._data.shape[0]:
+            grown = np.zeros((max(needed, self._data.shape[0] * 2), width), dtype=np.float32)
+            grown[:self._frames] = self._data[:self._frames]
+            self._data = grown
+        self._data[self._frames:needed] = rows
+        self._frames = needed
+
+    def _int_field(self, key: str) -> Optional[int]:
+        """data보다 앞에서 읽은 정수 필드 (없거나 정수가 아니면 None)"""
+        try:
+            value = int(self._fields[key])
+        except (KeyError, ValueError):
+            return None
+        return value if value > 0 else None
+
+    def _finish_data(self) -> Optional[np.ndarray]:
+        if self._data is None:
+            return np.zeros((0, 0), dtype=np.float32) if self._frame_depth == 1 else None
+        data = self._data[:self._frames]
+        if self._frame_depth == 3 and data.shape[1] % 3 == 0:
+            # [[x, y, z], ...] 프레임은 [frames, joints, 3]으로 유지
+            data = data.reshape(self._frames, -1, 3)
+        return data
+
+
+def _numbers(text: bytes) -> bytes:
+    """프레임 바이트에서 괄호를 지운 쉼표 구분 숫자 (null은 0)"""
+    return text.translate(None, b"[]").replace(b"null", b"0").strip(_WHITESPACE)
+
+
+def _parse_numbers(text: bytes) -> Optional[np.ndarray]:
+    """여러 프레임의 숫자를 한 번에 float32로 변환 (빈 프레임 등으로 실패하면 None)"""
+    numbers = _numbers(text)
+    try:
+        return np.array(numbers.split(b","), dtype=np.float32) if numbers else np.zeros(0, dtype=np.float32)
+    except ValueError:
+        return None
+
+
+def _parse_frame(text: bytes, frame: int) -> np.ndarray:
+    """프레임 하나의 숫자를 float32로 변환"""
+    numbers = _numbers(text)
+    try:
+        return np.array(numbers.split(b","), dtype=np.float32) if numbers else np.zeros(0, dtype=np.float32)
+    except ValueError as e:
+        raise ValueError(f"motion_data 프레임 {frame} 파싱 오류: {e}")
+
+
+def _frame_shapes(text: bytes, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    연속된 프레임 바이트에서 프레임별 (값 수, 프레임이 [x, y, z] 배열로만 이루어졌는지) 계산
+    값 수는 프레임 안의 쉼표 수 + 1이므로 빈 배열이 있으면 실제와 다를 수 있음 (호출자가 변환 결과로 확인)
+    """
+    view = np.frombuffer(text, dtype=np.uint8)
+    opens, closes = view == _OPEN, view == _CLOSE
+    depth = np.cumsum(opens, dtype=np.int64) - np.cumsum(closes, dtype=np.int64)
+    frame_ends = np.flatnonzero(closes & (depth == 0))
+    commas = (view == _COMMA) & (depth >= 1)
+    sizes = np.bincount(np.searchsorted(frame_ends, np.flatnonzero(commas)), minlength=count)[:count] + 1
+    # 관절 배열([x, y, z])마다 안쪽 쉼표가 정확히 2개인지
+    joint_ends = np.flatnonzero(closes & (depth == 1))
+    joint_commas = np.bincount(
+        np.searchsorted(joint_ends, np.flatnonzero(commas & (depth == 2))), minlength=joint_ends.size
+    )[:joint_ends.size]
+    joints = np.bincount(np.searchsorted(frame_ends, joint_ends), minlength=count)[:count]
+    bad_joints = np.bincount(np.searchsorted(frame_ends, joint_ends[joint_commas != 2]), minlength=count)[:count]
+    return sizes, (bad_joints == 0) & (joints * 3 == sizes)
+
+
+def _split_frames(text: bytes):
+    """연속된 프레임 바이트를 프레임별로 분리"""
+    depth = 0
+    start = 0
+    for match in _BRACKETS.finditer(text):
+        if text[match.start()] == _OPEN:
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                yield text[start:match.end()]
+
+
+def _multipart_parser(
+    content_type: str,
+    fields: Dict[str, str],
+    start_part: Callable[[str, Optional[str]], Optional[Callable[[bytes], None]]]
+) -> MultipartParser:
+    """
+    python-multipart 스트리밍 파서 생성
+
+    start_part(필드 이름, 파일명)이 함수를 반환하면 그 파트의 데이터를 받는 대로 그 함수에 넘기고,
+    None이면 일반 필드로 모아 fields에 문자열로 저장합니다. (MAX_FIELD_BYTES, MAX_FIELDS 제한)
+    """
+    _, options = parse_options_header(content_type)
+    boundary = options.get(b"boundary")
+    if not boundary:
+        raise ValueError("Invalid multipart/form-data: no boundary")
+
+    part = {"headers": {}, "field": b"", "value": b"", "name": None, "buffer": None, "sink": None}
+
+    def on_part_begin():
+        part.update(headers={}, name=None, buffer=None, sink=None)
+
+    def on_header_field(data: bytes, start: int, end: int):
+        part["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part.update(field=b"", value=b"")
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        name = disposition.get(b"name", b"").decode("utf-8", errors="replace")
+        filename = disposition.get(b"filename")
+        part["name"] = name
+        part["sink"] = start_part(name, filename.decode("utf-8", errors="replace") if filename is not None else None)
+        if part["sink"] is None:
+            if len(fields) >= MAX_FIELDS:
+                raise ValueError("폼 필드가 너무 많습니다.")
+            part["buffer"] = bytearray()
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if part["sink"] is not None:
+            part["sink"](data[start:end])
+            return
+        part["buffer"] += data[start:end]
+        if len(part["buffer"]) > MAX_FIELD_BYTES:
+            raise ValueError(f"{part['name']} 필드가 너무 큽니다.")
+
+    def on_part_end():
+        if part["buffer"] is not None and part["name"]:
+            fields[part["name"]] = part["buffer"].decode("utf-8", errors="replace")
+
+    return MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+
+async def parse_motion_form(
+    stream: AsyncIterator[bytes],
+    content_type: str,
+    motion_field: str = "motion_data"
+) -> Tuple[Dict[str, str], Optional[Dict]]:
+    """
+    multipart/form-data 본문을 받는 대로 파싱
+
+    Args:
+        stream: 요청 본문 (request.stream())
+        content_type: Content-Type 헤더 (boundary 포함)
+        motion_field: MotionJSONDecoder로 디코딩할 필드 이름
+
+    Returns:
+        (나머지 필드 이름 → 문자열 값, 디코딩한 모션 또는 None)
+
+    Raises:
+        ValueError: boundary가 없거나 필드/JSON 형식이 잘못됨
+    """
+    fields: Dict[str, str] = {}
+    decoder: Optional[MotionJSONDecoder] = None
+
+    def start_part(name: str, filename: Optional[str]):
+        nonlocal decoder
+        if name != motion_field:
+            return None
+        decoder = MotionJSONDecoder()
+        return decoder.feed
+
+    parser = _multipart_parser(content_type, fields, start_part)
+    async for chunk in stream:
+        if chunk:
+            parser.write(chunk)
+    parser.finalize()
+
+    return fields, decoder.close() if decoder is not None else None
+
+
+async def parse_upload_form(
+    stream: AsyncIterator[bytes],
+    content_type: str,
+    spool: UploadSpool,
+    file_field: str = "audio_file",
+    prefix: Optional[str] = None
+) -> Tuple[Dict[str, str], Optional[SpooledFile]]:
+    """
+    파일 업로드가 있는 multipart/form-data 본문을 받는 대로 파싱
+    file_field 파트는 요청 본문 청크를 받을 때마다 UploadSpool에 바로 기록하므로, 파일이 한도를 넘으면
+    나머지 본문을 받기 전에 UploadTooLarge로 중단합니다. (다른 임시 파일이나 메모리 버퍼 없음)
+
+    Args:
+        stream: 요청 본문 (request.stream())
+        content_type: Content-Type 헤더 (boundary 포함)
+        spool: 파일을 저장할 업로드 스풀
+        file_field: 파일 필드 이름
+        prefix: 저장 파일 이름 접두어 (작업 ID 등)
+
+    Returns:
+        (나머지 필드 이름 → 문자열 값, 저장한 파일 또는 None)
+
+    Raises:
+        ValueError: boundary가 없거나 필드 형식이 잘못됨, 파일 필드가 두 번 이상 있음
+        UploadTooLarge, SpoolFull: 업로드 스풀 제한 (쓰던 파일은 삭제)
+    """
+    fields: Dict[str, str] = {}
+    writer: Optional[SpoolWriter] = None
+    # 파서 콜백은 동기 함수이므로 파일 데이터는 모았다가 청크마다 비동기로 기록
+    pending: List[bytes] = []
+
+    def start_part(name: str, filename: Optional[str]):
+        nonlocal writer
+        if name != file_field:
+            return None
+        if writer is not None:
+            raise ValueError(f"{file_field} 필드가 두 번 이상 있습니다.")
+        writer = spool.open(filename, prefix)
+        return pending.append
+
+    try:
+        parser = _multipart_parser(content_type, fields, start_part)
+        async for chunk in stream:
+            if not chunk:
+                continue
+            parser.write(chunk)
+            if pending:
+                await writer.write(b"".join(pending))
+                pending.clear()
+        parser.finalize()
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+
+    return fields, writer.close() if writer is not None else None
@@ -0,0 +1,193 @@
+"""
+업로드 스풀
+업로드 파일을 메모리에 한 번에 읽지 않고 요청 본문 청크를 받는 대로 임시 디렉터리에 기록합니다.
+(streaming_form.parse_upload_form이 multipart 파일 파트를 SpoolWriter에 전달)
+
+- 청크마다 크기 제한을 확인하므로 한도를 넘는 업로드는 넘는 순간 중단 (요청당 메모리는 청크 크기로 일정)
+- 청크를 쓰면서 sha256을 계산 (같은 오디오 재업로드 식별/캐시 키로 사용 가능)
+- 스풀 디렉터리 전체 크기에도 한도가 있어, 동시 업로드와 처리 대기 중인 파일이 디스크를 다 쓰지 않음
+  (사용량은 쓰기/삭제 때 갱신하는 누적값이고, 다른 프로세스가 지운 파일은 주기적으로 디렉터리를 다시 세어 반영)
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# 디렉터리 크기를 다시 확인하는 간격 (초, worker 프로세스가 처리 후 지운 파일 반영)
+DEFAULT_RESCAN_SECONDS = 5.0
+
+
+class UploadTooLarge(Exception):
+    """업로드 파일이 크기 제한을 넘음"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"업로드 파일이 {max_bytes // (1024 * 1024)}MB 제한을 넘었습니다.")
+
+
+class SpoolFull(Exception):
+    """스풀 디렉터리가 가득 참 (처리 대기 중인 업로드가 많음)"""
+
+
+@dataclass
+class SpooledFile:
+    """디스크에 저장된 업로드 (path는 절대 경로, 사용 후 호출자가 삭제)"""
+    path: str
+    size: int
+    sha256: str
+    filename: Optional[str] = None
+
+
+class SpoolWriter:
+    """
+    쓰는 중인 업로드 파일 하나 (UploadSpool.open으로 생성)
+    write()마다 크기 제한을 확인하므로 요청 본문을 받는 중에 한도를 넘으면 바로 중단할 수 있습니다.
+    """
+
+    def __init__(self, spool: "UploadSpool", path: str, filename: Optional[str] = None):
+        self.spool = spool
+        self.path = path
+        self.filename = filename
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._file = open(path, "wb")
+
+    async def write(self, chunk: bytes):
+        """
+        청크 추가
+
+        Raises:
+            UploadTooLarge: 파일이 max_file_bytes를 넘음
+            SpoolFull: 디렉터리 크기 한도를 넘음
+        """
+        if not chunk:
+            return
+        size = self.size + len(chunk)
+        if size > self.spool.max_file_bytes:
+            raise UploadTooLarge(self.spool.max_file_bytes)
+        self.spool._reserve(self.path, size)
+        self.size = size
+        self._digest.update(chunk)
+        await asyncio.to_thread(self._file.write, chunk)
+
+    def close(self) -> SpooledFile:
+        """쓰기 완료 (파일은 남기고 스풀 사용량에 반영)"""
+        self._file.close()
+        self.spool._finish(self.path, self.size)
+        return SpooledFile(path=self.path, size=self.size, sha256=self._digest.hexdigest(), filename=self.filename)
+
+    def abort(self):
+        """쓰던 파일 삭제 (제한 초과, 요청 파싱 실패 등)"""
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.spool._finish(self.path, None)
+
+
+class UploadSpool:
+    """
+    크기 제한이 있는 업로드 임시 저장소
+
+    사용법:
+        spool = UploadSpool("temp", max_file_bytes=100 * 1024 * 1024)
+        writer = spool.open(filename, prefix=job_id)
+        try:
+            async for chunk in chunks:
+                await writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        spooled = writer.close()
+        ...
+        spool.remove(spooled.path)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_file_bytes: int = 100 * 1024 * 1024,
+        max_total_bytes: int = 1024 * 1024 * 1024,
+        rescan_seconds: float = DEFAULT_RESCAN_SECONDS
+    ):
+        """
+        Args:
+            directory: 임시 파일 디렉터리 (worker 모드에서 다른 프로세스가 읽으므로 절대 경로로 변환)
+            max_file_bytes: 파일 하나의 최대 크기
+            max_total_bytes: 디렉터리 전체 최대 크기 (쓰는 중인 업로드 포함)
+            rescan_seconds: 디렉터리 크기를 다시 확인하는 간격 (다른 프로세스가 지운 파일 반영)
+        """
+        self.directory = os.path.abspath(directory)
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.rescan_seconds = rescan_seconds
+        # 이 프로세스에서 쓰는 중인 업로드의 경로와 받은 크기 (디렉터리 크기와 별도로 계산)
+        self._writing: Dict[str, int] = {}
+        self._writing_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        # 완료된 파일 크기 합 (쓰기/삭제 시 갱신하고 rescan_seconds마다 디렉터리로 보정)
+        self._stored_bytes = self._disk_usage()
+        self._scanned_at = time.monotonic()
+
+    def open(self, filename: Optional[str] = None, prefix: Optional[str] = None) -> SpoolWriter:
+        """새 업로드 파일 열기 (업로드 파일명은 경로에 쓰지 않고 확장자만 유지, 오디오 디코더가 확장자로 형식 판단)"""
+        extension = os.path.splitext(os.path.basename(filename or ""))[1][:16]
+        path = os.path.join(self.directory, f"{prefix or uuid.uuid4()}_upload{extension}")
+        return SpoolWriter(self, path, filename)
+
+    def remove(self, path: str):
+        """처리가 끝난 업로드 삭제 (사용량에서 바로 뺌)"""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._stored_bytes = max(0, self._stored_bytes - size)
+
+    def _reserve(self, path: str, size: int):
+        """쓰는 중인 업로드의 크기를 size로 늘림 (디렉터리 한도를 넘으면 SpoolFull)"""
+        with self._lock:
+            if time.monotonic() - self._scanned_at >= self.rescan_seconds:
+                self._stored_bytes = self._disk_usage()
+                self._scanned_at = time.monotonic()
+            writing = self._writing_bytes - self._writing.get(path, 0) + size
+            if self._stored_bytes + writing > self.max_total_bytes:
+                raise SpoolFull(f"업로드 임시 공간이 부족합니다. ({self.max_total_bytes // (1024 * 1024)}MB)")
+            self._writing[path] = size
+            self._writing_bytes = writing
+
+    def _finish(self, path: str, size: Optional[int]):
+        """쓰기 종료 (size가 있으면 완료된 파일로 사용량에 남김, None이면 삭제됨)"""
+        with self._lock:
+            self._writing_bytes -= self._writing.pop(path, 0)
+            if size is not None:
+                self._stored_bytes += size
+
+    def _disk_usage(self) -> int:
+        """디렉터리의 파일 크기 합 (이 프로세스에서 쓰는 중인 파일은 _writing으로 세므로 제외)"""
+        total = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.path in self._writing:
+                    continue
+                try:
+                    if entry.is_file():
+                        total += entry.stat().st_size
+                except FileNotFoundError:
+                    # 처리가 끝나 방금 삭제된 파일
+                    pass
+        return total
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "bytes": self._stored_bytes,
+                "writing_bytes": self._writing_bytes,
+                "max_total_bytes": self.max_total_bytes,
+                "max_file_bytes": self.max_file_bytes,
+            }
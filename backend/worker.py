@@ -0,0 +1,115 @@
+"""
+생성 워커
+SQLite 작업 대기열(JOB_STORE_PATH)에서 작업을 꺼내 오디오 분석과 모션 생성을 실행하고
+결과를 같은 파일의 작업 저장소에 기록합니다. API 서버는 GENERATION_MODE=worker로 실행하면
+작업을 대기열에 넣고 상태만 응답하므로, 생성 처리량은 워커 수로 따로 늘릴 수 있고
+워커가 비정상 종료되어도 API 서버는 영향을 받지 않습니다.
+
+사용법:
+    JOB_STORE_PATH=jobs.sqlite3 python worker.py
+    JOB_STORE_PATH=jobs.sqlite3 python worker.py --worker-id gpu-1 --poll-interval 0.5
+"""
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+
+from services.audio_processor import AudioProcessor
+from services.motion_generator import MotionGenerator, DEFAULT_INTERNAL_FPS
+from services.job_store import SQLiteJobStore
+from services.job_queue import SQLiteJobQueue
+from services.generation_pipeline import GenerationPipeline, queue_position_updater
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모션 생성 워커")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}",
+                        help="워커 이름 (기본값: 호스트명-PID)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="대기열이 비었을 때 확인 간격 (초)")
+    args = parser.parse_args()
+
+    # API 서버(main.py)와 같은 환경 변수로 같은 SQLite 파일을 사용
+    path = os.environ.get("JOB_STORE_PATH", "jobs.sqlite3")
+    job_store = SQLiteJobStore(
+        path,
+        ttl_seconds=float(os.environ.get("JOB_TTL_SECONDS", "3600")),
+        max_jobs=int(os.environ.get("JOB_STORE_MAX_JOBS", "200")),
+        max_bytes=int(float(os.environ.get("JOB_STORE_MAX_MB", "512")) * 1024 * 1024)
+    )
+    job_queue = SQLiteJobQueue(
+        path,
+        max_queue=int(os.environ.get("GENERATION_QUEUE_SIZE", "32")),
+        lease_seconds=float(os.environ.get("GENERATION_LEASE_SECONDS", "120")),
+        max_attempts=int(os.environ.get("GENERATION_MAX_ATTEMPTS", "2")),
+        on_position=queue_position_updater(job_store)
+    )
+
+    # 워커는 모델 로드가 끝난 뒤에 작업을 받음 (로드 실패 시 모의 모드로 생성)
+    motion_generator = MotionGenerator(
+        lazy=True,
+        internal_fps=float(os.environ.get("MOTION_INTERNAL_FPS", DEFAULT_INTERNAL_FPS))
+    )
+    loaded = motion_generator.load_model()
+    pipeline = GenerationPipeline(job_store, AudioProcessor(), motion_generator)
+
+    stopping = threading.Event()
+
+    def request_stop(signum, frame):
+        # 실행 중인 작업은 끝까지 처리한 뒤 종료
+        print(f"🛑 종료 신호 수신 ({args.worker_id}), 현재 작업 완료 후 종료합니다.")
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    print(f"✅ 생성 워커 시작 ({args.worker_id}, 대기열: {path}, 모델 로드: {loaded})")
+
+    while not stopping.is_set():
+        # 다른 워커가 비정상 종료하며 남긴 작업 정리
+        for job_ids in job_queue.reap():
+            for job_id in job_ids:
+                try:
+                    job_store.fail(job_id, "생성 워커가 응답하지 않아 작업이 중단되었습니다.")
+                except KeyError:
+                    pass
+
+        task = job_queue.claim(args.worker_id)
+        if task is None:
+            stopping.wait(args.poll_interval)
+            continue
+
+        # 작업 중에는 임대 만료 시간의 1/4마다 heartbeat 기록
+        done = threading.Event()
+
+        def keep_alive(job_id=task["job_id"]):
+            while not done.wait(job_queue.lease_seconds / 4):
+                try:
+                    job_queue.heartbeat(job_id)
+                except Exception as e:
+                    print(f"⚠️  heartbeat 실패 (job_id: {job_id}): {e}")
+
+        heartbeat = threading.Thread(target=keep_alive, name="generation-heartbeat", daemon=True)
+        heartbeat.start()
+        start = time.perf_counter()
+        try:
+            pipeline.run(task["kind"], task["payload"])
+        except Exception as e:
+            # 처리 함수가 작업 상태에 오류를 기록하므로 여기서는 잘못된 작업만 실패 처리
+            print(f"❌ 워커 작업 오류 (job_id: {task['job_id']}): {e}")
+            for job_id in task["job_ids"]:
+                try:
+                    job_store.fail(job_id, str(e))
+                except KeyError:
+                    pass
+        finally:
+            done.set()
+            heartbeat.join()
+            job_queue.finish(task["job_id"], time.perf_counter() - start)
+
+    print(f"👋 생성 워커 종료 ({args.worker_id})")
+
+
+if __name__ == "__main__":
+    main()
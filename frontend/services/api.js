@@ -59,7 +59,7 @@ export const analyzeAudio = async (audioFile) => {
 /**
  * 모션 데이터 내보내기
  * @param {Object} motionData - 모션 데이터
- * @param {string} format - 내보내기 형식 ('fbx', 'bvh', 'json')
+ * @param {string} format - 내보내기 형식 ('glb', 'fbx', 'bvh', 'json')
  * @returns {Promise<Blob>} 다운로드할 파일
  */
 export const exportMotion = async (motionData, format = 'json') => {
@@ -109,6 +109,34 @@ export const exportMotion = async (motionData, format = 'json') => {
   }
 };
 
+/**
+ * 완료된 작업의 모션 내보내기 (서버에 저장된 결과로 변환, 모션을 다시 올리지 않음)
+ * @param {string} jobId - 작업 ID
+ * @param {string} format - 내보내기 형식 ('glb', 'fbx', 'bvh', 'json')
+ * @returns {Promise<Blob>} 다운로드할 파일
+ */
+export const exportJobMotion = async (jobId, format = 'json') => {
+  const params = new URLSearchParams({ format });
+  const response = await fetch(`${API_BASE_URL}/api/jobs/${jobId}/export?${params}`, {
+    signal: AbortSignal.timeout(300000) // 5분
+  });
+
+  if (!response.ok) {
+    let error;
+    try {
+      error = await response.json();
+    } catch (e) {
+      error = { detail: `HTTP ${response.status}: ${response.statusText}` };
+    }
+    console.error('❌ 내보내기 오류:', { jobId, format, status: response.status, error });
+    throw new Error(error.detail || 'Export failed');
+  }
+
+  const blob = await response.blob();
+  console.log('✅ 모션 내보내기 완료:', { jobId, format, size: blob.size });
+  return blob;
+};
+
 /**
  * 안무 생성 요청
  * @param {Object} params - 생성 파라미터
@@ -160,11 +188,23 @@ export const generateMotion = async ({
 /**
  * 생성 작업 상태 조회
  * @param {string} jobId - 작업 ID
+ * @param {Object} options - 롱 폴링 옵션
+ * @param {number} options.wait - 작업이 바뀔 때까지 기다리는 최대 시간 (초, 0이면 바로 응답)
+ * @param {number} options.version - 마지막으로 받은 상태의 version (이후 변경을 기다림)
  * @returns {Promise<Object>} 작업 상태
  */
-export const getGenerationStatus = async (jobId) => {
+export const getGenerationStatus = async (jobId, { wait = 0, version } = {}) => {
+  const params = new URLSearchParams();
+  if (wait > 0) {
+    params.append('wait', wait.toString());
+    if (version !== undefined && version !== null) {
+      params.append('version', version.toString());
+    }
+  }
+  const query = params.toString() ? `?${params}` : '';
+  
   try {
-    const response = await fetch(`${API_BASE_URL}/api/generation-status/${jobId}`);
+    const response = await fetch(`${API_BASE_URL}/api/generation-status/${jobId}${query}`);
     
     if (!response.ok) {
       const error = await response.json();
@@ -179,17 +219,140 @@ export const getGenerationStatus = async (jobId) => {
 };
 
 /**
- * 생성 작업 상태를 폴링하여 완료까지 대기
+ * 완료된 작업의 결과 모션 조회
+ * @param {string} jobId - 작업 ID
+ * @param {Object} options - 조회 범위 (생략하면 전체)
+ * @param {number} options.start - 시작 프레임
+ * @param {number} options.end - 끝 프레임 (포함하지 않음)
+ * @param {number[]} options.joints - 관절 인덱스 목록
+ * @returns {Promise<Object>} 모션 데이터 (frames, joints, fps, data, total_frames ...)
+ */
+export const getGenerationResult = async (jobId, { start, end, joints } = {}) => {
+  const params = new URLSearchParams();
+  if (start !== undefined) params.append('start', start.toString());
+  if (end !== undefined) params.append('end', end.toString());
+  if (joints && joints.length > 0) params.append('joints', joints.join(','));
+  const query = params.toString() ? `?${params}` : '';
+  
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/jobs/${jobId}/result${query}`);
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to get generation result');
+    }
+    
+    return await response.json();
+  } catch (error) {
+    console.error('Get generation result error:', error);
+    throw error;
+  }
+};
+
+/**
+ * f32 결과 디코딩
+ * 헤더: magic "KPM1" | frames(uint32) | joints(uint32) | fps(float32), little-endian 16바이트
+ * @param {ArrayBuffer} buffer - 응답 본문
+ * @returns {Object} { frames, joints, fps, data: Float32Array }
+ */
+const decodeMotion = (buffer) => {
+  const header = new DataView(buffer, 0, 16);
+  if (String.fromCharCode(...new Uint8Array(buffer, 0, 4)) !== 'KPM1') {
+    throw new Error('Invalid motion payload');
+  }
+  const frames = header.getUint32(4, true);
+  const joints = header.getUint32(8, true);
+  return {
+    frames,
+    joints,
+    fps: header.getFloat32(12, true),
+    data: new Float32Array(buffer, 16, frames * joints * 3),
+  };
+};
+
+/**
+ * q16 결과 디코딩 (x = offset + q × scale)
+ * 헤더: magic "KPQ1" | frames | joints | fps | flags(bit0: delta), 이어서 scale[C], offset[C], int16[frames][C]
+ * @param {ArrayBuffer} buffer - 응답 본문
+ * @returns {Object} { frames, joints, fps, data: Float32Array }
+ */
+const decodeQuantizedMotion = (buffer) => {
+  const header = new DataView(buffer, 0, 20);
+  if (String.fromCharCode(...new Uint8Array(buffer, 0, 4)) !== 'KPQ1') {
+    throw new Error('Invalid motion payload');
+  }
+  const frames = header.getUint32(4, true);
+  const joints = header.getUint32(8, true);
+  const delta = (header.getUint32(16, true) & 1) === 1;
+  const channels = joints * 3;
+  const scale = new Float32Array(buffer, 20, channels);
+  const offset = new Float32Array(buffer, 20 + 4 * channels, channels);
+  const q = new Int16Array(buffer, 20 + 8 * channels, frames * channels);
+  
+  const data = new Float32Array(frames * channels);
+  const previous = new Int16Array(channels);
+  for (let f = 0; f < frames; f++) {
+    for (let c = 0; c < channels; c++) {
+      const i = f * channels + c;
+      // delta는 int16 wraparound 누적합으로 복원
+      const value = delta ? ((previous[c] + q[i]) << 16) >> 16 : q[i];
+      previous[c] = value;
+      data[i] = offset[c] + value * scale[c];
+    }
+  }
+  return { frames, joints, fps: header.getFloat32(12, true), data };
+};
+
+/**
+ * 완료된 작업의 결과 모션을 바이너리(float32)로 조회
+ * JSON 파싱 없이 응답 버퍼를 Float32Array로 바로 사용합니다.
+ * @param {string} jobId - 작업 ID
+ * @param {Object} options - 조회 범위 (getGenerationResult와 같음)
+ * @param {boolean} options.quantized - true면 int16 양자화 형식(q16, 약 절반 크기)으로 받아 복원 (미리보기용)
+ * @returns {Promise<Object>} { frames, joints, fps, start, totalFrames, data: Float32Array(frames * joints * 3) }
+ */
+export const getGenerationResultBinary = async (jobId, { start, end, joints, quantized = false } = {}) => {
+  const params = new URLSearchParams(quantized ? { format: 'q16', delta: 'true' } : { format: 'f32' });
+  if (start !== undefined) params.append('start', start.toString());
+  if (end !== undefined) params.append('end', end.toString());
+  if (joints && joints.length > 0) params.append('joints', joints.join(','));
+  
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/jobs/${jobId}/result?${params}`);
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to get generation result');
+    }
+    
+    const buffer = await response.arrayBuffer();
+    return {
+      ...(quantized ? decodeQuantizedMotion(buffer) : decodeMotion(buffer)),
+      start: Number(response.headers.get('X-Motion-Start') || 0),
+      totalFrames: Number(response.headers.get('X-Motion-Total-Frames') || 0),
+    };
+  } catch (error) {
+    console.error('Get generation result error:', error);
+    throw error;
+  }
+};
+
+/**
+ * 생성 작업 상태를 롱 폴링하여 완료까지 대기
+ * 서버가 작업이 바뀔 때까지 응답을 보류하므로 진행 상황이 바뀔 때만 요청이 오갑니다.
  * @param {string} jobId - 작업 ID
  * @param {Function} onProgress - 진행 상황 콜백 (progress: number)
- * @param {number} interval - 폴링 간격 (ms)
- * @returns {Promise<Object>} 완료된 모션 데이터
+ * @param {number} interval - 서버가 version을 주지 않을 때(롱 폴링 미지원)의 폴링 간격 (ms)
+ * @param {number} wait - 요청당 최대 대기 시간 (초)
+ * @returns {Promise<Object>} 완료된 작업 상태 (motion_data에 결과 모션 포함)
  */
-export const pollGenerationStatus = async (jobId, onProgress, interval = 1000) => {
+export const pollGenerationStatus = async (jobId, onProgress, interval = 1000, wait = 25) => {
+  let version;
+  
   return new Promise((resolve, reject) => {
     const poll = async () => {
       try {
-        const status = await getGenerationStatus(jobId);
+        const status = await getGenerationStatus(jobId, { wait, version });
         
         // 진행 상황 콜백 호출
         if (onProgress) {
@@ -197,9 +360,15 @@ export const pollGenerationStatus = async (jobId, onProgress, interval = 1000) =
         }
         
         if (status.status === 'completed') {
-          resolve(status);
+          // 상태 응답에는 결과가 없으므로 한 번만 따로 조회
+          const motionData = await getGenerationResult(jobId);
+          resolve({ ...status, motion_data: motionData });
         } else if (status.status === 'failed') {
           reject(new Error(status.message || 'Generation failed'));
+        } else if (status.version !== undefined && status.version !== null) {
+          // 바뀐 상태를 받았으므로 바로 다음 변경을 기다림
+          version = status.version;
+          poll();
         } else {
           // 계속 폴링
           setTimeout(poll, interval);